@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""Measure the CPU time consumed by the ResourceMonitor sampling loop itself, at several sampling intervals"""
+
+from taskManager.ResourceMonitor import ResourceMonitor
+from time import process_time, monotonic, sleep
+import argparse
+import tempfile
+import threading
+
+
+def measure_overhead(interval, duration, output_dir):
+    monitor = ResourceMonitor(output_dir=output_dir, interval=interval, aws=False)
+
+    thread = threading.Thread(target=monitor.launch)
+
+    cpu_start = process_time()
+    wall_start = monotonic()
+
+    thread.start()
+    sleep(duration)
+    monitor.kill()
+    thread.join()
+
+    cpu_time = process_time() - cpu_start
+    wall_time = monotonic() - wall_start
+
+    return cpu_time, wall_time, monitor.scheduler
+
+
+def main(intervals, duration):
+    print("interval_s\tcpu_s\twall_s\tcpu_percent\tticks\tlate\tmissed\tmax_lateness_s")
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for interval in intervals:
+            cpu_time, wall_time, scheduler = measure_overhead(interval=interval,
+                                                              duration=duration,
+                                                              output_dir=output_dir)
+
+            print("%.1f\t%.3f\t%.1f\t%.3f\t%d\t%d\t%d\t%.4f" % (interval, cpu_time, wall_time,
+                                                               100 * cpu_time / wall_time,
+                                                               scheduler.ticks, scheduler.late_ticks,
+                                                               scheduler.missed_ticks, scheduler.max_lateness))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--intervals",
+                        required=False,
+                        default="0.1,1,5",
+                        type=str,
+                        help="Comma-separated list of sampling intervals (in seconds) to benchmark")
+    parser.add_argument("--duration",
+                        required=False,
+                        default=30,
+                        type=float,
+                        help="How long (in seconds) to run the monitor at each interval")
+
+    args = parser.parse_args()
+
+    main(intervals=list(map(float, args.intervals.split(","))), duration=args.duration)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""Compare the throughput of a chatty command with its output redirected straight to a file, and with the output
+captured through ProcessHandler's pipes (see output_tail_kb)"""
+
+from taskManager.ProcessHandler import ProcessHandler
+from time import perf_counter
+import subprocess
+import sys
+import argparse
+import tempfile
+import os
+
+
+def get_command(n_megabytes, line_length):
+    """
+    A child that writes `n_megabytes` of `line_length` byte lines to stdout, line buffered so that it is as chatty as
+    possible
+    """
+    n_lines = int(n_megabytes * 1024 * 1024 / line_length)
+    script = "import sys\n" \
+             "line = 'x' * %d + '\\n'\n" \
+             "out = open(sys.stdout.fileno(), 'w', buffering=1)\n" \
+             "for i in range(%d):\n" \
+             "    out.write(line)\n" % (line_length - 1, n_lines)
+
+    return [sys.executable, "-c", script]
+
+
+def run_plain(arguments, output_path):
+    with open(output_path, "wb") as file:
+        start = perf_counter()
+        subprocess.Popen(arguments, stdout=file).wait()
+
+        return perf_counter() - start
+
+
+def run_captured(arguments, output_path, output_tail_kb):
+    handler = ProcessHandler(aws=False, output_tail_kb=output_tail_kb)
+
+    start = perf_counter()
+    handler.launch_process(arguments, redirect_stdout=output_path)
+
+    return perf_counter() - start
+
+
+def main(n_megabytes, line_length, output_tail_kb, n_trials):
+    arguments = get_command(n_megabytes, line_length)
+
+    print("mode\ttrial\tseconds\tmb_per_s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, "stdout.txt")
+
+        for trial in range(n_trials):
+            for mode in ["plain", "captured"]:
+                if mode == "plain":
+                    duration = run_plain(arguments, output_path)
+                else:
+                    duration = run_captured(arguments, output_path, output_tail_kb)
+
+                size = os.path.getsize(output_path) / (1024 * 1024)
+                print("%s\t%d\t%.3f\t%.1f" % (mode, trial, duration, size / duration))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--megabytes",
+                        required=False,
+                        default=200,
+                        type=float,
+                        help="How much output the child writes")
+    parser.add_argument("--line_length",
+                        required=False,
+                        default=100,
+                        type=int,
+                        help="Length (in bytes) of each line the child writes")
+    parser.add_argument("--output_tail_kb",
+                        required=False,
+                        default=16,
+                        type=int,
+                        help="Size of the captured tail of each stream")
+    parser.add_argument("--trials",
+                        required=False,
+                        default=3,
+                        type=int,
+                        help="Number of runs of each mode")
+
+    args = parser.parse_args()
+
+    main(n_megabytes=args.megabytes, line_length=args.line_length, output_tail_kb=args.output_tail_kb,
+         n_trials=args.trials)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""Time plot_resources_main on a synthetic 24 hour log, in the default mode (300 DPI, new figure) and in fast mode
+(80 DPI, reused figure template), as used for notification attachments"""
+
+from benchmarks.benchmark_read_tsv import write_synthetic_log
+from taskManager import plotting
+from matplotlib import pyplot
+from time import monotonic
+import argparse
+import tempfile
+import numpy
+import os
+
+
+def render(path, output_dir, fast):
+    start_time = monotonic()
+    plotting.plot_resources_main(path, output_dir, fast=fast)
+    elapsed = monotonic() - start_time
+
+    if not fast:
+        pyplot.close("all")
+
+    return elapsed
+
+
+def main(hours, interval, repeats):
+    # Both modes on the same backend, so that only the rendering differs
+    pyplot.switch_backend("Agg")
+
+    n_rows = int(hours * 3600 / interval)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "log_benchmark.txt")
+        write_synthetic_log(path, n_rows)
+
+        print("rows\tmode\tfirst_s\tmedian_s")
+
+        for name, fast in [("default", False), ("fast", True)]:
+            plotting.figure_templates.clear()
+
+            # The first fast render also builds the figure template
+            times = [render(path, tmp_dir, fast) for i in range(repeats)]
+
+            print("%d\t%s\t%.3f\t%.3f" % (n_rows, name, times[0], numpy.median(times[1:] if repeats > 1 else times)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--hours",
+                        required=False,
+                        default=24,
+                        type=float,
+                        help="Duration of the synthetic log")
+    parser.add_argument("--interval",
+                        required=False,
+                        default=5,
+                        type=float,
+                        help="Logging interval (seconds) of the synthetic log")
+    parser.add_argument("--repeats",
+                        required=False,
+                        default=5,
+                        type=int,
+                        help="Renders per mode")
+
+    args = parser.parse_args()
+
+    main(hours=args.hours, interval=args.interval, repeats=args.repeats)
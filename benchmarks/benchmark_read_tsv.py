@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""Compare the per-cell TSV parser that plotting.read_tsv used to be with the current bulk NumPy loader"""
+
+from taskManager.plotting import read_tsv
+from collections import defaultdict
+from time import monotonic
+import argparse
+import tempfile
+import tracemalloc
+import random
+import os
+
+
+def read_tsv_legacy(file_path):
+    """
+    The original implementation of plotting.read_tsv: one float() call per cell, appended to python lists
+    """
+    headers = None
+    header_indexes = None
+
+    data = defaultdict(list)
+    static_data = defaultdict(list)
+
+    with open(file_path, "r") as file:
+        for l, line in enumerate(file):
+            line = line.strip().split("\t")
+            if l == 0:
+                static_headers = line
+                static_header_indexes = {x: i for i, x in enumerate(line)}
+
+            elif l == 1:
+                for i, item in enumerate(line):
+                    key = static_headers[i]
+                    static_data[key].append(float(item))
+
+            elif l == 2:
+                headers = line
+                header_indexes = {x: i for i, x in enumerate(line)}
+            else:
+                for i, item in enumerate(line):
+                    key = headers[i]
+                    data[key].append(float(item))
+
+    return headers, header_indexes, data, static_headers, static_header_indexes, static_data
+
+
+def write_synthetic_log(path, n_rows):
+    headers = ["time_elapsed_s", "cpu_percent", "virtual_memory_percent", "swap_memory_percent",
+               "io_activity_read_mb", "io_activity_write_mb", "io_activity_read_count", "io_activity_write_count",
+               "disk_usage_percent"]
+
+    with open(path, "w") as file:
+        file.write("cpu_total\tvirtual_memory_total_gb\tswap_memory_total_gb\tdisk_usage_total_gb\n")
+        file.write("64.000\t251.000\t0.000\t1000.000\n")
+        file.write("\t".join(headers) + "\n")
+
+        # A pool of pre-formatted rows keeps generation fast, the parsers can't tell the difference
+        pool = ["\t".join("%.3f" % random.uniform(0, 100) for i in range(len(headers) - 1)) for j in range(1000)]
+
+        for i in range(n_rows):
+            file.write("%.3f\t%s\n" % (i * 5.0, pool[i % len(pool)]))
+
+
+def measure(function, path):
+    # Time and memory are measured in separate runs, since tracing allocations slows everything down
+    start_time = monotonic()
+    result = function(path)
+    elapsed = monotonic() - start_time
+    del result
+
+    tracemalloc.start()
+    result = function(path)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return elapsed, peak
+
+
+def main(row_counts, skip_legacy_above):
+    print("rows\tfile_mb\tloader\tseconds\tpeak_mb")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_rows in row_counts:
+            path = os.path.join(tmp_dir, "log_%d.txt" % n_rows)
+            write_synthetic_log(path, n_rows)
+            file_mb = os.path.getsize(path) / (1024 ** 2)
+
+            loaders = [("numpy", read_tsv)]
+            if skip_legacy_above is None or n_rows <= skip_legacy_above:
+                loaders.append(("legacy", read_tsv_legacy))
+
+            for name, function in loaders:
+                elapsed, peak = measure(function, path)
+                print("%d\t%.1f\t%s\t%.3f\t%.1f" % (n_rows, file_mb, name, elapsed, peak / (1024 ** 2)))
+
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--rows",
+                        required=False,
+                        default="1000000,10000000",
+                        type=str,
+                        help="Comma-separated list of synthetic log sizes (in rows)")
+    parser.add_argument("--skip_legacy_above",
+                        required=False,
+                        default=None,
+                        type=int,
+                        help="Don't run the legacy parser on logs with more rows than this (it is slow and needs a "
+                             "lot of memory)")
+
+    args = parser.parse_args()
+
+    main(row_counts=list(map(int, args.rows.split(","))), skip_legacy_above=args.skip_legacy_above)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Compare the per-sample latency and memory allocations of the system sampler backends (see SystemSampler.py)"""
+
+from taskManager.SystemSampler import PsutilSampler, ProcSampler
+from time import perf_counter
+import tracemalloc
+import argparse
+import numpy
+
+
+def measure_latency(sampler, n_samples):
+    latencies = numpy.zeros(n_samples)
+
+    for i in range(n_samples):
+        start = perf_counter()
+        sampler.get_data()
+        latencies[i] = perf_counter() - start
+
+    return latencies
+
+
+def measure_allocations(sampler, n_samples):
+    """
+    :return: mean number of bytes and blocks allocated per sample (including memory freed before the sample returns)
+    """
+    tracemalloc.start()
+    snapshot_start = tracemalloc.take_snapshot()
+
+    size = 0
+    count = 0
+    for i in range(n_samples):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        sampler.get_data()
+        size += tracemalloc.get_traced_memory()[1] - before
+
+    snapshot_end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    for stat in snapshot_end.compare_to(snapshot_start, "filename"):
+        count += max(0, stat.count_diff)
+
+    return size / n_samples, count / n_samples
+
+
+def main(n_samples):
+    backends = [("psutil", PsutilSampler), ("proc", ProcSampler)]
+
+    print("backend\tmean_us\tp50_us\tp99_us\tmax_us\tpeak_bytes_per_sample\tretained_blocks_per_sample")
+
+    for name, sampler_type in backends:
+        sampler = sampler_type()
+
+        # Warm up (first cpu_percent call, disk usage cache, buffer sizes)
+        measure_latency(sampler, 10)
+
+        latencies = measure_latency(sampler, n_samples) * 1e6
+        allocated_bytes, allocated_blocks = measure_allocations(sampler, n_samples)
+
+        print("%s\t%.1f\t%.1f\t%.1f\t%.1f\t%.0f\t%.3f" % (name,
+                                                          numpy.mean(latencies),
+                                                          numpy.percentile(latencies, 50),
+                                                          numpy.percentile(latencies, 99),
+                                                          numpy.max(latencies),
+                                                          allocated_bytes,
+                                                          allocated_blocks))
+
+        sampler.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--samples",
+                        required=False,
+                        default=10000,
+                        type=int,
+                        help="Number of samples to take with each backend")
+
+    args = parser.parse_args()
+
+    main(n_samples=args.samples)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""Compare the latency of sending notifications on a new SMTP connection per message (the original Notifier) and on
+the persistent session of SmtpConnection, against a local stand-in SMTP server (aiosmtpd if it is installed, otherwise
+the standard library's smtpd)"""
+
+from taskManager.SmtpConnection import SmtpConnection
+from time import perf_counter, sleep
+import threading
+import argparse
+import smtplib
+import numpy
+
+
+def start_aiosmtpd_server(port):
+    from aiosmtpd.controller import Controller
+
+    class Sink:
+        async def handle_DATA(self, server, session, envelope):
+            return "250 OK"
+
+    controller = Controller(Sink(), hostname="127.0.0.1", port=port)
+    controller.start()
+
+    return controller.stop
+
+
+def start_smtpd_server(port):
+    import asyncore
+    import smtpd
+
+    class Sink(smtpd.SMTPServer):
+        def process_message(self, peer, mailfrom, rcpttos, data, **kwargs):
+            return None
+
+    server = Sink(("127.0.0.1", port), None)
+
+    thread = threading.Thread(target=asyncore.loop, kwargs={"timeout": 0.1})
+    thread.daemon = True
+    thread.start()
+
+    def stop():
+        server.close()
+        thread.join()
+
+    return stop
+
+
+def start_server(port):
+    try:
+        return start_aiosmtpd_server(port)
+    except ImportError:
+        return start_smtpd_server(port)
+
+
+def send_reconnecting(port, message):
+    server = smtplib.SMTP("127.0.0.1", port)
+    server.sendmail("sender@example.com", ["recipient@example.com"], message)
+    server.close()
+
+
+def main(n_messages, port, message_size):
+    stop = start_server(port)
+    sleep(0.5)
+
+    message = "Subject: benchmark\n\n" + "x" * message_size
+    connection = SmtpConnection(host="127.0.0.1", port=port)
+
+    modes = [("reconnecting", lambda: send_reconnecting(port, message)),
+             ("persistent", lambda: connection.sendmail("sender@example.com", ["recipient@example.com"], message))]
+
+    print("mode\tmessages\tmean_ms\tp50_ms\tp99_ms\ttotal_s")
+
+    try:
+        for name, send in modes:
+            latencies = numpy.zeros(n_messages)
+
+            for i in range(n_messages):
+                start = perf_counter()
+                send()
+                latencies[i] = perf_counter() - start
+
+            latencies *= 1000
+            print("%s\t%d\t%.3f\t%.3f\t%.3f\t%.3f" % (name, n_messages, numpy.mean(latencies),
+                                                      numpy.percentile(latencies, 50),
+                                                      numpy.percentile(latencies, 99), numpy.sum(latencies) / 1000))
+
+        print("persistent session: %d connects, %d reconnects" % (connection.connects, connection.reconnects))
+    finally:
+        connection.close()
+        stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--messages",
+                        required=False,
+                        default=500,
+                        type=int,
+                        help="Number of messages sent in each mode")
+    parser.add_argument("--port",
+                        required=False,
+                        default=8025,
+                        type=int,
+                        help="Port for the local SMTP server")
+    parser.add_argument("--message_size",
+                        required=False,
+                        default=2000,
+                        type=int,
+                        help="Size (in bytes) of each message body")
+
+    args = parser.parse_args()
+
+    main(n_messages=args.messages, port=args.port, message_size=args.message_size)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+
+from taskManager.binary_log import is_binary_log, tsv_to_binary, binary_to_tsv
+import argparse
+import os
+
+
+def main(input_path, output_path):
+    if is_binary_log(input_path):
+        if output_path is None:
+            output_path = os.path.splitext(input_path)[0] + ".txt"
+
+        print("Converting binary log %s to TSV: %s" % (input_path, output_path))
+        binary_to_tsv(input_path, output_path)
+
+    else:
+        if output_path is None:
+            output_path = os.path.splitext(input_path)[0] + ".bin"
+
+        print("Converting TSV log %s to binary: %s" % (input_path, output_path))
+        tsv_to_binary(input_path, output_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a ResourceMonitor log between the TSV and binary formats. "
+                                                 "The direction is determined by the format of the input.")
+
+    parser.add_argument(
+        "--input", "-i",
+        dest="input_path",
+        type=str,
+        required=True,
+        help="TSV or binary log written by ResourceMonitor"
+    )
+
+    parser.add_argument(
+        "--output", "-o",
+        dest="output_path",
+        type=str,
+        default=None,
+        required=False,
+        help="Output path. Defaults to the input path with a .bin or .txt extension"
+    )
+
+    args = parser.parse_args()
+
+    main(input_path=args.input_path, output_path=args.output_path)
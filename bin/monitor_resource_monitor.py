@@ -1,4 +1,11 @@
 from taskManager.AWSNotifier import Notifier
+from taskManager.binary_log import is_binary_log, read_binary_log
+from taskManager.LogStorage import S3Storage
+from taskManager.RemoteLog import RemoteLog
+from taskManager.RollupArchive import DEFAULT_TIERS, get_tier_path, select_tier, read_tier
+from taskManager.TailReader import TailReader
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict
 from datetime import datetime
 import argparse
@@ -6,13 +13,18 @@ import os
 import errno
 import boto3
 import numpy as np
-from collections import deque
-from time import sleep, time
+from time import sleep, time, monotonic
+import threading
 import sys
 
 
+# Time (in seconds) between two looks for the rollup tiers of a log which has none yet (see ErrorTracker.window). The
+# monitor only uploads them every s3_upload_interval (300 by default).
+TIER_LOOKUP_INTERVAL = 300
+
+
 class ErrorTracker:
-    def __init__(self, notifier, resource_logs, tmp_dir, interval, n_lines):
+    def __init__(self, notifier, resource_logs, tmp_dir, interval, n_lines, max_workers=16, window=None):
         """
         Periodically print summaries of log files, and send email warnings if logs show that resource usage has
         exceeded some min/max threshold
@@ -22,6 +34,10 @@ class ErrorTracker:
         :param interval:
         :param alarm_interval:
         :param n_lines:
+        :param max_workers: max number of logs downloaded and parsed at the same time
+        :param window: if not None, summarize the last `window` seconds (instead of the last n_lines) from the
+        coarsest rollup tier of each log that has n_lines records in that window (see RollupArchive.py). Logs without
+        rollups are still summarized over their last n_lines.
         """
         self.notifier = notifier
         self.last_notification = -sys.maxsize
@@ -29,40 +45,221 @@ class ErrorTracker:
         self.tmp_dir = tmp_dir
         self.n_lines = n_lines
         self.interval = interval
+        self.max_workers = max_workers
+        self.window = window
+
+        # One client (and connection pool) shared by all worker threads, with a connection for each worker
+        self.s3_client = boto3.client("s3", config=Config(max_pool_connections=max_workers))
+        self.storages = dict()
+        self.storages_lock = threading.Lock()
 
         # self.averages_per_log = None
         self.errors_per_log = None                  # keep track of these to send one email at end of update
 
     def start(self):
-        # iterate over all files
-        while (True):
-            # reset periodic values
-            self.errors_per_log = defaultdict(list)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # iterate over all files
+            while (True):
+                sweep_latency = self.sweep(executor)
+
+                # Send notification if necessary
+                errors_exist = sum(map(len, self.errors_per_log.values())) > 0
+                if errors_exist:
+                    self.send_notification()
+
+                # iterate
+                sleep(max(0, self.interval - sweep_latency))
+
+    def sweep(self, executor):
+        """
+        Check every log once
+        :param executor: pool whose threads download and parse the logs
+        :return: time taken (seconds)
+        """
+        # reset periodic values
+        self.errors_per_log = defaultdict(list)
+        sweep_start = monotonic()
+
+        # Download and parse logs concurrently. Results come back in the order of self.resource_logs
+        latencies = list()
+        bytes_fetched = 0
+        for file, averages, latency, n_bytes, errors in executor.map(self.process_log, self.resource_logs):
+            latencies.append(latency)
+            bytes_fetched += n_bytes
+
+            # Only the main thread touches errors_per_log
+            self.errors_per_log[file.id].extend(errors)
+
+            if averages is not None:
+                self.print_averages(file, averages)
+
+                # Check resource usage
+                self.check_resource_usage_thresholds(averages=averages, log_id=file.id)
+
+        sweep_latency = monotonic() - sweep_start
+        print("Checked {} logs in {:.1f}s (max per log: {:.1f}s, workers: {}, downloaded: {} bytes)".format(
+            len(latencies), sweep_latency, max(latencies, default=0), self.max_workers, bytes_fetched))
+
+        if sweep_latency > self.interval:
+            print("WARNING: checking all logs took longer than the interval ({}s). "
+                  "Consider increasing --max_workers".format(self.interval))
+
+        return sweep_latency
+
+    def process_log(self, log_file):
+        """
+        Fetch whatever is new in one log, and summarize its most recent lines. Runs on a worker thread. Exceptions are
+        reported as errors of this log, so one bad log doesn't abort the sweep over the others.
+        :param log_file:
+        :return: log_file, averages (None if the log could not be read), latency in seconds, bytes downloaded, list of
+        errors found
+        """
+        start_time = monotonic()
+        errors = list()
+
+        try:
+            return self.summarize_log(log_file, start_time, errors)
+
+        except Exception as e:
+            errors.append("Exception: {}".format(e))
+            log_file.averages = None
+            return log_file, None, monotonic() - start_time, 0, errors
+
+    def summarize_log(self, log_file, start_time, errors):
+        """
+        See process_log
+        :param log_file:
+        :param start_time: monotonic time at which processing this log started
+        :param errors: list that errors found are appended to
+        :return:
+        """
+        # The tiers may not have been uploaded yet, so a log without any is looked at again later
+        if self.window is not None and log_file.tier_key is None and (log_file.tier_lookup_time is None or
+                                                                       start_time - log_file.tier_lookup_time >=
+                                                                       TIER_LOOKUP_INTERVAL):
+            log_file.tier_lookup_time = start_time
+            log_file.tier_key = self.find_tier_key(log_file, errors)
+
+        if log_file.tier_key is not None:
+            bytes_fetched = log_file.tier_bytes_fetched
+
+            if self.update_tier(log_file, errors):
+                log_file.averages = self.read_tier(log_file, errors)
+
+            return log_file, log_file.averages, monotonic() - start_time, log_file.tier_bytes_fetched - bytes_fetched, \
+                errors
+
+        if log_file.remote is None:
+            log_file.remote = RemoteLog(storage=self.get_storage(log_file.bucket),
+                                        key=log_file.path,
+                                        local_path=os.path.join(self.tmp_dir, log_file.tmp_filename),
+                                        n_lines=self.n_lines,
+                                        segmented=log_file.segmented)
+
+        bytes_fetched = log_file.remote.bytes_fetched
+
+        # Get relevant data. If the log has not changed, the previous summary still applies.
+        if self.update_log(log_file, errors):
+            log_file.averages = self.read_log(log_file, log_file.remote.local_path, errors)
+
+        return log_file, log_file.averages, monotonic() - start_time, log_file.remote.bytes_fetched - bytes_fetched, \
+            errors
+
+    def find_tier_key(self, log_file, errors):
+        """
+        :param log_file:
+        :param errors: list that errors found are appended to
+        :return: key of the coarsest rollup tier of this log which covers the window with at least n_lines records, or
+        None if there is none (yet)
+        """
+        storage = self.get_storage(log_file.bucket)
+        tiers = list()
+
+        try:
+            for name, resolution, retention in DEFAULT_TIERS:
+                key = get_tier_path(log_file.path, name)
+
+                if storage.head(key) is not None:
+                    tiers.append((key, resolution, retention))
+
+        except Exception as e:
+            errors.append("Exception: {}".format(e))
+            return None
+
+        return select_tier(tiers, range_s=self.window, resolution_s=self.window / self.n_lines)
+
+    def update_tier(self, log_file, errors):
+        """
+        Download a rollup tier if it changed. Tiers are rewritten in place and have a bounded size, so they are
+        fetched whole.
+        :param log_file:
+        :param errors: list that errors found are appended to
+        :return: whether there is new data to read
+        """
+        storage = self.get_storage(log_file.bucket)
+        local_path = os.path.join(self.tmp_dir, log_file.tmp_filename + ".tier")
+
+        try:
+            info = storage.head(log_file.tier_key)
 
-            for file in self.resource_logs:
-                tmp_file_path = os.path.join(args.tmp_dir, file.filename)
+            if info is None:
+                raise IOError("Log not found: %s" % log_file.tier_key)
 
-                # Re-download files
-                self.update_log(log_file=file, tmp_file_path=tmp_file_path)
+            if info["etag"] == log_file.tier_etag:
+                errors.append("log file was not updated (size: {} bytes)".format(
+                    info["size"]))
+                return False
 
-                # Get relevant data
-                if os.path.exists(tmp_file_path):
-                    averages = self.read_log(file, tmp_file_path)
+            data = storage.get(log_file.tier_key)
 
-                    # Check resource usage
-                    self.check_resource_usage_thresholds(averages=averages, log_id=file.id)
+        except Exception as e:
+            errors.append("Exception: {}".format(e))
+            log_file.averages = None
+            return False
+
+        log_file.tier_etag = info["etag"]
+        log_file.tier_bytes_fetched += len(data)
+
+        with open(local_path + ".tmp", "wb") as file:
+            file.write(data)
+
+        os.replace(local_path + ".tmp", local_path)
+
+        return True
+
+    def read_tier(self, log_file, errors):
+        """
+        Same as read_log, for the last `window` seconds of a rollup tier
+        :param log_file:
+        :param errors: list that errors found are appended to
+        :return:
+        """
+        headers, _, data, _, _, _ = read_tier(os.path.join(self.tmp_dir, log_file.tmp_filename + ".tier"))
+        line_count = len(data[headers[0]]) if len(headers) > 0 else 0
+
+        if line_count == 0:
+            errors.append("file appears to be empty")
+            return
+
+        time = data["time_elapsed_s"]
+        mask = time >= time.max() - self.window
 
-                    # remove when done
-                    print("Removing existing file: {}".format(tmp_file_path))
-                    os.remove(tmp_file_path)
-    
-            # Send notification if necessary
-            errors_exist = sum(map(len, self.errors_per_log.values())) > 0
-            if errors_exist:
-                self.send_notification()
+        averages = {key: float(np.mean(data[key][mask])) for key in headers}
 
-            # iterate
-            sleep(self.interval)
+        return averages
+
+    def get_storage(self, bucket):
+        with self.storages_lock:
+            if bucket not in self.storages:
+                self.storages[bucket] = S3Storage(bucket, client=self.s3_client)
+
+            return self.storages[bucket]
+
+    @staticmethod
+    def print_averages(log_file, averages):
+        print(log_file.id)
+        for key in averages.keys():
+            print("\t{}: {}".format(key, averages[key]))
 
     def generate_error_message(self):
         """
@@ -87,54 +284,73 @@ class ErrorTracker:
         return error_message
 
 
-    def read_log(self, log_file, tmp_file_path):
+    def read_log(self, log_file, tmp_file_path, errors):
         """
         Get relevant data from the resource log to print summaries and to decide whether to send a notification
         :param log_file:
+        :param errors: list that errors found are appended to
         :return:
         """
-        header = None
-        last_lines = deque()
-        line_count = 0
+        if is_binary_log(tmp_file_path):
+            return self.read_binary_log(log_file, tmp_file_path, errors)
 
-        with open(tmp_file_path, 'r') as log_file_in:
-            for line in log_file_in:
-                if header is None:
-                    header = {key: i for i, key in enumerate(line.strip().split("\t"))}
-                    continue
-                line_count += 1
+        # The first 3 lines are the static headers, the static values, and the time series headers
+        with open(tmp_file_path, 'rb') as log_file_in:
+            header_lines = [log_file_in.readline() for i in range(3)]
 
-                last_lines.append(line)
-                if line_count > line_count:
-                    last_lines.popleft()
+        header_size = sum(map(len, header_lines))
 
-        # find dead logs (via line counts)
-        if log_file.total_lines is not None and line_count <= log_file.total_lines:
-            self.errors_per_log[log_file.id].append("log file was not updated (curr: {}, prev: {})".format(line_count, log_file.total_lines))
+        # empty file?
+        if not header_lines[-1].endswith(b"\n"):
+            errors.append("file appears to be empty")
+            return
 
-        log_file.total_lines = line_count
+        header = header_lines[-1].decode().strip().split("\t")
 
-        # empty file?
-        if header is None:
-            self.errors_per_log[log_file.id].append("file appears to be empty")
+        if log_file.tail_reader is None or log_file.tail_reader.path != tmp_file_path:
+            log_file.tail_reader = TailReader(tmp_file_path)
+
+        last_lines = log_file.tail_reader.read_last_lines(self.n_lines, start=header_size)
+
+        if len(last_lines) == 0:
+            errors.append("file appears to be empty")
             return
 
         # make lines useful
-        lines = list()
         for line in last_lines:
-            line_parts = line.strip().split("\t")
+            line_parts = line.decode().strip().split("\t")
             if len(line_parts) != len(header):
-                self.errors_per_log[log_file.id].append("malformed file (header size: {}, line size: {}).  line: '{}'".format(
+                errors.append("malformed file (header size: {}, line size: {}).  line: '{}'".format(
                     len(header), len(line_parts), "\\t".join(line_parts)))
                 return
 
-            lines.append({key:float(line_parts[header[key]]) for key in header.keys()})
+        try:
+            block = np.loadtxt([line.decode() for line in last_lines], delimiter="\t", dtype=np.float64, ndmin=2)
+        except ValueError as e:
+            errors.append("malformed file: {}".format(e))
+            return
 
         # analyze lines:
-        averages = {key: np.mean(list(map(lambda line: line[key], lines))) for key in header.keys()}
-        print(log_file.id)
-        for key in header.keys():
-            print("\t{}: {}".format(key, averages[key]))
+        averages = {key: float(value) for key, value in zip(header, block.mean(axis=0))}
+
+        return averages
+
+    def read_binary_log(self, log_file, tmp_file_path, errors):
+        """
+        Same as read_log, for logs in the binary format. Only the last n_lines records are touched.
+        :param log_file:
+        :param tmp_file_path:
+        :param errors: list that errors found are appended to
+        :return:
+        """
+        headers, header_indexes, data, _, _, _ = read_binary_log(tmp_file_path)
+        line_count = len(data[headers[0]]) if len(headers) > 0 else 0
+
+        if line_count == 0:
+            errors.append("file appears to be empty")
+            return
+
+        averages = {key: float(np.mean(data[key][-self.n_lines:])) for key in headers}
 
         return averages
 
@@ -164,23 +380,27 @@ class ErrorTracker:
         elif averages[VIRTUAL_MEMORY_PERCENT] > 90:
             self.errors_per_log[log_id].append("Memory usage above 90%: {}".format(averages[VIRTUAL_MEMORY_PERCENT]))
 
-    def update_log(self, tmp_file_path, log_file):
+    def update_log(self, log_file, errors):
         """
-        Query s3 to get latest log files
+        Query s3 for changes to a log, and download only its new lines (see RemoteLog)
         :param log_file:
-        :return:
+        :param errors: list that errors found are appended to
+        :return: whether there is new data to read
         """
-        if os.path.isfile(tmp_file_path):
-            print("Removing existing file: {}".format(tmp_file_path))
-
-            os.remove(tmp_file_path)
-
         try:
-            s3 = boto3.resource('s3')
-            s3.Bucket(log_file.bucket).download_file(log_file.path, tmp_file_path)
+            changed = log_file.remote.update()
 
         except Exception as e:
-            self.errors_per_log[log_file.id].append("Exception: {}".format(e))
+            errors.append("Exception: {}".format(e))
+            log_file.averages = None
+            return False
+
+        # find dead logs (via ETag)
+        if not changed:
+            errors.append("log file was not updated (size: {} bytes)".format(
+                log_file.remote.offset))
+
+        return changed
 
     def send_notification(self):
         """
@@ -211,10 +431,27 @@ class ResourceMonitorLogFile:
         self.bucket = lfl_parts[0]
         self.path = "/".join(lfl_parts[1:])
         self.filename = lfl_parts[-1]
+
+        # Logs shipped in segments are located by their manifest
+        self.segmented = self.filename.endswith(".manifest.json")
+        if self.segmented:
+            self.filename = self.filename[:-len(".manifest.json")]
+
         self.id = self.filename if id is None else id
 
-        # file contents
-        self.total_lines = None
+        # Unique local name, since logs are downloaded concurrently and may share a filename
+        self.tmp_filename = "_".join([self.bucket] + self.path.split("/"))
+
+        # Local copy of the end of the log, and the summary of its last lines
+        self.remote = None
+        self.tail_reader = None
+        self.averages = None
+
+        # Rollup tier used instead of the log, if any, and when it was last looked for (see TIER_LOOKUP_INTERVAL)
+        self.tier_key = None
+        self.tier_lookup_time = None
+        self.tier_etag = None
+        self.tier_bytes_fetched = 0
 
 
 def main(args):
@@ -223,7 +460,7 @@ def main(args):
         try:
             os.makedirs(args.tmp_dir)
         except OSError as exc:
-            if exc.errno == errno.EEXIST and os.path.isdir(args.output_dir):
+            if exc.errno == errno.EEXIST and os.path.isdir(args.tmp_dir):
                 pass
             else:
                 raise
@@ -255,7 +492,9 @@ def main(args):
                            interval=args.interval,
                            notifier=notifier,
                            tmp_dir=args.tmp_dir,
-                           n_lines=args.line_count)
+                           n_lines=args.line_count,
+                           max_workers=args.max_workers,
+                           window=args.window_minutes * 60 if args.window_minutes is not None else None)
 
     tracker.start()
 
@@ -268,7 +507,8 @@ if __name__ == "__main__":
                         required=False,
                         default=None,
                         type=str,
-                        help="Comma-separated list of resource usage locations (in s3).  "
+                        help="Comma-separated list of resource usage locations (in s3). Logs uploaded in segments are "
+                             "located by their '.manifest.json' object.  "
                              "One of this param or --source_file is required.")
     parser.add_argument('--source_file', '-I',
                         dest='source_file',
@@ -288,13 +528,27 @@ if __name__ == "__main__":
                         required=False,
                         default="/tmp",
                         type=str,
-                        help="tmp directory for downloading")
+                        help="directory for the local copies of the end of each log")
     parser.add_argument('--recent_history_line_count', '-l',
                         dest='line_count',
                         required=False,
                         default=30,
                         type=int,
                         help="how many lines (at the end of the file) to analyze")
+    parser.add_argument('--max_workers', '-w',
+                        dest='max_workers',
+                        required=False,
+                        default=16,
+                        type=int,
+                        help="max number of logs to download and analyze concurrently")
+    parser.add_argument('--window_minutes', '-W',
+                        dest='window_minutes',
+                        required=False,
+                        default=None,
+                        type=float,
+                        help="analyze the last N minutes of each log instead of the last lines, using the coarsest "
+                             "rollup (see taskManager --rollup) with at least --recent_history_line_count records in "
+                             "that window. Logs without rollups are analyzed over their last lines.")
     parser.add_argument("--to",
                         dest="recipients",
                         required=False,
@@ -9,7 +9,7 @@ if __name__ == "__main__":
         "--log_path",
         type=str,
         required=True,
-        help="Input TSV file path containing the output of ResourceMonitor"
+        help="Input TSV or binary file path containing the output of ResourceMonitor"
     )
 
     parser.add_argument(
@@ -20,7 +20,51 @@ if __name__ == "__main__":
         help="Desired output directory path (will be created during run time if doesn't exist)"
     )
 
+    parser.add_argument(
+        "--full_resolution",
+        action="store_true",
+        help="Plot every sample instead of downsampling each series to the resolution of the output image"
+    )
+
+    parser.add_argument(
+        "--downsample_method",
+        type=str,
+        choices=["minmax", "lttb"],
+        default="minmax",
+        required=False,
+        help="'minmax' keeps the min and max of each pixel column (every peak stays visible), "
+             "'lttb' keeps the visually most significant point of each bucket"
+    )
+
+    parser.add_argument(
+        "--dpi",
+        type=int,
+        default=None,
+        required=False,
+        help="Resolution of the output image. Default: 300, or 80 with --fast"
+    )
+
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Render a small, low DPI image quickly (as attached to notification emails)"
+    )
+
+    parser.add_argument(
+        "--last_minutes",
+        type=float,
+        default=None,
+        required=False,
+        help="Only plot the last N minutes of the log"
+    )
+
     args = parser.parse_args()
 
-    plot_resources_main(file_path=args.log_path, output_dir=args.output_dir)
+    plot_resources_main(file_path=args.log_path,
+                        output_dir=args.output_dir,
+                        dpi=args.dpi,
+                        full_resolution=args.full_resolution,
+                        downsample_method=args.downsample_method,
+                        fast=args.fast,
+                        last_minutes=args.last_minutes)
 
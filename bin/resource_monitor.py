@@ -15,13 +15,34 @@ def main(args):
             else:
                 raise
 
+    live_plot_interval = None
+    if args.live_plot_minutes is not None:
+        live_plot_interval = args.live_plot_minutes * 60
+
     monitor = ResourceMonitor(output_dir=args.output_dir,
                               interval=args.interval,
                               aws=args.aws,
                               s3_upload_bucket=args.s3_upload_bucket,
                               s3_upload_path=args.s3_upload_path,
                               s3_upload_interval=args.s3_upload_interval,
-                              logfile=args.logfile)
+                              logfile=args.logfile,
+                              track_process_tree=args.pid is not None,
+                              flush_interval=args.flush_interval,
+                              fsync=args.fsync,
+                              binary_log=args.binary_log,
+                              live_plot_interval=live_plot_interval,
+                              alert_rules=args.alert_rules,
+                              alert_cooldown=args.alert_cooldown,
+                              per_cpu=args.per_cpu,
+                              per_disk=args.per_disk,
+                              per_nic=args.per_nic,
+                              cgroup=args.cgroup,
+                              sampler_backend=args.sampler_backend,
+                              sample_interval=args.sample_interval,
+                              rollup=args.rollup)
+
+    if args.pid is not None:
+        monitor.track_process(args.pid)
 
     monitor.launch()
 
@@ -59,7 +80,7 @@ if __name__ == "__main__":
                         dest='interval',
                         required=False,
                         default=5,
-                        type=int,
+                        type=float,
                         help="interval (in seconds) for sampling")
     parser.add_argument('--s3_upload_interval', '-I',
                         dest='s3_upload_interval',
@@ -88,6 +109,99 @@ if __name__ == "__main__":
                         default=None,
                         type=str,
                         help="write script logs to file (defaults to stderr)")
+    parser.add_argument('--pid',
+                        dest='pid',
+                        required=False,
+                        default=None,
+                        type=int,
+                        help="also record the resource usage of this process and all of its descendants")
+    parser.add_argument('--flush_interval',
+                        dest='flush_interval',
+                        required=False,
+                        default=30,
+                        type=float,
+                        help="max time (in seconds) that samples are buffered in memory before being written to the "
+                             "log")
+    parser.add_argument('--fsync',
+                        dest='fsync',
+                        required=False,
+                        default=False,
+                        type="string_as_bool",
+                        help="fsync the log file after every flush")
+    parser.add_argument('--binary_log',
+                        dest='binary_log',
+                        required=False,
+                        default=False,
+                        type="string_as_bool",
+                        help="also write a compact binary copy of the log (.bin) which can be memory mapped")
+    parser.add_argument('--live_plot_minutes',
+                        dest='live_plot_minutes',
+                        required=False,
+                        default=None,
+                        type=float,
+                        help="refresh a plot of the log (in the output folder) every N minutes while monitoring")
+    parser.add_argument('--per_cpu',
+                        dest='per_cpu',
+                        required=False,
+                        default=False,
+                        type="string_as_bool",
+                        help="also record per-core CPU usage (in a separate .cores file) and the "
+                             "user/system/iowait/steal breakdown")
+    parser.add_argument('--per_disk',
+                        dest='per_disk',
+                        required=False,
+                        default=False,
+                        type="string_as_bool",
+                        help="also record throughput and utilization for each disk")
+    parser.add_argument('--per_nic',
+                        dest='per_nic',
+                        required=False,
+                        default=False,
+                        type="string_as_bool",
+                        help="also record throughput for each network interface")
+    parser.add_argument('--cgroup',
+                        dest='cgroup',
+                        required=False,
+                        default=False,
+                        type="string_as_bool",
+                        help="report CPU, memory and IO usage of the enclosing container (cgroup v2) relative to its "
+                             "limits, instead of host-wide usage")
+    parser.add_argument('--sampler',
+                        dest='sampler_backend',
+                        required=False,
+                        default="auto",
+                        choices=["auto", "proc", "psutil"],
+                        help="how host-wide usage is read: directly from /proc (Linux), with psutil, or 'auto' to use "
+                             "/proc when available")
+    parser.add_argument('--sample_interval',
+                        dest='sample_interval',
+                        required=False,
+                        default=0,
+                        type=float,
+                        help="sample CPU/memory/swap every N seconds (shorter than the logging interval) and log their "
+                             "min, max and mean over each logging interval, so that short peaks are not missed "
+                             "(0 to disable, the default)")
+    parser.add_argument('--rollup',
+                        dest='rollup',
+                        required=False,
+                        default=False,
+                        type="string_as_bool",
+                        help="also keep bounded size copies of the log at full resolution (last hour), 1 minute (last "
+                             "day) and 10 minute (last 90 days) resolution")
+    parser.add_argument('--alert',
+                        dest='alert_rules',
+                        required=False,
+                        default=None,
+                        action='append',
+                        help="log an alert as soon as a resource usage rule is met (may be repeated), e.g. "
+                             "'cpu_percent<5', 'mean(virtual_memory_percent,60)>90', "
+                             "'rate(disk_usage_percent,300)>0.01', optionally followed by 'for N' (seconds)")
+    parser.add_argument('--alert_cooldown',
+                        dest='alert_cooldown',
+                        required=False,
+                        default=600,
+                        type=float,
+                        help="minimum time (in seconds) between two alerts from the same rule")
 
     args = parser.parse_args()
     main(args)
@@ -22,13 +22,14 @@ def main():
         setup_requires=["pytest-runner"],
         tests_require=["pytest"],
         author_email='rlorigro@ucsc.edu, andbaile@ucsc.com',
-        packages=find_packages(),
+        packages=find_packages(exclude=["benchmarks"]),
         scripts=['bin/taskManager', 'bin/monitor_resource_monitor.py', 'bin/plot_resource_usage.py',
-                 'bin/resource_monitor.py'],
+                 'bin/resource_monitor.py', 'bin/convert_resource_log.py'],
         install_requires=['psutil>=5.6.1',
                           'boto3>=1.9',
                           'pytest>=4.3.1',
-                          'matplotlib>=2.0.2'],
+                          'matplotlib>=2.0.2',
+                          'numpy'],
         zip_safe=True
     )
 
@@ -34,7 +34,7 @@ class Notifier:
         :param subject:
         :param body:
         :param subject_prefix:
-        :return:
+        :return: whether the message was sent (None if the attempt limit was exceeded)
         """
         # Check whether limit has been exceeded
         if self.attempts > self.max_cumulative_attempts:
@@ -58,13 +58,17 @@ class Notifier:
             # Display an error if something goes wrong.
         except ClientError as e:
             print(e.response['Error']['Message'])
+            sent = False
         else:
             print("Email sent! Message ID:"),
             print(response['MessageId'])
             self.sent = True
+            sent = True
 
         self.attempts += 1
 
+        return sent
+
     def generate_message(self, subject, body, subject_prefix=True, attachments_paths=None):
         """Generate a message to send via the sendmail module of SMTP
         """
@@ -0,0 +1,264 @@
+from collections import deque
+import operator
+import threading
+import queue
+import sys
+import re
+
+
+OPERATORS = {"<": operator.lt,
+             "<=": operator.le,
+             ">": operator.gt,
+             ">=": operator.ge}
+
+# Non-negative decimal number, e.g. "5", "0.5", ".5" or "1e-3"
+NUMBER_PATTERN = r"(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?"
+
+# e.g. "cpu_percent<5", "mean(virtual_memory_percent,60)>90 for 120", "rate(disk_usage_percent)>0.01"
+RULE_PATTERN = re.compile(r"^\s*(?:(?P<function>mean|rate)\(\s*(?P<function_key>\w+)\s*(?:,\s*(?P<window>%s)\s*)?\)"
+                          r"|(?P<key>\w+))\s*(?P<operator><=|>=|<|>)\s*(?P<threshold>-?%s)"
+                          r"(?:\s+for\s+(?P<duration>%s)s?)?\s*$" % (NUMBER_PATTERN, NUMBER_PATTERN, NUMBER_PATTERN))
+
+
+class ThresholdRule:
+    """
+    Condition on the latest value of one column, optionally required to hold for `duration` seconds before it fires.
+    Subclasses transform the value first (rolling mean, rate of change). Every update is O(1).
+    """
+    def __init__(self, key, operator_string, threshold, duration=0, description=None):
+        self.key = key
+        self.operator_string = operator_string
+        self.compare = OPERATORS[operator_string]
+        self.threshold = threshold
+        self.duration = duration
+        self.description = description
+
+        # When the condition started being true (continuously), and when this rule last fired
+        self.since = None
+        self.last_fired = None
+
+    def __str__(self):
+        if self.description is not None:
+            return self.description
+
+        return "%s%s%g" % (self.key, self.operator_string, self.threshold)
+
+    def get_value(self, time, value):
+        return value
+
+    def update(self, time, value):
+        """
+        :param time: seconds since monitoring started
+        :param value: latest value of the column
+        :return: the (transformed) value if the condition is met and has been for `duration` seconds, otherwise None
+        """
+        value = self.get_value(time, value)
+
+        if value is None or not self.compare(value, self.threshold):
+            self.since = None
+            return None
+
+        if self.since is None:
+            self.since = time
+
+        if time - self.since >= self.duration:
+            return value
+
+        return None
+
+
+class RollingMeanRule(ThresholdRule):
+    """
+    Condition on the mean of the last `window_size` samples, maintained as a running sum
+    """
+    def __init__(self, key, operator_string, threshold, window_size, duration=0, description=None):
+        super().__init__(key, operator_string, threshold, duration=duration, description=description)
+        self.window_size = max(1, window_size)
+        self.window = deque()
+        self.sum = 0.0
+
+    def get_value(self, time, value):
+        self.window.append(value)
+        self.sum += value
+
+        if len(self.window) > self.window_size:
+            self.sum -= self.window.popleft()
+
+        if len(self.window) < self.window_size:
+            return None
+
+        return self.sum / self.window_size
+
+
+class RateRule(ThresholdRule):
+    """
+    Condition on the rate of change (per second) of a column over the last `window_size` samples
+    """
+    def __init__(self, key, operator_string, threshold, window_size, duration=0, description=None):
+        super().__init__(key, operator_string, threshold, duration=duration, description=description)
+        self.window_size = max(1, window_size)
+        self.window = deque()
+
+    def get_value(self, time, value):
+        self.window.append((time, value))
+
+        if len(self.window) > self.window_size + 1:
+            self.window.popleft()
+
+        if len(self.window) <= self.window_size:
+            return None
+
+        start_time, start_value = self.window[0]
+
+        if time <= start_time:
+            return None
+
+        return (value - start_value) / (time - start_time)
+
+
+def parse_rule(spec, interval, default_window):
+    """
+    Parse a rule specification:
+        key<threshold                       latest value
+        mean(key,window)>threshold          mean over the last `window` seconds
+        rate(key,window)>threshold          change per second over the last `window` seconds
+    Any of these may end with "for N" (seconds) to only fire once the condition has held that long.
+    :param spec:
+    :param interval: sampling interval (in seconds)
+    :param default_window: window (in seconds) used when none is given
+    :return: rule
+    """
+    match = RULE_PATTERN.match(spec)
+
+    if match is None:
+        raise ValueError("Invalid alert rule: '%s'" % spec)
+
+    fields = match.groupdict()
+    threshold = float(fields["threshold"])
+    duration = float(fields["duration"]) if fields["duration"] is not None else 0
+    description = spec.strip()
+
+    if fields["function"] is None:
+        return ThresholdRule(fields["key"], fields["operator"], threshold, duration=duration, description=description)
+
+    window = float(fields["window"]) if fields["window"] is not None else default_window
+    window_size = int(round(window / interval))
+
+    if window_size < 1:
+        raise ValueError("Invalid alert rule: '%s' (the window is shorter than the sampling interval, %gs)" %
+                         (spec, interval))
+
+    if fields["function"] == "mean":
+        rule_type = RollingMeanRule
+    else:
+        rule_type = RateRule
+
+    return rule_type(fields["function_key"], fields["operator"], threshold, window_size=window_size,
+                     duration=duration, description=description)
+
+
+class AlertEngine:
+    """
+    Evaluates a set of rules on every sample as it is taken, and sends a notification when any of them fire. Each rule
+    fires at most once per `cooldown` seconds. Notifications are sent from a separate thread so that a slow mail server
+    never delays sampling.
+    """
+    def __init__(self, rules, notifier=None, cooldown=600, log=None, name=None):
+        """
+        :param rules: list of rules (see parse_rule)
+        :param notifier: Notifier or AWSNotifier. If None, alerts are only logged.
+        :param cooldown: minimum time (in seconds) between two alerts from the same rule
+        :param log: function used to report alerts and errors (defaults to stderr)
+        :param name: identifies the monitored machine/log in the notification
+        """
+        self.rules = rules
+        self.notifier = notifier
+        self.cooldown = cooldown
+        self.log = log if log is not None else lambda msg: print(msg, file=sys.stderr)
+        self.name = name
+
+        self.queue = queue.Queue(maxsize=16)
+        self.thread = None
+
+        self.alerts = 0
+        self.dropped = 0
+
+    def update(self, data):
+        """
+        :param data: dict of the latest logged values, including time_elapsed_s
+        :return: list of (rule, value) which fired
+        """
+        time = data["time_elapsed_s"]
+        fired = list()
+
+        for rule in self.rules:
+            if rule.key not in data:
+                continue
+
+            value = rule.update(time, data[rule.key])
+
+            if value is None:
+                continue
+
+            if rule.last_fired is not None and time - rule.last_fired < self.cooldown:
+                continue
+
+            rule.last_fired = time
+            fired.append((rule, value))
+
+        if len(fired) > 0:
+            self.fire(time, fired)
+
+        return fired
+
+    def fire(self, time, fired):
+        subject = "Resource alert: " + ", ".join(str(rule) for rule, _ in fired)
+
+        body = "Resource usage alert%s after %.1f minutes:\n" % ("" if self.name is None else " on " + self.name,
+                                                                time / 60)
+        for rule, value in fired:
+            body += "\t%s (value: %.3f)\n" % (rule, value)
+
+        self.alerts += 1
+        self.log(subject)
+
+        if self.notifier is None:
+            return
+
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, args=())
+            self.thread.daemon = True
+            self.thread.start()
+
+        try:
+            self.queue.put_nowait((subject, body))
+        except queue.Full:
+            self.dropped += 1
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+
+            subject, body = item
+
+            try:
+                self.notifier.send_message(subject=subject, body=body)
+            except Exception as e:
+                self.log("Error sending alert: %s" % e)
+
+    def stop(self, timeout=10):
+        """
+        Give pending notifications up to `timeout` seconds to be sent
+        """
+        if self.thread is None:
+            return
+
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+
+        self.thread.join(timeout)
+        self.thread = None
@@ -0,0 +1,204 @@
+from multiprocessing import cpu_count
+from time import monotonic
+import psutil
+import os
+
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+def find_cgroup_path(root=CGROUP_ROOT, proc_cgroup_path="/proc/self/cgroup"):
+    """
+    Find the cgroup v2 directory of this process, if it has a memory controller
+    :param root: where the cgroup v2 hierarchy is mounted
+    :param proc_cgroup_path:
+    :return: path, or None if not running in a cgroup v2 hierarchy
+    """
+    try:
+        with open(proc_cgroup_path, "r") as file:
+            lines = file.readlines()
+    except OSError:
+        return None
+
+    for line in lines:
+        hierarchy, _, path = line.strip().split(":", 2)
+
+        # The v2 (unified) hierarchy is always listed as "0::<path>". On hybrid systems it is mounted at root/unified.
+        if hierarchy != "0":
+            continue
+
+        for mount in [root, os.path.join(root, "unified")]:
+            candidate = os.path.join(mount, path.lstrip("/"))
+
+            if os.path.exists(os.path.join(candidate, "memory.current")):
+                return candidate
+
+    return None
+
+
+def read_key_values(path):
+    """
+    Parse a flat keyed cgroup file such as cpu.stat or memory.stat ("key value" per line)
+    """
+    values = dict()
+
+    with open(path, "r") as file:
+        for line in file:
+            key, value = line.split()
+            values[key] = int(value)
+
+    return values
+
+
+class CgroupSampler:
+    """
+    Resource usage of the enclosing cgroup (e.g. a Docker or Kubernetes container), read directly from the cgroup v2
+    files. The host-wide CPU, memory and IO values reported by psutil are replaced by the cgroup's own usage, as a
+    percentage of the cgroup's limits (or of the host totals when there is no limit), so that percentages reflect
+    how close the job is to being throttled or OOM-killed.
+    """
+    headers = ("cgroup_throttled_percent",)
+
+    # Columns of ResourceMonitor which this sampler provides instead of psutil
+    replaces = ("cpu_percent",
+                "virtual_memory_percent",
+                "io_activity_read_mb",
+                "io_activity_write_mb",
+                "io_activity_read_count",
+                "io_activity_write_count")
+
+    def __init__(self, path):
+        """
+        :param path: cgroup directory (see find_cgroup_path)
+        """
+        self.path = path
+
+        self.cpu_limit = self.read_cpu_limit()
+        self.memory_limit = self.read_memory_limit()
+
+        self.cpu_total = self.cpu_limit if self.cpu_limit is not None else cpu_count()
+        self.memory_total = self.memory_limit if self.memory_limit is not None else psutil.virtual_memory().total
+
+        # CPU usage is measured since the previous reading (including those in between rows, see get_peak_data), while
+        # throttling is measured since the previous row
+        self.previous_cpu_stat = self.read("cpu.stat")
+        self.previous_usage_usec = self.previous_cpu_stat["usage_usec"]
+        self.previous_time = monotonic()
+
+    @classmethod
+    def detect(cls, root=CGROUP_ROOT):
+        """
+        :return: a sampler for the cgroup of this process, or None if there isn't one
+        """
+        path = find_cgroup_path(root)
+
+        if path is None:
+            return None
+
+        return cls(path)
+
+    def get_path(self, filename):
+        return os.path.join(self.path, filename)
+
+    def read(self, filename):
+        return read_key_values(self.get_path(filename))
+
+    def read_cpu_limit(self):
+        """
+        :return: number of CPUs the cgroup may use (from cpu.max), or None if unlimited
+        """
+        if not os.path.exists(self.get_path("cpu.max")):
+            return None
+
+        with open(self.get_path("cpu.max"), "r") as file:
+            quota, period = file.read().split()
+
+        if quota == "max":
+            return None
+
+        return int(quota) / int(period)
+
+    def read_memory_limit(self):
+        """
+        :return: memory limit in bytes (from memory.max), or None if unlimited
+        """
+        with open(self.get_path("memory.max"), "r") as file:
+            limit = file.read().strip()
+
+        if limit == "max":
+            return None
+
+        return int(limit)
+
+    def get_static_data(self):
+        return {"cpu_total": self.cpu_total,
+                "virtual_memory_total_gb": self.memory_total / (1024 ** 3)}
+
+    def get_memory_used(self):
+        with open(self.get_path("memory.current"), "r") as file:
+            used = int(file.read())
+
+        # Same as `docker stats`: inactive page cache can be reclaimed, so it doesn't count towards an OOM kill
+        memory_stat = self.read("memory.stat")
+        used -= min(used, memory_stat.get("inactive_file", 0))
+
+        return used
+
+    def get_io_totals(self):
+        """
+        :return: cumulative bytes and operations read and written, summed over all devices (from io.stat)
+        """
+        totals = {"rbytes": 0, "wbytes": 0, "rios": 0, "wios": 0}
+
+        if not os.path.exists(self.get_path("io.stat")):
+            return totals
+
+        with open(self.get_path("io.stat"), "r") as file:
+            for line in file:
+                for field in line.split()[1:]:
+                    key, value = field.split("=")
+                    if key in totals:
+                        totals[key] += int(value)
+
+        return totals
+
+    def get_peak_data(self, cpu_stat=None):
+        """
+        CPU and memory usage of the cgroup, cheap enough to be read in between rows (see ResourceMonitor.sample_peaks)
+        :param cpu_stat: contents of cpu.stat, if it was already read
+        """
+        if cpu_stat is None:
+            cpu_stat = self.read("cpu.stat")
+
+        now = monotonic()
+        elapsed = max(now - self.previous_time, 1e-6)
+        usage_s = (cpu_stat["usage_usec"] - self.previous_usage_usec) / 1e6
+
+        self.previous_usage_usec = cpu_stat["usage_usec"]
+        self.previous_time = now
+
+        data = dict()
+        data["cpu_percent"] = min(100.0, max(0.0, usage_s / elapsed / self.cpu_total * 100))
+        data["virtual_memory_percent"] = self.get_memory_used() / self.memory_total * 100
+
+        return data
+
+    def get_data(self):
+        cpu_stat = self.read("cpu.stat")
+
+        data = self.get_peak_data(cpu_stat)
+
+        periods = cpu_stat.get("nr_periods", 0) - self.previous_cpu_stat.get("nr_periods", 0)
+        throttled = cpu_stat.get("nr_throttled", 0) - self.previous_cpu_stat.get("nr_throttled", 0)
+        self.previous_cpu_stat = cpu_stat
+
+        data["cgroup_throttled_percent"] = throttled / periods * 100 if periods > 0 else 0.0
+
+        # Cumulative, like psutil.disk_io_counters (ResourceMonitor reports the difference between samples)
+        io_totals = self.get_io_totals()
+        data["io_activity_read_mb"] = io_totals["rbytes"] / (1024 ** 2)
+        data["io_activity_write_mb"] = io_totals["wbytes"] / (1024 ** 2)
+        data["io_activity_read_count"] = io_totals["rios"]
+        data["io_activity_write_count"] = io_totals["wios"]
+
+        return data
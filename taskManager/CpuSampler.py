@@ -0,0 +1,64 @@
+import numpy
+import psutil
+
+
+class CpuSampler:
+    """
+    Breaks CPU usage down by core and by kind of time (user, system, iowait, steal). Everything is derived from a
+    single psutil.cpu_times(percpu=True) call per sample, compared against the previous sample. The breakdown is
+    reported as time series columns, the per-core utilization (which may have hundreds of values) is kept in
+    `core_percent` to be stored separately (see binary_log.pack_core_record).
+    """
+    headers = ("cpu_user_percent",
+               "cpu_system_percent",
+               "cpu_iowait_percent",
+               "cpu_steal_percent",
+               "cpu_max_core_percent")
+
+    def __init__(self):
+        self.previous = psutil.cpu_times(percpu=True)
+        self.fields = self.previous[0]._fields
+
+        self.core_percent = numpy.zeros(len(self.previous), dtype=numpy.float64)
+
+    def get_field(self, deltas, name):
+        if name not in self.fields:
+            return numpy.zeros(len(deltas))
+
+        return deltas[:, self.fields.index(name)]
+
+    def get_data(self):
+        current = psutil.cpu_times(percpu=True)
+
+        # Cores were added or removed, start over
+        if len(current) != len(self.previous):
+            self.previous = current
+            self.core_percent = numpy.zeros(len(current), dtype=numpy.float64)
+            return {key: 0.0 for key in self.headers}
+
+        deltas = numpy.maximum(numpy.array(current, dtype=numpy.float64) -
+                               numpy.array(self.previous, dtype=numpy.float64), 0)
+        self.previous = current
+
+        # Same accounting as psutil.cpu_percent: guest time is already included in user time, and iowait is idle
+        totals = deltas.sum(axis=1) - self.get_field(deltas, "guest") - self.get_field(deltas, "guest_nice")
+        idle = self.get_field(deltas, "idle") + self.get_field(deltas, "iowait")
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            self.core_percent = numpy.where(totals > 0, (totals - idle) / totals * 100, 0.0)
+
+        total = totals.sum()
+        if total <= 0:
+            total = 1.0
+
+        data = dict()
+        data["cpu_user_percent"] = (self.get_field(deltas, "user").sum() +
+                                    self.get_field(deltas, "nice").sum()) / total * 100
+        data["cpu_system_percent"] = (self.get_field(deltas, "system").sum() +
+                                      self.get_field(deltas, "irq").sum() +
+                                      self.get_field(deltas, "softirq").sum()) / total * 100
+        data["cpu_iowait_percent"] = self.get_field(deltas, "iowait").sum() / total * 100
+        data["cpu_steal_percent"] = self.get_field(deltas, "steal").sum() / total * 100
+        data["cpu_max_core_percent"] = float(self.core_percent.max()) if len(self.core_percent) > 0 else 0.0
+
+        return data
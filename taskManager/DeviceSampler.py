@@ -0,0 +1,140 @@
+from time import monotonic
+import psutil
+import os
+import re
+
+
+def get_column_name(prefix, device, suffix):
+    return "_".join([prefix, re.sub(r"\W", "_", device), suffix])
+
+
+def list_block_devices():
+    """
+    Whole physical disks (no partitions, loop or ram devices), or None if this can't be determined
+    """
+    if not os.path.isdir("/sys/block"):
+        return None
+
+    return [name for name in os.listdir("/sys/block") if not name.startswith(("loop", "ram", "zram"))]
+
+
+def list_network_interfaces():
+    """
+    Interfaces backed by a device (no loopback, bridges or other virtual interfaces), or None if this can't be
+    determined
+    """
+    if not os.path.isdir("/sys/class/net"):
+        return None
+
+    return [name for name in os.listdir("/sys/class/net")
+            if os.path.exists(os.path.join("/sys/class/net", name, "device"))]
+
+
+class DiskSampler:
+    """
+    Read/write throughput (MB/s) and utilization (% of the interval during which the device was busy) for each disk,
+    from psutil.disk_io_counters(perdisk=True). Devices are chosen when the sampler is created.
+    """
+    def __init__(self, devices=None):
+        """
+        :param devices: list of device names (e.g. ["nvme0n1", "xvda"]), defaults to all physical disks
+        """
+        counters = psutil.disk_io_counters(perdisk=True)
+
+        if devices is None:
+            devices = list_block_devices()
+            if devices is None:
+                devices = list(counters.keys())
+
+        self.devices = sorted(device for device in devices if device in counters)
+
+        self.headers = tuple(get_column_name("disk", device, suffix)
+                             for device in self.devices
+                             for suffix in ("read_mb_s", "write_mb_s", "util_percent"))
+
+        self.previous = counters
+        self.previous_time = monotonic()
+
+    def get_data(self):
+        counters = psutil.disk_io_counters(perdisk=True)
+        now = monotonic()
+        elapsed = max(now - self.previous_time, 1e-6)
+
+        data = dict()
+        for device in self.devices:
+            current = counters.get(device)
+            previous = self.previous.get(device)
+
+            read_mb_s = 0.0
+            write_mb_s = 0.0
+            util_percent = 0.0
+
+            if current is not None and previous is not None:
+                read_mb_s = max(0, current.read_bytes - previous.read_bytes) / (1024 ** 2) / elapsed
+                write_mb_s = max(0, current.write_bytes - previous.write_bytes) / (1024 ** 2) / elapsed
+
+                # busy_time (ms) is only available on Linux
+                if hasattr(current, "busy_time"):
+                    busy_s = max(0, current.busy_time - previous.busy_time) / 1000
+                    util_percent = min(100.0, busy_s / elapsed * 100)
+
+            data[get_column_name("disk", device, "read_mb_s")] = read_mb_s
+            data[get_column_name("disk", device, "write_mb_s")] = write_mb_s
+            data[get_column_name("disk", device, "util_percent")] = util_percent
+
+        self.previous = counters
+        self.previous_time = now
+
+        return data
+
+
+class NetworkSampler:
+    """
+    Received/sent throughput (MB/s) for each network interface, from psutil.net_io_counters(pernic=True). Loopback and
+    virtual interfaces are skipped by default.
+    """
+    def __init__(self, interfaces=None):
+        """
+        :param interfaces: list of interface names (e.g. ["eth0"]), defaults to all physical interfaces
+        """
+        counters = psutil.net_io_counters(pernic=True)
+
+        if interfaces is None:
+            interfaces = list_network_interfaces()
+            if interfaces is None:
+                interfaces = [name for name in counters
+                              if name != "lo" and not name.startswith(("veth", "docker", "br-"))]
+
+        self.interfaces = sorted(interface for interface in interfaces if interface in counters)
+
+        self.headers = tuple(get_column_name("net", interface, suffix)
+                             for interface in self.interfaces
+                             for suffix in ("recv_mb_s", "sent_mb_s"))
+
+        self.previous = counters
+        self.previous_time = monotonic()
+
+    def get_data(self):
+        counters = psutil.net_io_counters(pernic=True)
+        now = monotonic()
+        elapsed = max(now - self.previous_time, 1e-6)
+
+        data = dict()
+        for interface in self.interfaces:
+            current = counters.get(interface)
+            previous = self.previous.get(interface)
+
+            recv_mb_s = 0.0
+            sent_mb_s = 0.0
+
+            if current is not None and previous is not None:
+                recv_mb_s = max(0, current.bytes_recv - previous.bytes_recv) / (1024 ** 2) / elapsed
+                sent_mb_s = max(0, current.bytes_sent - previous.bytes_sent) / (1024 ** 2) / elapsed
+
+            data[get_column_name("net", interface, "recv_mb_s")] = recv_mb_s
+            data[get_column_name("net", interface, "sent_mb_s")] = sent_mb_s
+
+        self.previous = counters
+        self.previous_time = now
+
+        return data
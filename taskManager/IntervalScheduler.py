@@ -0,0 +1,78 @@
+from time import monotonic
+
+
+class IntervalScheduler:
+    """
+    Produces ticks on a fixed grid of deadlines (start + k * interval) measured on the monotonic clock. Time spent
+    doing work between ticks is absorbed instead of accumulating as drift, and waiting is done on the stop event so
+    that the caller sleeps between ticks and still wakes up immediately when asked to stop.
+    """
+    def __init__(self, interval, stop_event, late_tolerance=None, clock=monotonic):
+        """
+        :param interval: time between deadlines (in seconds), must be positive
+        :param stop_event: threading.Event, wait returns False once it is set
+        :param late_tolerance: defaults to 10% of the interval
+        :param clock: function returning the current time in seconds, defaults to time.monotonic
+        """
+        if interval is None or interval <= 0:
+            raise ValueError("Interval must be a positive number of seconds, not %s" % interval)
+
+        self.interval = interval
+        self.stop_event = stop_event
+        self.clock = clock
+
+        # A tick that fires later than this (in seconds) after its deadline is counted as late
+        if late_tolerance is None:
+            late_tolerance = 0.1 * interval
+        self.late_tolerance = late_tolerance
+
+        self.start_time = None
+        self.next_deadline = None
+
+        # Bookkeeping
+        self.ticks = 0
+        self.late_ticks = 0
+        self.missed_ticks = 0
+        self.max_lateness = 0.0
+
+    def start(self):
+        self.start_time = self.clock()
+        self.next_deadline = self.start_time + self.interval
+
+    def wait(self):
+        """
+        Block until the next deadline
+        :return: False if the stop event was set while waiting, otherwise True
+        """
+        if self.next_deadline is None:
+            self.start()
+
+        timeout = self.next_deadline - self.clock()
+
+        if timeout > 0:
+            if self.stop_event.wait(timeout):
+                return False
+        elif self.stop_event.is_set():
+            return False
+
+        lateness = self.clock() - self.next_deadline
+        self.max_lateness = max(self.max_lateness, lateness)
+
+        if lateness > self.late_tolerance:
+            self.late_ticks += 1
+
+        # If the work took longer than a whole interval, skip the deadlines that already passed instead of firing
+        # a burst of ticks to catch up
+        if lateness >= self.interval:
+            missed = int(lateness // self.interval)
+            self.missed_ticks += missed
+            self.next_deadline += missed * self.interval
+
+        self.next_deadline += self.interval
+        self.ticks += 1
+
+        return True
+
+    def get_summary(self):
+        return "%d ticks, %d late, %d missed, max lateness %.3fs" % \
+               (self.ticks, self.late_ticks, self.missed_ticks, self.max_lateness)
@@ -0,0 +1,226 @@
+from time import time
+import subprocess
+import threading
+import shlex
+import sys
+import os
+
+
+def read_command_file(path):
+    """
+    One command per line, split like a shell would (quotes are respected, but there is no shell: no pipes or
+    redirection). Blank lines and lines starting with '#' are skipped.
+    :param path:
+    :return: list of argument lists
+    """
+    commands = list()
+
+    with open(path, "r") as file:
+        for line in file:
+            line = line.strip()
+
+            if len(line) == 0 or line.startswith("#"):
+                continue
+
+            commands.append(shlex.split(line))
+
+    return commands
+
+
+class Job:
+    def __init__(self, index, arguments):
+        self.index = index
+        self.arguments = arguments
+
+        self.process = None
+        self.start_time = None
+        self.end_time = None
+        self.exit_code = None
+
+    def get_duration(self):
+        if self.start_time is None:
+            return None
+
+        end_time = self.end_time if self.end_time is not None else time()
+
+        return end_time - self.start_time
+
+
+class JobQueue:
+    """
+    Runs a list of commands with up to `n_workers` at a time. When a ResourceMonitor is given, a new job is only
+    started while the latest sample shows more free memory and CPU than the reserves, and only once a sample has been
+    taken since the previous job started (so that its usage has had a chance to show up). A job is always started if
+    nothing is running, so that the queue can't stall.
+    """
+    def __init__(self, commands, n_workers=1, resource_monitor=None, memory_reserve_percent=10,
+                 cpu_reserve_percent=10, poll_interval=0.5, working_directory=".", log_dir=None):
+        """
+        :param commands: list of argument lists (see read_command_file)
+        :param n_workers: max number of jobs running at the same time
+        :param resource_monitor: ResourceMonitor whose samples decide whether there is room for another job
+        :param memory_reserve_percent: don't start a job unless more than this much memory is free
+        :param cpu_reserve_percent: don't start a job unless more than this much CPU is idle
+        :param poll_interval: how often (in seconds) to check for finished jobs and free resources
+        :param working_directory:
+        :param log_dir: if given, the stdout and stderr of each job are written to <log_dir>/job_<index>.stdout/.stderr
+        """
+        self.jobs = [Job(i, arguments) for i, arguments in enumerate(commands)]
+        self.n_workers = max(1, n_workers)
+        self.resource_monitor = resource_monitor
+        self.memory_reserve_percent = memory_reserve_percent
+        self.cpu_reserve_percent = cpu_reserve_percent
+        self.poll_interval = poll_interval
+        self.working_directory = working_directory
+        self.log_dir = log_dir
+
+        self.pending = list(self.jobs)
+        self.running = list()
+
+        # Sample time of the last sample that was used to admit a job
+        self.last_admission_sample = None
+
+        # Number of times a job had to wait for resources
+        self.deferrals = 0
+
+        self.start_time = None
+        self.end_time = None
+        self.stop_event = threading.Event()
+
+    def get_latest_sample(self):
+        if self.resource_monitor is None or len(self.resource_monitor.history) == 0:
+            return None
+
+        return self.resource_monitor.history[-1]
+
+    def can_admit(self):
+        if len(self.running) == 0:
+            return True
+
+        sample = self.get_latest_sample()
+
+        if sample is None:
+            return True
+
+        # The previous job isn't reflected in the samples yet
+        if self.last_admission_sample is not None and sample["time_elapsed_s"] <= self.last_admission_sample:
+            return False
+
+        # Peaks within the interval are more relevant than the sample itself, if they are tracked
+        memory_percent = sample.get("virtual_memory_percent_max", sample["virtual_memory_percent"])
+        cpu_percent = sample["cpu_percent"]
+
+        return 100 - memory_percent > self.memory_reserve_percent and 100 - cpu_percent > self.cpu_reserve_percent
+
+    def launch(self, job):
+        print("RUNNING [%d/%d]: %s" % (job.index + 1, len(self.jobs), " ".join(job.arguments)), file=sys.stderr)
+
+        stdout = None
+        stderr = None
+        if self.log_dir is not None:
+            stdout = open(os.path.join(self.log_dir, "job_%d.stdout" % job.index), "w")
+            stderr = open(os.path.join(self.log_dir, "job_%d.stderr" % job.index), "w")
+
+        job.start_time = time()
+
+        try:
+            job.process = subprocess.Popen(job.arguments, cwd=self.working_directory, stdout=stdout, stderr=stderr)
+        except OSError as e:
+            print("ERROR: could not launch job %d: %s" % (job.index + 1, e), file=sys.stderr)
+            job.end_time = time()
+            job.exit_code = 127
+            return
+        finally:
+            # The child has its own copy of the file descriptors
+            for file in [stdout, stderr]:
+                if file is not None:
+                    file.close()
+
+        self.running.append(job)
+
+        sample = self.get_latest_sample()
+        if sample is not None:
+            self.last_admission_sample = sample["time_elapsed_s"]
+
+        if self.resource_monitor is not None:
+            self.resource_monitor.track_process(job.process.pid)
+
+    def reap(self):
+        for job in list(self.running):
+            exit_code = job.process.poll()
+
+            if exit_code is None:
+                continue
+
+            job.end_time = time()
+            job.exit_code = exit_code
+            self.running.remove(job)
+
+            if self.resource_monitor is not None:
+                self.resource_monitor.untrack_process(job.process.pid)
+
+            print("FINISHED [%d/%d] with exit code %d after %.1fs: %s" %
+                  (job.index + 1, len(self.jobs), exit_code, job.get_duration(), " ".join(job.arguments)),
+                  file=sys.stderr)
+
+    def run(self):
+        """
+        Run every job, and return once they have all finished (or stop was called)
+        """
+        self.start_time = time()
+        deferred = False
+
+        while not self.stop_event.is_set():
+            self.reap()
+
+            while len(self.pending) > 0 and len(self.running) < self.n_workers:
+                if not self.can_admit():
+                    if not deferred:
+                        self.deferrals += 1
+                        deferred = True
+                    break
+
+                deferred = False
+                self.launch(self.pending.pop(0))
+
+            if len(self.pending) == 0 and len(self.running) == 0:
+                break
+
+            self.stop_event.wait(self.poll_interval)
+
+        self.end_time = time()
+
+    def stop(self):
+        """
+        Kill running jobs and don't start any more
+        """
+        self.stop_event.set()
+
+        for job in self.running:
+            job.process.kill()
+            job.process.wait()
+            job.end_time = time()
+            job.exit_code = job.process.returncode
+
+        self.running = list()
+
+    def get_failed_jobs(self):
+        return [job for job in self.jobs if job.exit_code is not None and job.exit_code != 0]
+
+    def get_digest(self):
+        """
+        :return: summary of every job (exit code, duration, command), for the notification
+        """
+        finished = [job for job in self.jobs if job.exit_code is not None]
+        failed = self.get_failed_jobs()
+
+        lines = ["%d of %d jobs finished, %d failed, with up to %d running at a time (%d waits for free resources)." %
+                 (len(finished), len(self.jobs), len(failed), self.n_workers, self.deferrals), ""]
+
+        lines.append("exit\tminutes\tcommand")
+        for job in self.jobs:
+            exit_code = "-" if job.exit_code is None else str(job.exit_code)
+            duration = "-" if job.start_time is None else "%.2f" % (job.get_duration() / 60)
+            lines.append("%s\t%s\t%s" % (exit_code, duration, " ".join(job.arguments)))
+
+        return "\n".join(lines)
@@ -0,0 +1,147 @@
+from taskManager.plotting import create_figure_template, get_time_series_axes, draw_panel, rescale_time, get_envelope
+from taskManager.downsampling import get_point_budget
+from collections import defaultdict
+import warnings
+import numpy
+import io
+import os
+
+
+class LiveResourcePlot:
+    """
+    Keeps a plot of a TSV resource log up to date while the log is being written. Each refresh only reads the bytes
+    appended since the previous one, and the existing lines and fill areas are updated in place. The figure is not
+    managed by pyplot, so refreshes can run on a background thread.
+    """
+    def __init__(self, log_path, output_path, dpi=80, downsample_method="minmax"):
+        self.log_path = log_path
+        self.output_path = output_path
+        self.dpi = dpi
+        self.downsample_method = downsample_method
+        self.max_points = get_point_budget(width_inches=8, dpi=dpi, n_cols=2,
+                                           points_per_pixel=2 if downsample_method == "minmax" else 1)
+
+        # Position in the log up to which everything has been parsed, and any incomplete line after it
+        self.offset = 0
+        self.remainder = b""
+
+        self.header_lines = list()
+        self.static_data = defaultdict(list)
+        self.headers = None
+
+        # Rows are appended to a buffer that grows by doubling, so appending is amortized O(1)
+        self.table = None
+        self.n_rows = 0
+
+        self.figure = None
+        self.axes = None
+        self.twin_axes = None
+        self.time_series_axes = None
+        self.artists = dict()
+
+    def read_new_lines(self):
+        """
+        Parse whatever has been appended to the log since the last call
+        :return: number of new rows
+        """
+        if not os.path.exists(self.log_path):
+            return 0
+
+        with open(self.log_path, "rb") as file:
+            file.seek(self.offset)
+            block = file.read()
+
+        self.offset += len(block)
+        block = self.remainder + block
+
+        end = block.rfind(b"\n") + 1
+        self.remainder = block[end:]
+        lines = block[:end].decode().splitlines()
+
+        # The first three lines of the log are the static and time series headers
+        while self.headers is None and len(lines) > 0:
+            self.header_lines.append(lines.pop(0).split("\t"))
+
+            if len(self.header_lines) == 3:
+                static_headers, static_values, self.headers = self.header_lines
+                for key, value in zip(static_headers, static_values):
+                    self.static_data[key].append(float(value))
+
+                self.table = numpy.zeros((1024, len(self.headers)), dtype=numpy.float64)
+
+        if len(lines) == 0:
+            return 0
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            rows = numpy.loadtxt(io.StringIO("\n".join(lines)), delimiter="\t", dtype=numpy.float64, ndmin=2)
+
+        self.append_rows(rows)
+
+        return len(rows)
+
+    def append_rows(self, rows):
+        required = self.n_rows + len(rows)
+
+        if required > len(self.table):
+            capacity = len(self.table)
+            while capacity < required:
+                capacity *= 2
+
+            table = numpy.zeros((capacity, self.table.shape[1]), dtype=numpy.float64)
+            table[:self.n_rows] = self.table[:self.n_rows]
+            self.table = table
+
+        self.table[self.n_rows:required] = rows
+        self.n_rows = required
+
+    def get_data(self):
+        return {key: self.table[:self.n_rows, i] for i, key in enumerate(self.headers)}
+
+    def refresh(self):
+        """
+        Read new rows, update the figure and save it
+        :return: whether a new image was saved
+        """
+        if self.read_new_lines() == 0 and self.figure is not None:
+            return False
+
+        if self.n_rows == 0:
+            return False
+
+        data = self.get_data()
+
+        if self.figure is None:
+            self.time_series_axes = get_time_series_axes(data, n_cols=2)
+            n_rows = (len(self.time_series_axes) + 1) // 2
+
+            self.figure, self.axes, self.twin_axes = create_figure_template(n_rows, 2, max_ticks=4, use_pyplot=False)
+
+            for (a, b) in [(a, b) for a in range(n_rows) for b in range(2)]:
+                if (a, b) not in self.time_series_axes.values():
+                    self.axes[a][b].set_visible(False)
+                    self.twin_axes[a][b].set_visible(False)
+                elif a == n_rows - 1 or (a + 1, b) not in self.time_series_axes.values():
+                    self.axes[a][b].set_xlabel("Time (min)")
+
+        x = rescale_time(data["time_elapsed_s"])
+
+        for key, (a, b) in self.time_series_axes.items():
+            self.artists[key] = draw_panel(axis=self.axes[a][b],
+                                           twin_axis=self.twin_axes[a][b],
+                                           key=key,
+                                           x=x,
+                                           y=data[key],
+                                           static_data=self.static_data,
+                                           max_points=self.max_points,
+                                           downsample_method=self.downsample_method,
+                                           fast=True,
+                                           artists=self.artists.get(key),
+                                           envelope=get_envelope(data, key))
+
+        # Write then rename, so that nobody sees a half written image
+        tmp_path = self.output_path + ".tmp.png"
+        self.figure.savefig(tmp_path, dpi=self.dpi)
+        os.replace(tmp_path, self.output_path)
+
+        return True
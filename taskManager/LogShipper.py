@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+
+
+def get_manifest_key(prefix, log_filename):
+    return "/".join([prefix.rstrip("/"), log_filename + ".manifest.json"]).lstrip("/")
+
+
+class SegmentedLogShipper:
+    """
+    Ships a growing log file to an object store incrementally. Each call to ship() seals the bytes appended since the
+    previous call (up to the last complete line) into one or more numbered segments, uploads them, and then uploads a
+    small manifest listing every segment in order. Segments are never rewritten, so upload cost per call depends only
+    on how much was appended, not on the size of the log.
+    """
+    def __init__(self, log_path, storage, prefix, max_segment_size=8*1024*1024):
+        """
+        :param log_path: local log file
+        :param storage: LogStorage.S3Storage or LogStorage.DirectoryStorage
+        :param prefix: key prefix (directory) in the object store
+        :param max_segment_size: larger appends are split into several segments of at most this many bytes
+        """
+        self.log_path = log_path
+        self.storage = storage
+        self.log_filename = os.path.basename(log_path)
+        self.max_segment_size = max_segment_size
+
+        self.manifest_key = get_manifest_key(prefix, self.log_filename)
+        self.segment_prefix = self.manifest_key[:-len(".manifest.json")] + ".segments/"
+
+        # Everything before this offset in the local file has been sealed into a segment
+        self.shipped_offset = 0
+        self.segments = list()
+
+        # Set when segments were uploaded but the manifest listing them was not (e.g. its upload failed)
+        self.is_manifest_dirty = False
+
+    def read_unshipped(self, final):
+        if not os.path.exists(self.log_path):
+            return b""
+
+        with open(self.log_path, "rb") as file:
+            file.seek(self.shipped_offset)
+            data = file.read()
+
+        # Don't seal a partial line, unless this is the last upload
+        if not final:
+            end = data.rfind(b"\n")
+            data = data[:end + 1]
+
+        return data
+
+    def split_segments(self, data):
+        """
+        Split data into pieces of at most max_segment_size, cutting at line boundaries where possible
+        """
+        pieces = list()
+
+        while len(data) > self.max_segment_size:
+            end = data.rfind(b"\n", 0, self.max_segment_size)
+            end = self.max_segment_size if end == -1 else end + 1
+
+            pieces.append(data[:end])
+            data = data[end:]
+
+        if len(data) > 0:
+            pieces.append(data)
+
+        return pieces
+
+    def get_manifest(self, final=False):
+        return {"log_filename": self.log_filename,
+                "total_size": self.shipped_offset,
+                "final": final,
+                "segments": self.segments}
+
+    def ship(self, final=False):
+        """
+        Upload all complete lines appended since the last call, followed by the manifest. If the manifest upload of a
+        previous call failed, it is retried even when nothing new was appended.
+        :param final: also ship a trailing partial line, and mark the manifest as complete
+        :return: number of bytes uploaded
+        """
+        data = self.read_unshipped(final=final)
+
+        if len(data) == 0 and not final and not self.is_manifest_dirty:
+            return 0
+
+        uploaded_bytes = 0
+
+        for piece in self.split_segments(data):
+            segment = {"key": self.segment_prefix + "%06d" % len(self.segments),
+                       "offset": self.shipped_offset,
+                       "size": len(piece),
+                       "md5": hashlib.md5(piece).hexdigest()}
+
+            self.storage.put(segment["key"], piece)
+
+            self.segments.append(segment)
+            self.shipped_offset += len(piece)
+            uploaded_bytes += len(piece)
+            self.is_manifest_dirty = True
+
+        # The manifest is written last, so readers never see a segment listed before it exists
+        manifest = json.dumps(self.get_manifest(final=final)).encode()
+        self.storage.put(self.manifest_key, manifest)
+        uploaded_bytes += len(manifest)
+        self.is_manifest_dirty = False
+
+        return uploaded_bytes
+
+
+def read_manifest(storage, manifest_key):
+    return json.loads(storage.get(manifest_key).decode())
+
+
+def reassemble_segmented_log(storage, manifest_key, output_path, verify=True):
+    """
+    Download all segments listed in a manifest and concatenate them into a single log file
+    :param storage:
+    :param manifest_key:
+    :param output_path:
+    :param verify: check the md5 of each segment
+    :return: the manifest
+    """
+    manifest = read_manifest(storage, manifest_key)
+
+    with open(output_path, "wb") as file:
+        for segment in manifest["segments"]:
+            data = storage.get(segment["key"])
+
+            if verify and hashlib.md5(data).hexdigest() != segment["md5"]:
+                raise IOError("Checksum mismatch in log segment: %s" % segment["key"])
+
+            file.write(data)
+
+    return manifest
+
+
+def read_segmented_range(storage, manifest, start, stop):
+    """
+    Read bytes [start, stop) of a segmented log, fetching only the parts of the segments that overlap the range
+    :param storage:
+    :param manifest:
+    :param start:
+    :param stop:
+    :return: bytes
+    """
+    pieces = list()
+
+    for segment in manifest["segments"]:
+        segment_start = segment["offset"]
+        segment_stop = segment["offset"] + segment["size"]
+
+        if segment_stop <= start or segment_start >= stop:
+            continue
+
+        a = max(start, segment_start) - segment_start
+        b = min(stop, segment_stop) - segment_start
+
+        if a == 0 and b == segment["size"]:
+            pieces.append(storage.get(segment["key"]))
+        else:
+            pieces.append(storage.get(segment["key"], byte_range="bytes=%d-%d" % (a, b - 1)))
+
+    return b"".join(pieces)
@@ -0,0 +1,135 @@
+from botocore.exceptions import ClientError
+import hashlib
+import boto3
+import os
+
+
+class S3Storage:
+    """
+    Minimal object store interface on top of an S3 bucket
+    """
+    def __init__(self, bucket, client=None, acl="bucket-owner-full-control"):
+        self.bucket = bucket
+        self.client = boto3.client("s3") if client is None else client
+        self.acl = acl
+
+    def get_url(self, key):
+        return "s3://{}/{}".format(self.bucket, key)
+
+    def put(self, key, data):
+        extra_args = dict()
+        if self.acl is not None:
+            extra_args["ACL"] = self.acl    # enables cross-region (maybe)
+
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, **extra_args)
+
+    def get(self, key, byte_range=None):
+        """
+        :param key:
+        :param byte_range: optional HTTP range string, e.g. "bytes=100-" or "bytes=-4096"
+        :return: bytes
+        """
+        kwargs = dict()
+        if byte_range is not None:
+            kwargs["Range"] = byte_range
+
+        response = self.client.get_object(Bucket=self.bucket, Key=key, **kwargs)
+
+        return response["Body"].read()
+
+    def head(self, key):
+        """
+        :param key:
+        :return: dict with "etag" and "size", or None if the object does not exist
+        """
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in {"404", "NoSuchKey", "NotFound"}:
+                return None
+            raise
+
+        return {"etag": response["ETag"], "size": response["ContentLength"]}
+
+
+class DirectoryStorage:
+    """
+    Stand-in for S3Storage which keeps objects as files under a local directory. Useful for testing, or for shipping
+    logs to a shared filesystem.
+    """
+    def __init__(self, root):
+        self.root = root
+
+    def get_url(self, key):
+        return "file://" + self.get_path(key)
+
+    def get_path(self, key):
+        return os.path.join(self.root, key)
+
+    def put(self, key, data):
+        path = self.get_path(key)
+
+        directory = os.path.dirname(path)
+        if not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        # Write then rename, so readers never see a partial object
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, key, byte_range=None):
+        with open(self.get_path(key), "rb") as file:
+            if byte_range is None:
+                return file.read()
+
+            start, stop = parse_byte_range(byte_range, size=os.fstat(file.fileno()).st_size)
+            file.seek(start)
+
+            return file.read(stop - start)
+
+    def head(self, key):
+        path = self.get_path(key)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "rb") as file:
+            etag = '"%s"' % hashlib.md5(file.read()).hexdigest()
+
+        return {"etag": etag, "size": os.path.getsize(path)}
+
+
+def parse_byte_range(byte_range, size):
+    """
+    Convert an HTTP range string ("bytes=a-b", "bytes=a-" or "bytes=-n") into python slice bounds
+    :param byte_range:
+    :param size: size of the object
+    :return: start, stop
+    """
+    start, stop = byte_range.replace("bytes=", "").split("-")
+
+    if start == "":
+        start = max(0, size - int(stop))
+        stop = size
+    else:
+        start = int(start)
+        stop = size if stop == "" else min(size, int(stop) + 1)
+
+    return start, stop
+
+
+def get_storage(location):
+    """
+    Create a storage backend from a bucket name ("my-bucket" or "s3://my-bucket") or a local directory
+    ("file:///path/to/dir")
+    :param location:
+    :return:
+    """
+    if location.startswith("file://"):
+        return DirectoryStorage(location[len("file://"):])
+
+    if location.startswith("s3://"):
+        location = location[len("s3://"):]
+
+    return S3Storage(location.strip("/"))
@@ -0,0 +1,119 @@
+from time import monotonic
+import threading
+import os
+
+
+class LogWriter:
+    """
+    Keeps a single handle open to a log file and batches rows in memory. The buffer is written out once any of the
+    row count, byte count or age limits is reached, or when flush/close is called explicitly. fsync is only called
+    when requested, since on network filesystems it is by far the most expensive part of a write.
+    """
+    def __init__(self, path, flush_row_count=100, flush_byte_count=64*1024, flush_interval=30, fsync=False,
+                 binary=False):
+        """
+        :param path:
+        :param flush_row_count: flush after this many rows are buffered (None to disable)
+        :param flush_byte_count: flush after this many bytes are buffered (None to disable)
+        :param flush_interval: flush when the oldest buffered row is older than this many seconds (None to disable)
+        :param fsync: whether to fsync after every flush
+        :param binary: whether rows are bytes (True) or str (False)
+        """
+        self.path = path
+        self.flush_row_count = flush_row_count
+        self.flush_byte_count = flush_byte_count
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.binary = binary
+
+        self.file = None
+        self.buffer = list()
+        self.buffered_rows = 0
+        self.buffered_bytes = 0
+        self.buffer_start_time = None
+
+        # Rows are written by the sampling thread, but flush/close may also be called from signal handlers or from
+        # other threads (e.g. before uploading the log)
+        self.lock = threading.RLock()
+
+    def open(self, overwrite=False):
+        with self.lock:
+            if self.file is not None:
+                self.close()
+
+            mode = "w" if overwrite else "a"
+            if self.binary:
+                mode += "b"
+
+            self.file = open(self.path, mode)
+
+    def write(self, data, row=True):
+        """
+        Buffer some data, and flush if any of the limits has been reached
+        :param data: str or bytes
+        :param row: whether this counts as a row (headers don't)
+        :return:
+        """
+        with self.lock:
+            if self.file is None:
+                self.open()
+
+            if self.buffer_start_time is None:
+                self.buffer_start_time = monotonic()
+
+            self.buffer.append(data)
+            self.buffered_bytes += len(data)
+            if row:
+                self.buffered_rows += 1
+
+            if self.should_flush():
+                self.flush()
+
+    def should_flush(self):
+        if self.flush_row_count is not None and self.buffered_rows >= self.flush_row_count:
+            return True
+
+        if self.flush_byte_count is not None and self.buffered_bytes >= self.flush_byte_count:
+            return True
+
+        if self.flush_interval is not None and self.buffer_start_time is not None and \
+                monotonic() - self.buffer_start_time >= self.flush_interval:
+            return True
+
+        return False
+
+    def flush(self, fsync=None):
+        """
+        Write all buffered data to the file
+        :param fsync: override the fsync policy for this flush
+        :return:
+        """
+        if fsync is None:
+            fsync = self.fsync
+
+        with self.lock:
+            if self.file is None:
+                return
+
+            if len(self.buffer) > 0:
+                separator = b"" if self.binary else ""
+                self.file.write(separator.join(self.buffer))
+
+                self.buffer = list()
+                self.buffered_rows = 0
+                self.buffered_bytes = 0
+                self.buffer_start_time = None
+
+            self.file.flush()
+
+            if fsync:
+                os.fsync(self.file.fileno())
+
+    def close(self):
+        with self.lock:
+            if self.file is None:
+                return
+
+            self.flush()
+            self.file.close()
+            self.file = None
@@ -0,0 +1,165 @@
+from taskManager.UploadWorker import UploadWorker
+from taskManager.utils.config import DefaultPaths
+from time import time
+import itertools
+import json
+import re
+import sys
+import os
+
+
+# <time>_<pid of the process that spooled it>_<counter>.json, see NotificationQueue.get_spool_path
+SPOOL_FILENAME_PATTERN = re.compile(r"^\d+\.\d{6}_(\d+)_\d+\.json$")
+
+
+def get_spool_pid(filename):
+    """
+    :return: pid of the process that spooled the message, or None if this isn't a spooled message
+    """
+    match = SPOOL_FILENAME_PATTERN.match(filename)
+
+    if match is None:
+        return None
+
+    return int(match.group(1))
+
+
+def get_default_spool_dir():
+    return os.path.join(DefaultPaths["home"], "notification_spool")
+
+
+def is_process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to someone else
+        return True
+
+    return True
+
+
+class NotificationQueue:
+    """
+    Sends notifications from a background thread (see UploadWorker), so that send_message returns immediately even
+    when the mail server or SES is slow, e.g. in a signal handler. Failed sends are retried with exponential backoff.
+
+    Every message is written to a spool directory before it is queued, and only removed once it has been sent, so that
+    messages which could not be delivered before exit (see stop) are sent again by the next NotificationQueue that
+    starts with the same spool directory.
+    """
+    def __init__(self, notifier, spool_dir=None, max_attempts=5, initial_backoff=2, max_backoff=60,
+                 max_queue_size=64, log=None):
+        """
+        :param notifier: Notifier or AWSNotifier
+        :param spool_dir: where undelivered messages are kept, defaults to ~/.taskmanager/notification_spool
+        :param max_attempts: attempts per message before leaving it for the next run
+        :param initial_backoff: delay (in seconds) before the first retry, doubled for every further retry
+        :param max_backoff: upper bound on the delay between retries
+        :param max_queue_size: messages beyond this many pending ones are only spooled
+        :param log: function used to report errors (defaults to stderr)
+        """
+        self.notifier = notifier
+        self.spool_dir = spool_dir if spool_dir is not None else get_default_spool_dir()
+        self.log = log if log is not None else lambda msg: print(msg, file=sys.stderr)
+
+        self.worker = UploadWorker(self.send_spooled_message,
+                                   max_queue_size=max_queue_size,
+                                   max_attempts=max_attempts,
+                                   initial_backoff=initial_backoff,
+                                   max_backoff=max_backoff,
+                                   log=self.log,
+                                   task_name="sending notification")
+
+        self.counter = itertools.count()
+        self.resent = 0
+
+    def get_spool_path(self):
+        return os.path.join(self.spool_dir, "%.6f_%d_%d.json" % (time(), os.getpid(), next(self.counter)))
+
+    def start(self):
+        """
+        Start sending, beginning with any messages left in the spool by previous runs
+        """
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self.worker.start()
+        self.resend_spooled_messages()
+
+    def resend_spooled_messages(self):
+        for filename in sorted(os.listdir(self.spool_dir)):
+            pid = get_spool_pid(filename)
+            if pid is None:
+                continue
+
+            # Still owned by a running process
+            if pid == os.getpid() or is_process_alive(pid):
+                continue
+
+            # Claim it, in case another run is starting up at the same time
+            path = self.get_spool_path()
+            try:
+                os.rename(os.path.join(self.spool_dir, filename), path)
+            except FileNotFoundError:
+                continue
+
+            self.resent += 1
+            self.worker.submit(spool_path=path)
+
+        if self.resent > 0:
+            self.log("Resending %d undelivered notifications from a previous run" % self.resent)
+
+    def send_message(self, subject, body, subject_prefix=True, attachment=None):
+        """
+        Same arguments as Notifier.send_message, but returns as soon as the message is spooled
+        """
+        path = self.get_spool_path()
+        message = {"subject": subject, "body": body, "subject_prefix": subject_prefix, "attachment": attachment}
+
+        with open(path + ".tmp", "w") as file:
+            json.dump(message, file)
+
+        os.replace(path + ".tmp", path)
+
+        self.worker.submit(spool_path=path)
+
+    def send_spooled_message(self, spool_path):
+        with open(spool_path, "r") as file:
+            message = json.load(file)
+
+        # Files may have been cleaned up since the message was spooled
+        attachment = message["attachment"]
+        if attachment is not None:
+            if type(attachment) is str:
+                attachment = [attachment]
+
+            attachment = [path for path in attachment if os.path.exists(path)]
+
+        sent = self.notifier.send_message(subject=message["subject"],
+                                          body=message["body"],
+                                          subject_prefix=message["subject_prefix"],
+                                          attachment=attachment if attachment else None)
+
+        if sent is False:
+            raise RuntimeError("notifier failed to send the message")
+
+        # e.g. the notifier's attempt limit was reached, keep the message for the next run
+        if sent is not True:
+            self.log("Notification not sent, kept for the next run: %s" % spool_path)
+            return
+
+        os.remove(spool_path)
+
+    def stop(self, timeout=10):
+        """
+        Keep sending (and retrying) for at most `timeout` seconds. Whatever is left stays in the spool for the next run.
+        :param timeout:
+        :return:
+        """
+        self.worker.stop(timeout=timeout, grace=0)
+
+        pending = [filename for filename in os.listdir(self.spool_dir) if get_spool_pid(filename) == os.getpid()]
+
+        if len(pending) > 0:
+            self.log("%d notifications not delivered, they will be sent on the next run (from %s)" %
+                     (len(pending), self.spool_dir))
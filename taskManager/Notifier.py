@@ -3,13 +3,17 @@
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from taskManager.utils.mail import *
-import smtplib
+from taskManager.SmtpConnection import get_shared_connection
 import os
 
 
 class Notifier:
     def __init__(self, email_sender, email_recipients, max_cumulative_attempts=10, subject_prefix="<automated> ",
-                 source_email=None, source_password=None):
+                 source_email=None, source_password=None, connection=None):
+        """
+        :param connection: SmtpConnection to send through. By default, the session is shared with every other Notifier
+        in this process that uses the same source email (see SmtpConnection.get_shared_connection)
+        """
         self.email_sender = email_sender
         self.email_recipients = email_recipients
         self.subject_prefix = subject_prefix
@@ -23,26 +27,13 @@ class Notifier:
 
         # How many attempts have been made
         self.attempts = 0
-        self.server = self.connect_to_server()
-        self.server.close()
-
-    def connect_to_server(self):
-        """Check to see if we can connect to a server"""
-        try:
-            server = smtplib.SMTP('localhost')
-        except ConnectionRefusedError:
-            if self.source_email is not None and self.source_password is not None:
-                try:
-                    server = smtplib.SMTP("smtp.gmail.com", 587)
-                    server.starttls()
-                    server.login(self.source_email, self.source_password)
-                except ConnectionRefusedError:
-                    raise ConnectionRefusedError("Failed to connect to SMTP localhost and smtp.gmail.com. Double check "
-                                                 "gmail credentials with --source_email and --source_password.")
-
-            else:
-                raise ConnectionRefusedError("No email settings provided.")
-        return server
+
+        if connection is None:
+            connection = get_shared_connection(source_email=source_email, source_password=source_password)
+
+        # Check that a server can be reached, the session then stays open for send_message
+        self.connection = connection
+        self.connection.ensure_connected()
 
     def generate_message(self, subject, body, subject_prefix=True, attachments_paths=None):
         """Generate a message to send via the sendmail module of SMTP
@@ -77,9 +68,10 @@ class Notifier:
             print("WARNING: max email attempts exceeded for this Notifier, max=%d, sent=%d" % \
                   (self.max_cumulative_attempts, self.attempts))
             return
-        self.server = self.connect_to_server()
 
         self.generate_message(subject=subject, body=body, subject_prefix=subject_prefix, attachments_paths=attachment)
         # sending the mail
-        self.server.sendmail(self.email_sender, self.email_recipients, self.message.as_string())
-        self.server.close()
+        self.connection.sendmail(self.email_sender, self.email_recipients, self.message.as_string())
+        self.sent = True
+
+        return True
@@ -2,15 +2,26 @@ from taskManager.ResourceMonitor import get_instance_identification
 from taskManager.AWSNotifier import Notifier as AWSNotifier
 from taskManager.plotting import plot_resources_main
 from taskManager.Notifier import Notifier
+from taskManager.NotificationQueue import NotificationQueue
+from taskManager.StreamTail import StreamTail, open_pipe, tee_pipe
 from time import time
 import subprocess
+import asyncio
 import sys
+import os
 import gc
 
 
 class ProcessHandler:
     def __init__(self, aws=True, email_sender=None, email_recipients=None, source_email=None, source_password=None,
-                 resource_monitor=None, attach_full_log=False):
+                 resource_monitor=None, attach_full_log=False, output_tail_kb=0, notification_timeout=10):
+        """
+        :param notification_timeout: max time (in seconds) spent at exit sending notifications, whatever is left is
+        sent on the next run (see NotificationQueue)
+        :param output_tail_kb: if > 0, the command's stdout and stderr are read through pipes (and copied to the
+        redirect files, or to this process's stdout/stderr) and the last `output_tail_kb` KB of each are included in
+        the notification
+        """
 
         self.email_sender = email_sender
         self.email_recipients = None
@@ -21,9 +32,16 @@ class ProcessHandler:
         self.source_email = source_email
         self.source_password = source_password
         self.attach_full_log = attach_full_log
+        self.output_tail_kb = output_tail_kb
+        self.output_drain_timeout = 5
+        self.notification_timeout = notification_timeout
 
         self.process = None
         self.arguments = None
+        self.job_queue = None
+        self.exit_code = None
+        self.stdout_tail = None
+        self.stderr_tail = None
         self.start_time = None
         self.end_time = None
         self.attachments = list()
@@ -36,8 +54,14 @@ class ProcessHandler:
         else:
             self.notifier = None
 
+        # Send from a background thread, so that a slow mail server never holds up the exit
+        if self.notifier is not None:
+            self.notifier = NotificationQueue(self.notifier)
+            self.notifier.start()
+
         self.resource_monitor = resource_monitor
         if self.resource_monitor is not None:
+            self.resource_monitor.set_notifier(self.notifier)
             self.resource_monitor.background_launch()
 
     def get_machine_name(self):
@@ -52,6 +76,10 @@ class ProcessHandler:
         return name
 
     def send_notification(self):
+        if self.job_queue is not None:
+            self.send_job_queue_notification()
+            return
+
         argument_string = " ".join(self.arguments)
         machine_name = self.get_machine_name()
         time_elapsed = (self.end_time - self.start_time)/60
@@ -60,8 +88,34 @@ class ProcessHandler:
         body = "Process with the following arguments: \n\t%s \non %s has concluded after %.2f minutes." % \
                (argument_string, machine_name, time_elapsed)
 
+        if self.exit_code is not None:
+            body += " Exit code: %d." % self.exit_code
+
+        for name, tail in [("stderr", self.stderr_tail), ("stdout", self.stdout_tail)]:
+            if tail is not None and len(tail) > 0:
+                body += "\n\nLast %d KB of %s:\n\n%s" % (self.output_tail_kb, name, tail.get_text())
+
+        self.notifier.send_message(subject, body, attachment=self.attachments)
+
+    def send_job_queue_notification(self):
+        machine_name = self.get_machine_name()
+        time_elapsed = (self.end_time - self.start_time)/60
+
+        subject = "Job queue concluded"
+        if len(self.job_queue.get_failed_jobs()) > 0:
+            subject += " (with failures)"
+
+        body = "Job queue on %s has concluded after %.2f minutes.\n\n%s" % \
+               (machine_name, time_elapsed, self.job_queue.get_digest())
+
         self.notifier.send_message(subject, body, attachment=self.attachments)
 
+    def flush_notifications(self):
+        """
+        Give queued notifications at most `notification_timeout` seconds to be sent
+        """
+        self.notifier.stop(timeout=self.notification_timeout)
+
     def get_pid(self):
         if self.process is not None:
             return self.process.pid
@@ -77,17 +131,25 @@ class ProcessHandler:
 
             if redirect_stdout is not None:
                 print("REDIRECTING STDOUT TO: ", redirect_stdout, file=sys.stderr)
-                redirect_stdout = open(redirect_stdout, "w")
+                redirect_stdout = open(redirect_stdout, "wb")
 
             if redirect_stderr is not None:
                 print("REDIRECTING STDERR TO: ", redirect_stderr, file=sys.stderr)
-                redirect_stderr = open(redirect_stderr, "w")
+                redirect_stderr = open(redirect_stderr, "wb")
+
+            if self.output_tail_kb > 0:
+                self.exit_code = asyncio.run(self.drive_process(arguments, working_directory,
+                                                                redirect_stdout, redirect_stderr))
+            else:
+                self.process = subprocess.Popen(arguments, cwd=working_directory,
+                                                stdout=redirect_stdout,
+                                                stderr=redirect_stderr)
 
-            self.process = subprocess.Popen(arguments, cwd=working_directory,
-                                            stdout=redirect_stdout,
-                                            stderr=redirect_stderr)
+                if self.resource_monitor is not None:
+                    self.resource_monitor.track_process(self.process.pid)
+
+                self.exit_code = self.process.wait()
 
-            self.process.wait()
             self.end_time = time()
 
             if self.resource_monitor is not None:
@@ -95,18 +157,87 @@ class ProcessHandler:
 
             if self.notifier is not None:
                 self.send_notification()
+                self.flush_notifications()
 
         else:
             exit("ERROR: process already launched")
             if self.resource_monitor is not None:
                 self.resource_monitor.kill()
 
+    async def drive_process(self, arguments, working_directory, redirect_stdout=None, redirect_stderr=None):
+        """
+        Run the process with its stdout and stderr piped through StreamTails (see output_tail_kb)
+        :param arguments:
+        :param working_directory:
+        :param redirect_stdout: file opened in binary mode, or None for this process's stdout
+        :param redirect_stderr: file opened in binary mode, or None for this process's stderr
+        :return: exit code
+        """
+        self.stdout_tail = StreamTail(self.output_tail_kb * 1024)
+        self.stderr_tail = StreamTail(self.output_tail_kb * 1024)
+
+        stdout_read_fd, stdout_write_fd = open_pipe()
+        stderr_read_fd, stderr_write_fd = open_pipe()
+
+        try:
+            self.process = await asyncio.create_subprocess_exec(*arguments, cwd=working_directory,
+                                                                stdout=stdout_write_fd,
+                                                                stderr=stderr_write_fd)
+        finally:
+            # Only the child writes to the pipes, so that they close when it exits
+            os.close(stdout_write_fd)
+            os.close(stderr_write_fd)
+
+        if self.resource_monitor is not None:
+            self.resource_monitor.track_process(self.process.pid)
+
+        # Output that was going to the terminal should still show up as it is produced
+        tees = [asyncio.ensure_future(tee_pipe(stdout_read_fd, self.stdout_tail,
+                                               redirect_stdout if redirect_stdout is not None else sys.stdout.buffer,
+                                               flush=redirect_stdout is None)),
+                asyncio.ensure_future(tee_pipe(stderr_read_fd, self.stderr_tail,
+                                               redirect_stderr if redirect_stderr is not None else sys.stderr.buffer,
+                                               flush=redirect_stderr is None))]
+
+        exit_code = await self.process.wait()
+
+        # A descendant left running in the background may keep the pipes open, don't wait for it
+        await asyncio.wait(tees, timeout=self.output_drain_timeout)
+        for tee in tees:
+            tee.cancel()
+
+        return exit_code
+
+    def launch_job_queue(self, job_queue):
+        """
+        Run every job of a JobQueue, then send a single notification summarizing all of them
+        :param job_queue: JobQueue, sharing this handler's resource monitor
+        :return:
+        """
+        if self.process is not None or self.job_queue is not None:
+            exit("ERROR: process already launched")
+
+        self.job_queue = job_queue
+        self.start_time = time()
+
+        self.job_queue.run()
+        self.end_time = time()
+
+        if self.resource_monitor is not None:
+            self.harvest_resource_monitor_output()
+
+        if self.notifier is not None:
+            self.send_notification()
+            self.flush_notifications()
+
     def harvest_resource_monitor_output(self):
         self.resource_monitor.kill()
 
+        # Render quickly, the notification is waiting on this
         resource_plot_path = plot_resources_main(self.resource_monitor.log_path,
                                                  self.resource_monitor.output_dir,
-                                                 show=False)
+                                                 show=False,
+                                                 fast=True)
         self.attachments.append(resource_plot_path)
 
         if self.attach_full_log:
@@ -122,12 +253,32 @@ class ProcessHandler:
         """
         self.end_time = time()
 
+        # Stop sampling and flush the resource log before anything that might block
+        if self.resource_monitor is not None:
+            self.resource_monitor.kill()
+
+            # Keep the high resolution samples leading up to the termination, if there are any
+            ring_path = self.resource_monitor.dump_sample_ring()
+            if ring_path is not None:
+                sys.stderr.write("Wrote recent resource samples to: %s\n" % ring_path)
+                self.attachments.append(ring_path)
+
+        # Kill the running jobs first, so that the digest shows how they ended
+        if self.job_queue is not None:
+            sys.stderr.write("\nERROR: script terminated or interrupted killing %d running jobs\n" %
+                             len(self.job_queue.running))
+            self.job_queue.stop()
+
+        # Only queued here, the child is killed before waiting on the mail server
         if self.notifier is not None:
             self.send_notification()
 
-        sys.stderr.write("\nERROR: script terminated or interrupted killing subprocess: %d\n" % self.process.pid)
+        if self.job_queue is None:
+            sys.stderr.write("\nERROR: script terminated or interrupted killing subprocess: %d\n" % self.process.pid)
+            self.kill()     # goodbye cruel world
 
-        self.kill()     # goodbye cruel world
+        if self.notifier is not None:
+            self.flush_notifications()
 
         exit(1)
 
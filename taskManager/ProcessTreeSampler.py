@@ -0,0 +1,228 @@
+from multiprocessing import cpu_count
+from collections import defaultdict
+import threading
+import psutil
+import os
+
+
+PROC_ROOT = "/proc"
+
+
+def read_children_pids(pid, proc_root=PROC_ROOT):
+    """
+    Direct children of a process, from /proc/<pid>/task/<tid>/children (Linux, if the kernel was built with
+    CONFIG_PROC_CHILDREN). Unlike psutil's Process.children, this only reads the process itself instead of the parent
+    pid of every process on the host.
+    :param pid:
+    :param proc_root: where procfs is mounted
+    :return: list of pids (empty if the process is gone)
+    """
+    task_dir = os.path.join(proc_root, str(pid), "task")
+    children = list()
+
+    try:
+        tids = os.listdir(task_dir)
+    except OSError:
+        return children
+
+    # Children belong to the thread that forked them
+    for tid in tids:
+        try:
+            with open(os.path.join(task_dir, tid, "children"), "r") as file:
+                children.extend(int(child) for child in file.read().split())
+        except OSError:
+            continue
+
+    return children
+
+
+class ProcessTreeSampler:
+    """
+    Follows one or more root processes and all of their descendants, and aggregates their resource usage. psutil
+    Process handles are cached between samples, so that cpu_percent has a baseline to compare against and so that
+    each sample only has to construct handles for processes which were spawned since the last one.
+
+    Descendants stay in the tree until they exit, even once they are reparented (e.g. to init, when their parent
+    exits before them), so that a daemon left behind by the job is still accounted for. They are only dropped with
+    their root (see remove_root).
+
+    Roots are added and removed by other threads (e.g. JobQueue) while the monitor's thread samples, so every access
+    to the roots and cached processes holds `lock`.
+    """
+    headers = ("process_cpu_percent",
+               "process_rss_mb",
+               "process_read_mb",
+               "process_write_mb",
+               "process_threads",
+               "process_children")
+
+    def __init__(self, root_pid=None, proc_root=PROC_ROOT):
+        """
+        :param root_pid: first process to follow (see add_root)
+        :param proc_root: where procfs is mounted, used to list children cheaply where supported (see
+        read_children_pids)
+        """
+        self.lock = threading.RLock()
+        self.root_pids = set()
+        self.cpu_total = cpu_count()
+        self.proc_root = proc_root
+
+        # /proc/<pid>/task/<tid>/children is missing on other platforms, and on kernels without CONFIG_PROC_CHILDREN
+        pid = str(os.getpid())
+        self.read_children_files = os.path.exists(os.path.join(proc_root, pid, "task", pid, "children"))
+
+        # pid -> psutil.Process, kept between samples
+        self.processes = dict()
+
+        # pid -> pid of the root whose tree the process was found in
+        self.process_roots = dict()
+
+        # pid -> (read_bytes, write_bytes) as of the previous sample, used to report per-interval IO
+        self.io_counters = dict()
+
+        if root_pid is not None:
+            self.add_root(root_pid)
+
+    def add_root(self, pid):
+        with self.lock:
+            self.root_pids.add(pid)
+
+    def remove_root(self, pid):
+        """
+        Stop following this process, and the descendants found under it
+        """
+        with self.lock:
+            self.root_pids.discard(pid)
+
+            for child in [child for child, root in self.process_roots.items() if root == pid]:
+                self.forget(child)
+
+    def forget(self, pid):
+        self.processes.pop(pid, None)
+        self.process_roots.pop(pid, None)
+        self.io_counters.pop(pid, None)
+
+    def get_process(self, pid):
+        """
+        Return the cached handle for this pid if it still refers to the same process (psutil compares the create time,
+        to guard against pid reuse), otherwise cache a new handle
+        :param pid:
+        :return: psutil.Process
+        """
+        cached = self.processes.get(pid)
+
+        if cached is not None and cached.is_running():
+            return cached
+
+        process = psutil.Process(pid)
+        self.processes[pid] = process
+        self.io_counters.pop(pid, None)
+
+        return process
+
+    def get_children_map(self):
+        """
+        :return: function returning the pids of the direct children of a pid
+        """
+        if self.read_children_files:
+            return lambda pid: read_children_pids(pid, self.proc_root)
+
+        # Otherwise the parent of every process on the host has to be read, so do it once per sample
+        children = defaultdict(list)
+        for process in psutil.process_iter(["ppid"]):
+            children[process.info["ppid"]].append(process.pid)
+
+        return lambda pid: children.get(pid, [])
+
+    def walk(self):
+        """
+        Find all live processes in the tree(s)
+        :return: list of psutil.Process handles (cached)
+        """
+        with self.lock:
+            tree = dict()
+            get_children = self.get_children_map()
+
+            # (pid, root pid, whether to only follow the process cached for this pid). Descendants found by previous
+            # samples are followed even if they aren't in the tree anymore (see the class docstring), and even if their
+            # root has exited.
+            stack = [(pid, root, True) for pid, root in self.process_roots.items()]
+            stack.extend((pid, pid, pid in self.processes) for pid in self.root_pids)
+
+            while len(stack) > 0:
+                pid, root_pid, known = stack.pop()
+
+                if pid in tree:
+                    continue
+
+                try:
+                    if known:
+                        # Once a process has exited, its pid may be reused by one that isn't part of the tree
+                        process = self.processes.get(pid)
+                        if process is None or not process.is_running():
+                            raise psutil.NoSuchProcess(pid)
+                    else:
+                        process = self.get_process(pid)
+
+                except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                    # root is gone, stop following it (but keep following its descendants)
+                    if pid == root_pid:
+                        self.root_pids.discard(pid)
+                    continue
+
+                tree[pid] = process
+
+                if pid != root_pid:
+                    self.process_roots[pid] = root_pid
+
+                stack.extend((child, root_pid, False) for child in get_children(pid))
+
+            return list(tree.values())
+
+    def get_data(self):
+        with self.lock:
+            data = dict.fromkeys(self.headers, 0)
+
+            tree = self.walk()
+            live_pids = set()
+
+            for process in tree:
+                try:
+                    with process.oneshot():
+                        cpu_percent = process.cpu_percent(interval=None)
+                        rss = process.memory_info().rss
+                        threads = process.num_threads()
+
+                        try:
+                            io = process.io_counters()
+                            io = (io.read_bytes, io.write_bytes)
+                        except (psutil.AccessDenied, AttributeError, NotImplementedError):
+                            io = None
+
+                except (psutil.NoSuchProcess, psutil.ZombieProcess, psutil.AccessDenied):
+                    continue
+
+                live_pids.add(process.pid)
+
+                data["process_cpu_percent"] += cpu_percent
+                data["process_rss_mb"] += rss / (1024 ** 2)
+                data["process_threads"] += threads
+
+                if io is not None:
+                    # New processes have no baseline, so all of their IO happened during this interval
+                    prev_read, prev_write = self.io_counters.get(process.pid, (0, 0))
+                    data["process_read_mb"] += (io[0] - prev_read) / (1024 ** 2)
+                    data["process_write_mb"] += (io[1] - prev_write) / (1024 ** 2)
+                    self.io_counters[process.pid] = io
+
+            data["process_children"] = max(0, len(live_pids) - len(self.root_pids & live_pids))
+
+            # psutil reports per-process cpu as a percentage of one core, normalize to the whole host like cpu_percent
+            data["process_cpu_percent"] /= self.cpu_total
+
+            # Forget processes that have exited
+            for pid in list(self.processes.keys()):
+                if pid not in live_pids and pid not in self.root_pids:
+                    self.forget(pid)
+
+            return data
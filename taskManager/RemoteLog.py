@@ -0,0 +1,193 @@
+from taskManager.LogShipper import read_manifest, read_segmented_range
+from taskManager.binary_log import MAGIC, read_header, get_record_dtype
+import struct
+import io
+import os
+
+
+class RemoteLog:
+    """
+    Local copy of the header and the most recent lines of a resource log that lives in an object store (see
+    LogStorage), kept up to date with HTTP range requests. Unchanged objects (same ETag) are not downloaded at all, and
+    otherwise only the bytes appended since the last update are fetched, so the cost of an update does not depend on
+    the size of the log. Works with plain TSV or binary logs, and with segmented logs (given their manifest key).
+    """
+    def __init__(self, storage, key, local_path, n_lines, segmented=False, header_fetch_size=4096,
+                 max_local_size=4*1024*1024):
+        """
+        :param storage: LogStorage.S3Storage or LogStorage.DirectoryStorage
+        :param key: key of the log, or of its manifest if segmented
+        :param local_path: where to keep the local copy
+        :param n_lines: minimum number of recent lines (or records) to have locally after an update
+        :param segmented: the key is a manifest written by LogShipper.SegmentedLogShipper
+        :param header_fetch_size: number of bytes first requested to get the header of the log (doubled until the
+        header is complete)
+        :param max_local_size: once the local copy grows beyond this, it is replaced by a fresh header + tail
+        """
+        self.storage = storage
+        self.key = key
+        self.local_path = local_path
+        self.n_lines = max(1, n_lines)
+        self.segmented = segmented
+        self.header_fetch_size = header_fetch_size
+        self.max_local_size = max_local_size
+
+        self.etag = None
+        self.manifest = None
+
+        # Everything in the remote log before this offset, and after the header, is (the tail of) the local copy
+        self.offset = None
+        self.header_size = None
+
+        # Binary logs have fixed size records. For TSV logs the line size is estimated whenever a tail is fetched.
+        self.record_size = None
+        self.line_size = 256
+
+        self.bytes_fetched = 0
+
+    def get_range(self, start, stop):
+        if stop <= start:
+            return b""
+
+        if self.segmented:
+            data = read_segmented_range(self.storage, self.manifest, start, stop)
+        else:
+            data = self.storage.get(self.key, byte_range="bytes=%d-%d" % (start, stop - 1))
+
+        self.bytes_fetched += len(data)
+
+        return data
+
+    def get_tail_size(self):
+        if self.record_size is not None:
+            return self.n_lines * self.record_size
+        else:
+            return self.n_lines * self.line_size * 2
+
+    def update(self):
+        """
+        Bring the local copy up to date
+        :return: False if the remote log has not changed since the last update
+        """
+        info = self.storage.head(self.key)
+
+        if info is None:
+            raise IOError("Log not found: %s" % self.key)
+
+        if info["etag"] == self.etag:
+            return False
+
+        if self.segmented:
+            self.manifest = read_manifest(self.storage, self.key)
+            size = self.manifest["total_size"]
+        else:
+            size = info["size"]
+
+        self.etag = info["etag"]
+
+        if self.offset is None or size < self.offset or size - self.offset > self.get_tail_size() \
+                or not os.path.exists(self.local_path) or os.path.getsize(self.local_path) > self.max_local_size:
+            self.reset(size)
+        else:
+            self.append(size)
+
+        return True
+
+    def get_header(self, size):
+        fetch_size = self.header_fetch_size
+
+        while True:
+            header = self.get_range(0, min(size, fetch_size))
+
+            if len(header) == size:
+                return header
+
+            if header.startswith(MAGIC):
+                try:
+                    read_header(io.BytesIO(header))
+                    return header
+                except struct.error:
+                    pass
+
+            elif header.count(b"\n") >= 3:
+                return header
+
+            fetch_size *= 2
+
+    def reset(self, size):
+        """
+        Replace the local copy with the header and the last n_lines of the remote log
+        """
+        header = self.get_header(size)
+
+        if header.startswith(MAGIC):
+            _, _, column_names, column_dtypes, self.header_size = read_header(io.BytesIO(header))
+            self.record_size = get_record_dtype(column_names, column_dtypes).itemsize
+
+            n_records = (size - self.header_size) // self.record_size
+            start = self.header_size + max(0, n_records - self.n_lines) * self.record_size
+            stop = self.header_size + n_records * self.record_size
+
+            tail = self.get_range(start, stop)
+
+        else:
+            self.record_size = None
+
+            # The TSV header is 3 lines: static headers, static values, time series headers
+            self.header_size = 0
+            for i in range(3):
+                end = header.find(b"\n", self.header_size)
+                if end == -1:
+                    break
+                self.header_size = end + 1
+
+            tail_size = self.get_tail_size()
+
+            while True:
+                start = max(self.header_size, size - tail_size)
+
+                if size <= len(header):
+                    data = header[start:size]
+                else:
+                    data = self.get_range(start, size)
+
+                # Keep only complete lines, and drop the partial line at the start of the range
+                begin = data.find(b"\n") + 1 if start > self.header_size else 0
+                end = data.rfind(b"\n") + 1
+                tail = data[begin:end]
+
+                if start == self.header_size or tail.count(b"\n") >= self.n_lines:
+                    break
+
+                tail_size *= 2
+
+            n_lines = tail.count(b"\n")
+            if n_lines > 0:
+                self.line_size = max(1, len(tail) // n_lines)
+
+            stop = start + end
+
+        # Replace rather than rewrite the local copy, so that readers never see it half written
+        tmp_path = self.local_path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(header[:self.header_size])
+            file.write(tail)
+        os.replace(tmp_path, self.local_path)
+
+        self.offset = stop
+
+    def append(self, size):
+        """
+        Append the complete lines (or records) written to the remote log since the last update to the local copy
+        """
+        data = self.get_range(self.offset, size)
+
+        if self.record_size is not None:
+            end = len(data) // self.record_size * self.record_size
+        else:
+            end = data.rfind(b"\n") + 1
+
+        with open(self.local_path, "ab") as file:
+            file.write(data[:end])
+
+        self.offset += end
@@ -1,7 +1,23 @@
-from multiprocessing import cpu_count
+from taskManager.ProcessTreeSampler import ProcessTreeSampler
+from taskManager.CpuSampler import CpuSampler
+from taskManager.DeviceSampler import DiskSampler, NetworkSampler
+from taskManager.CgroupSampler import CgroupSampler
+from taskManager.SystemSampler import get_system_sampler, PEAK_KEYS
+from taskManager.SampleRing import SampleRing
+from taskManager.RollupArchive import RollupArchive, get_tier_path
+from taskManager.IntervalScheduler import IntervalScheduler
+from taskManager.LogWriter import LogWriter
+from taskManager.LogShipper import SegmentedLogShipper
+from taskManager.LogStorage import get_storage
+from taskManager.UploadWorker import UploadWorker
+from taskManager.LivePlot import LiveResourcePlot
+from taskManager.AlertEngine import AlertEngine, parse_rule
+from taskManager.plotting import get_plot_path
+from taskManager.binary_log import pack_header, pack_record, get_column_dtype, get_record_struct
+from taskManager.binary_log import get_core_log_path, pack_core_header, pack_core_record
 from collections import deque
 from datetime import datetime
-from time import time, sleep
+from time import time
 import psutil
 import sys
 import os
@@ -9,7 +25,6 @@ import errno
 import subprocess
 import json
 import socket
-import boto3
 
 import threading
 import urllib.request
@@ -82,7 +97,11 @@ def ensure_directory_exists(directory_path):
 
 class ResourceMonitor:
     def __init__(self, output_dir, interval, aws, alarm_interval=60, s3_upload_bucket=None, s3_upload_path=None,
-                 s3_upload_interval=300, logfile=None):
+                 s3_upload_interval=300, logfile=None, track_process_tree=False, flush_row_count=100,
+                 flush_byte_count=64*1024, flush_interval=30, fsync=False, binary_log=False, live_plot_interval=None,
+                 alert_rules=None, alert_cooldown=600, per_cpu=False,
+                 per_disk=False, per_nic=False, cgroup=False,
+                 sampler_backend="auto", sample_interval=None, ring_duration=600, rollup=False):
 
         self.output_dir = output_dir
         datetime_string = get_datetime_string()
@@ -99,6 +118,78 @@ class ResourceMonitor:
             self.log_filename = "log_{}.txt".format(datetime_string)
 
         self.log_path = os.path.join(self.output_dir, self.log_filename)
+        self.log_writer = LogWriter(self.log_path,
+                                    flush_row_count=flush_row_count,
+                                    flush_byte_count=flush_byte_count,
+                                    flush_interval=flush_interval,
+                                    fsync=fsync)
+
+        # Optional sources of additional time series columns. Each has a `headers` tuple and a `get_data` method
+        self.collectors = list()
+
+        self.process_tree_sampler = None
+        if track_process_tree:
+            self.process_tree_sampler = ProcessTreeSampler()
+            self.collectors.append(self.process_tree_sampler)
+
+        # CPU time breakdown columns, and per-core utilization in a separate compact file (see binary_log.py)
+        self.cpu_sampler = None
+        self.core_log_path = None
+        self.core_log_writer = None
+        self.core_log_n_cores = None
+        if per_cpu:
+            self.cpu_sampler = CpuSampler()
+            self.collectors.append(self.cpu_sampler)
+
+            self.core_log_path = get_core_log_path(self.log_path)
+            self.core_log_writer = LogWriter(self.core_log_path,
+                                             flush_row_count=flush_row_count,
+                                             flush_byte_count=flush_byte_count,
+                                             flush_interval=flush_interval,
+                                             fsync=fsync,
+                                             binary=True)
+
+        # Throughput (and utilization) per disk and per network interface
+        if per_disk:
+            self.collectors.append(DiskSampler())
+
+        if per_nic:
+            self.collectors.append(NetworkSampler())
+
+        # Usage relative to the limits of the enclosing container, instead of the host totals
+        self.cgroup_sampler = None
+        if cgroup:
+            self.cgroup_sampler = CgroupSampler.detect()
+
+            if self.cgroup_sampler is None:
+                print("WARNING: no cgroup v2 hierarchy found, reporting host-wide resource usage", file=sys.stderr)
+            else:
+                self.collectors.append(self.cgroup_sampler)
+
+        # Columns provided by a collector instead of psutil
+        self.replaced_keys = set()
+        for collector in self.collectors:
+            self.replaced_keys.update(getattr(collector, "replaces", ()))
+
+        # Source of the base columns (see SystemSampler.py)
+        self.system_sampler = get_system_sampler(sampler_backend, exclude=self.replaced_keys)
+
+        # Optionally sample CPU, memory and swap every sample_interval seconds into a ring buffer, and log their min,
+        # max and mean every interval (next to the usual value), so that short spikes aren't missed. Only these cheap
+        # gauges are read in between rows, cumulative IO counters are still read once per row so deltas stay exact.
+        self.sample_ring = None
+        self.ring_keys = list()
+        self.samples_per_row = 1
+        if sample_interval is not None and 0 < sample_interval < interval:
+            # Inside a container, the cgroup's own CPU and memory usage are sampled instead of the host's
+            self.ring_keys = [key for key in PEAK_KEYS
+                              if key not in self.replaced_keys or self.cgroup_sampler is not None and
+                              key in self.cgroup_sampler.replaces]
+            self.sample_ring = SampleRing(self.ring_keys, size=int(round(ring_duration / sample_interval)))
+            self.samples_per_row = max(1, int(round(interval / sample_interval)))
+            self.sample_interval = sample_interval
+        else:
+            self.sample_interval = interval
 
         self.history_size = max(1, int(round(alarm_interval / interval)))
         self.history = deque()
@@ -116,6 +207,14 @@ class ResourceMonitor:
                                     "io_activity_write_count": 7,
                                     "disk_usage_percent": 8}
 
+        for key in self.ring_keys:
+            for suffix in ["_min", "_max", "_mean"]:
+                self.time_series_headers[key + suffix] = len(self.time_series_headers)
+
+        for collector in self.collectors:
+            for key in collector.headers:
+                self.time_series_headers[key] = len(self.time_series_headers)
+
         self.normalized_types = {"io_activity_read_mb",
                                  "io_activity_write_mb",
                                  "io_activity_read_count",
@@ -128,21 +227,111 @@ class ResourceMonitor:
 
         self.static_data = self.get_static_resource_data()
 
+        # Optional binary copy of the log (see binary_log.py), written alongside the TSV
+        self.binary_log_path = None
+        self.binary_log_writer = None
+        if binary_log:
+            self.binary_log_path = os.path.splitext(self.log_path)[0] + ".bin"
+            self.binary_log_writer = LogWriter(self.binary_log_path,
+                                               flush_row_count=flush_row_count,
+                                               flush_byte_count=flush_byte_count,
+                                               flush_interval=flush_interval,
+                                               fsync=fsync,
+                                               binary=True)
+
+            column_names = [item[0] for item in sorted(self.time_series_headers.items(), key=lambda x: x[1])]
+            self.binary_column_dtypes = [get_column_dtype(key) for key in column_names]
+            self.binary_record_struct = get_record_struct(self.binary_column_dtypes)
+
+        # Optional multi-resolution copies of the log with a bounded size, for long runs (see RollupArchive.py)
+        self.rollup_archive = None
+        if rollup:
+            column_names = [item[0] for item in sorted(self.time_series_headers.items(), key=lambda x: x[1])]
+            static_headers = [item[0] for item in sorted(self.static_headers.items(), key=lambda x: x[1])]
+
+            self.rollup_archive = RollupArchive(log_path=self.log_path,
+                                                interval=interval,
+                                                static_headers=static_headers,
+                                                static_values=[self.static_data[key] for key in static_headers],
+                                                column_names=column_names,
+                                                column_dtypes=[get_column_dtype(key) for key in column_names])
+
         self.start_time = None
         self.counter = 0
-
-        if s3_upload_bucket is not None:
-            s3_upload_bucket = s3_upload_bucket.lstrip("s3://")
+        self.scheduler = None
 
         self.upload_to_s3 = s3_upload_bucket is not None and s3_upload_path is not None
+        self.log_shipper = None
+        self.upload_worker = None
         if self.upload_to_s3:
             self.s3_upload_bucket = s3_upload_bucket
             self.s3_upload_path = s3_upload_path.format(
                 instance_id=instance_identifier, timestamp=datetime_string, date=date).lstrip("/")
 
+            # The bucket may also be a local directory ("file:///path") for testing
+            self.log_shipper = SegmentedLogShipper(log_path=self.log_path,
+                                                   storage=get_storage(s3_upload_bucket),
+                                                   prefix=self.s3_upload_path)
+
+            # Uploads run on their own thread so that a slow object store can't delay sampling
+            self.upload_worker = UploadWorker(self.upload_data_to_s3, log=self.log)
+
         self.s3_upload_interval = s3_upload_interval
+
+        # Optionally keep a plot of the log up to date while running, refreshed every live_plot_interval seconds
+        self.live_plot_interval = live_plot_interval
+        self.live_plot = None
+        if live_plot_interval is not None:
+            self.live_plot = LiveResourcePlot(log_path=self.log_path,
+                                              output_path=get_plot_path(self.log_path, self.output_dir))
+
+        # Optionally evaluate alert rules (see AlertEngine.parse_rule) on every sample. Rolling windows default to the
+        # alarm interval.
+        self.alert_engine = None
+        if alert_rules is not None and len(alert_rules) > 0:
+            rules = [parse_rule(spec, interval=interval, default_window=alarm_interval) for spec in alert_rules]
+
+            for rule in rules:
+                if rule.key not in self.time_series_headers:
+                    raise ValueError("Alert rule '%s' refers to an unknown column: %s" % (rule, rule.key))
+
+            self.alert_engine = AlertEngine(rules,
+                                            cooldown=alert_cooldown,
+                                            log=self.log,
+                                            name=instance_identifier if instance_identifier is not None
+                                            else socket.gethostname())
+
         #     Threading stuff
         self.stop_event = threading.Event()
+        self.thread = None
+        self.live_plot_thread = None
+
+    def track_process(self, pid):
+        """
+        Follow this pid and all of its descendants (requires track_process_tree=True)
+        :param pid:
+        :return:
+        """
+        if self.process_tree_sampler is not None:
+            self.process_tree_sampler.add_root(pid)
+
+    def untrack_process(self, pid):
+        """
+        Stop following this pid (and its descendants), e.g. once it has been reaped
+        :param pid:
+        :return:
+        """
+        if self.process_tree_sampler is not None:
+            self.process_tree_sampler.remove_root(pid)
+
+    def set_notifier(self, notifier):
+        """
+        Send alerts through this Notifier/AWSNotifier
+        :param notifier:
+        :return:
+        """
+        if self.alert_engine is not None:
+            self.alert_engine.notifier = notifier
 
     def update_history(self, data):
         self.history.append(data)
@@ -160,46 +349,189 @@ class ResourceMonitor:
     def launch(self):
         ensure_directory_exists(self.output_dir)
         self.log("Writing IO/CPU/MEM usage to log file: %s" % os.path.abspath(self.log_path))
+        if self.binary_log_path is not None:
+            self.log("Writing binary copy of log to: %s" % os.path.abspath(self.binary_log_path))
+        if self.core_log_path is not None:
+            self.log("Writing per-core CPU usage to: %s" % os.path.abspath(self.core_log_path))
+        if self.rollup_archive is not None:
+            self.log("Writing rollups of log to: %s" % ", ".join(map(os.path.abspath, self.rollup_archive.paths)))
 
-        checkpoint_time = time()
         upload_time = time()
-        self.start_time = checkpoint_time
+        self.start_time = time()
 
         self.write_header(self.static_headers, overwrite=True)
         self.write_static_data()
 
         self.write_header(self.time_series_headers)
-        while not self.stop_event.is_set():
-            if time() - checkpoint_time > self.interval:
+        self.log_writer.flush()
+
+        if self.binary_log_writer is not None:
+            self.write_binary_header()
+            self.binary_log_writer.flush()
+
+        if self.rollup_archive is not None:
+            self.rollup_archive.open()
+
+        if self.core_log_writer is not None:
+            self.core_log_writer.open(overwrite=True)
+            self.core_log_n_cores = len(self.cpu_sampler.core_percent)
+            self.core_log_writer.write(pack_core_header(self.core_log_n_cores), row=False)
+            self.core_log_writer.flush()
+
+        if self.upload_worker is not None:
+            self.upload_worker.start()
+
+        if self.live_plot is not None:
+            self.live_plot_thread = threading.Thread(target=self.run_live_plot, args=())
+            self.live_plot_thread.daemon = True
+            self.live_plot_thread.start()
+
+        column_names = sorted(self.time_series_headers, key=self.time_series_headers.get)
+
+        try:
+            self.scheduler = IntervalScheduler(self.sample_interval, self.stop_event)
+            row_index = 0
+            while self.scheduler.wait():
+                # Only log a row every `interval` (sample_interval may be shorter). Count missed ticks too, so that
+                # a slow sample doesn't skip a row.
+                tick_index = self.scheduler.ticks + self.scheduler.missed_ticks
+                if tick_index // self.samples_per_row == row_index:
+                    try:
+                        self.sample_peaks()
+                    except Exception as e:
+                        self.log("Error sampling resource usage: %s" % e)
+                    continue
+
+                row_index = tick_index // self.samples_per_row
+
+                # get data and write to file. A failed sample only costs its row, monitoring goes on.
+                try:
+                    data = self.get_resource_data()
+                except Exception as e:
+                    self.log("Error sampling resource usage, row skipped: %s" % e)
+                    continue
 
-                # get data and write to file
-                data = self.get_resource_data()
                 self.update_history(data)
 
-                line = self.format_data_as_line(self.time_series_headers, data)
-                with open(self.log_path, 'a') as file:
-                    file.write(line)
+                values = self.normalize_data(self.time_series_headers, data)
+
+                line = self.format_values_as_line(values)
+                self.log_writer.write(line)
+
+                if self.binary_log_writer is not None:
+                    self.binary_log_writer.write(pack_record(self.binary_record_struct, values))
+
+                if self.rollup_archive is not None:
+                    self.rollup_archive.add(values)
+
+                if self.core_log_writer is not None:
+                    self.core_log_writer.write(pack_core_record(values[0], self.cpu_sampler.core_percent,
+                                                                n_cores=self.core_log_n_cores))
+
+                if self.alert_engine is not None:
+                    self.alert_engine.update(dict(zip(column_names, values)))
 
                 self.counter += 1
-                checkpoint_time = time()
 
-                # upload to s3 (if appropriate)
+                # upload to s3 (if appropriate), without waiting for the upload to finish
                 if self.upload_to_s3 and time() - upload_time > self.s3_upload_interval:
-                    self.upload_to_s3()
+                    self.upload_worker.submit()
                     upload_time = time()
 
-                if self.interval > 1:
-                    sleep(1)
+        finally:
+            self.log_writer.close()
+
+            if self.binary_log_writer is not None:
+                self.binary_log_writer.close()
+
+            if self.core_log_writer is not None:
+                self.core_log_writer.close()
+
+            if self.rollup_archive is not None:
+                self.rollup_archive.close()
+
+            self.system_sampler.close()
+
+        if self.upload_worker is not None:
+            self.upload_worker.submit(block=True, timeout=5, final=True)
+            self.upload_worker.stop(timeout=5)
+            self.log("S3 uploader stopped: %s" % self.upload_worker.get_summary())
+
+        if self.alert_engine is not None:
+            self.alert_engine.stop(timeout=5)
+            self.log("Alert engine stopped: %d alerts, %d dropped" % (self.alert_engine.alerts,
+                                                                     self.alert_engine.dropped))
+
+        self.log("Resource monitor stopped: %s" % self.scheduler.get_summary())
+
+    def run_live_plot(self):
+        scheduler = IntervalScheduler(self.live_plot_interval, self.stop_event)
+
+        while scheduler.wait():
+            self.log_writer.flush()
+
+            try:
+                if self.live_plot.refresh():
+                    self.log("Updated live plot: %s" % self.live_plot.output_path)
+            except Exception as e:
+                self.log("Error updating live plot: %s" % e)
 
     def background_launch(self):
         """Start background thread for resource monitoring """
-        thread = threading.Thread(target=self.launch, args=())
-        thread.daemon = True
-        thread.start()
-
-    def kill(self):
+        self.thread = threading.Thread(target=self.launch, args=())
+        self.thread.daemon = True
+        self.thread.start()
+
+    def kill(self, timeout=10):
+        """
+        Stop sampling, and make sure everything sampled so far has been written to the log
+        :param timeout: max time (in seconds) to wait for the sampling thread to finish its current sample
+        :return:
+        """
         self.stop_event.set()
 
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+        # Make sure the live plot is done writing before the final plot replaces it
+        if self.live_plot_thread is not None and self.live_plot_thread is not threading.current_thread():
+            self.live_plot_thread.join(timeout)
+
+        self.log_writer.close()
+
+        if self.binary_log_writer is not None:
+            self.binary_log_writer.close()
+
+        if self.core_log_writer is not None:
+            self.core_log_writer.close()
+
+        if self.rollup_archive is not None:
+            self.rollup_archive.close()
+
+        # If the sampling thread didn't finish in time, it may still be reading from the sampler's file descriptors,
+        # which could be reused by then. It closes the sampler itself once it exits.
+        if self.thread is None or self.thread is threading.current_thread() or not self.thread.is_alive():
+            self.system_sampler.close()
+
+    def dump_sample_ring(self, path=None):
+        """
+        Write the raw CPU, memory and swap samples in the ring buffer (the last ring_duration seconds) to a TSV file,
+        e.g. after the job died, to see exactly what happened before. Should only be called once sampling has stopped
+        (see kill).
+        :param path: defaults to the log path with a .ring.txt extension
+        :return: path, or None if there is no ring buffer
+        """
+        if self.sample_ring is None:
+            return None
+
+        if path is None:
+            path = os.path.splitext(self.log_path)[0] + ".ring.txt"
+
+        start_time = self.start_time if self.start_time is not None else 0
+        self.sample_ring.dump(path, start_time=start_time)
+
+        return path
+
     @staticmethod
     def list_primary_partitions():
         disk_partitions = psutil.disk_partitions()
@@ -207,64 +539,68 @@ class ResourceMonitor:
         return disk_partitions
 
     def write_static_data(self):
-        with open(self.log_path, "a") as file:
-            line = self.format_data_as_line(self.static_headers, self.static_data)
-            file.write(line)
+        line = self.format_data_as_line(self.static_headers, self.static_data)
+        self.log_writer.write(line, row=False)
 
     def write_header(self, headers, overwrite=False):
-        mode = "a"
         if overwrite:
-            mode = "w"
+            self.log_writer.open(overwrite=True)
 
-        with open(self.log_path, mode) as file:
-            header_line = [item[0] for item in sorted(headers.items(), key=lambda x: x[1])]
-            header_line = "\t".join(header_line) + "\n"
-            file.write(header_line)
+        header_line = [item[0] for item in sorted(headers.items(), key=lambda x: x[1])]
+        header_line = "\t".join(header_line) + "\n"
+        self.log_writer.write(header_line, row=False)
 
     def get_static_resource_data(self):
-        static_data = dict()
+        static_data = self.system_sampler.get_static_data()
 
-        cpu_total = cpu_count()
-        static_data["cpu_total"] = cpu_total
+        if self.cgroup_sampler is not None:
+            static_data.update(self.cgroup_sampler.get_static_data())
 
-        virtual_memory = psutil.virtual_memory()
-        static_data["virtual_memory_total_gb"] = virtual_memory.total / (1024 ** 3)
+        return static_data
 
-        swap_memory = psutil.swap_memory()
-        static_data["swap_memory_total_gb"] = swap_memory.total / (1024 ** 3)
+    def sample_peaks(self):
+        """
+        Sample CPU, memory and swap in between rows (see sample_interval)
+        """
+        data = self.system_sampler.get_peak_data()
 
-        disk_usage = psutil.disk_usage("/")
-        static_data["disk_usage_total_gb"] = disk_usage.total / (1024 ** 3)
+        if self.cgroup_sampler is not None:
+            data.update(self.cgroup_sampler.get_peak_data())
 
-        return static_data
+        self.sample_ring.append(time(), data)
 
     def get_resource_data(self):
         data = dict()
 
+        # The time the sample was actually read, not its scheduled deadline: IO deltas and CPU usage are measured up to
+        # this moment, so a late tick (see IntervalScheduler.get_summary) is plotted where its values belong. Rows still
+        # don't drift, since the deadlines themselves are on a fixed grid.
         data["time_elapsed_s"] = time()
 
-        cpu_percent = psutil.cpu_percent()
-        data["cpu_percent"] = cpu_percent
-
-        virtual_memory = psutil.virtual_memory()
-        data["virtual_memory_percent"] = virtual_memory.percent
+        data.update(self.system_sampler.get_data())
 
-        swap_memory = psutil.swap_memory()
-        data["swap_memory_percent"] = swap_memory.percent
+        for collector in self.collectors:
+            data.update(collector.get_data())
 
-        io_activity = psutil.disk_io_counters()
-        data["io_activity_read_mb"] = io_activity.read_bytes / (1024 ** 2)
-        data["io_activity_write_mb"] = io_activity.write_bytes / (1024 ** 2)
-        data["io_activity_read_count"] = io_activity.read_count
-        data["io_activity_write_count"] = io_activity.write_count
+        if self.sample_ring is not None:
+            self.sample_ring.append(data["time_elapsed_s"], data)
+            data.update(self.sample_ring.aggregate(self.ring_keys))
 
-        disk_usage = psutil.disk_usage("/")
-        data["disk_usage_percent"] = disk_usage.percent
+            # CPU usage is measured over the time since the previous sample. The mean over the interval is what a
+            # single sample per interval would have measured.
+            if "cpu_percent" in self.ring_keys:
+                data["cpu_percent"] = data["cpu_percent_mean"]
 
         return data
 
-    def format_data_as_line(self, headers, data):
-        line = list()
+    def normalize_data(self, headers, data):
+        """
+        Convert raw data into the values that are logged, in header order
+        :param headers:
+        :param data:
+        :return: list of values
+        """
+        values = list()
         for item in sorted(headers.items(), key=lambda x: x[1]):
             key = item[0]
             value = data[key]
@@ -276,25 +612,50 @@ class ResourceMonitor:
             if key == "time_elapsed_s":
                 value -= self.start_time
 
-            line.append("%.3f" % value)
+            values.append(value)
 
+        return values
+
+    def format_data_as_line(self, headers, data):
+        return self.format_values_as_line(self.normalize_data(headers, data))
+
+    @staticmethod
+    def format_values_as_line(values):
+        line = ["%.3f" % value for value in values]
         line = "\t".join(line) + "\n"
 
         return line
 
-    def upload_data_to_s3(self):
-        try:
-            endpoint = os.path.join(self.s3_upload_path, self.log_filename)
-            self.log("Uploading {} to s3://{}/{}".format(self.log_path, self.s3_upload_bucket, endpoint))
-            s3 = boto3.resource('s3')
-            s3.meta.client.upload_file(self.log_path,
-                                       self.s3_upload_bucket,
-                                       endpoint,
-                                       ExtraArgs={'ACL': 'bucket-owner-full-control'})  # enables cross-region (maybe)
-
-        except Exception as e:
-            # do not die
-            self.log("Error uploading to S3: {}".format(e))
-            self.s3_upload_interval = self.s3_upload_interval * 2
-            self.log("Changing upload interval to: {}s".format(self.s3_upload_interval))
-
+    def write_binary_header(self):
+        column_names = [item[0] for item in sorted(self.time_series_headers.items(), key=lambda x: x[1])]
+        static_headers = [item[0] for item in sorted(self.static_headers.items(), key=lambda x: x[1])]
+        static_values = [self.static_data[key] for key in static_headers]
+
+        header = pack_header(static_headers=static_headers,
+                             static_values=static_values,
+                             column_names=column_names,
+                             column_dtypes=self.binary_column_dtypes)
+
+        self.binary_log_writer.open(overwrite=True)
+        self.binary_log_writer.write(header, row=False)
+
+    def upload_data_to_s3(self, final=False):
+        """
+        Ship the lines appended to the log since the last upload as a new segment, and update the manifest
+        :param final: this is the last upload, include any trailing partial line
+        :return: number of bytes uploaded
+        """
+        self.log_writer.flush()
+        self.log("Uploading new log segments to {}".format(
+            self.log_shipper.storage.get_url(self.log_shipper.manifest_key)))
+
+        uploaded_bytes = self.log_shipper.ship(final=final)
+
+        # Rollup tiers are small and rewritten in place, so they are uploaded whole
+        if self.rollup_archive is not None:
+            for name, data in self.rollup_archive.read_tiers():
+                self.log_shipper.storage.put(get_tier_path(self.log_shipper.manifest_key, name), data)
+                uploaded_bytes += len(data)
+        self.log("Uploaded {} bytes".format(uploaded_bytes))
+
+        return uploaded_bytes
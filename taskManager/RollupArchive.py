@@ -0,0 +1,275 @@
+"""
+Multi-resolution (RRD style) copies of the resource log, so that long runs can be plotted and monitored without reading
+every sample. Each tier is a binary log (see binary_log.py) with a fixed number of record slots, used as a ring: once
+the tier is full, each new record overwrites the oldest one. The total size of the archive is therefore bounded no
+matter how long the job runs. Records in a tier are in time order except for that wraparound, see read_tier.
+"""
+
+from taskManager.binary_log import pack_header, pack_record, get_record_struct, read_binary_log, read_header
+import numpy as np
+import threading
+import os
+
+
+# name, resolution (seconds per record, None for every logged row), retention (seconds)
+DEFAULT_TIERS = [("full", None, 3600),
+                 ("1m", 60, 24 * 3600),
+                 ("10m", 600, 90 * 24 * 3600)]
+
+
+def get_tier_path(log_path, name):
+    """
+    :param log_path: path (or object store key) of the resource log, e.g. log_20190211-173319.txt
+    :param name: tier name, e.g. "1m"
+    :return: e.g. log_20190211-173319.1m.bin
+    """
+    if log_path.endswith(".manifest.json"):
+        log_path = log_path[:-len(".manifest.json")]
+
+    return os.path.splitext(log_path)[0] + ".%s.bin" % name
+
+
+def get_rollup_function(key):
+    """
+    How rows are combined into a coarser record: peaks stay peaks, the time is the end of the bucket, and everything
+    else is averaged (including per-interval IO deltas, so that they stay comparable across tiers)
+    """
+    if key == "time_elapsed_s":
+        return np.max
+    elif key.endswith("_max"):
+        return np.max
+    elif key.endswith("_min"):
+        return np.min
+    else:
+        return np.mean
+
+
+def select_tier(tiers, range_s, resolution_s):
+    """
+    Choose the coarsest tier which still has data as far back as `range_s` and at least one record every
+    `resolution_s` seconds
+    :param tiers: list of (name or path, resolution, retention), resolution None for full resolution
+    :param range_s: how far back (in seconds) the data is needed
+    :param resolution_s: max time between records
+    :return: name (or path) of the tier, or None if no tier qualifies (use the full log)
+    """
+    selected = None
+    selected_resolution = None
+
+    for name, resolution, retention in tiers:
+        if retention < range_s:
+            continue
+
+        # Full resolution: as fine as the log itself, but any rollup which is fine enough is smaller
+        if resolution is None:
+            if selected is None:
+                selected = name
+            continue
+
+        if resolution > resolution_s:
+            continue
+
+        if selected_resolution is None or resolution > selected_resolution:
+            selected = name
+            selected_resolution = resolution
+
+    return selected
+
+
+def read_tier(file_path):
+    """
+    Same as binary_log.read_binary_log, with the records copied into time order (undoing the ring wraparound)
+    :param file_path:
+    :return:
+    """
+    headers, header_indexes, data, static_headers, static_header_indexes, static_data = read_binary_log(file_path)
+
+    if len(headers) > 0 and len(data[headers[0]]) > 0:
+        order = np.argsort(data["time_elapsed_s"], kind="stable")
+        data = {key: np.asarray(data[key])[order] for key in headers}
+
+    return headers, header_indexes, data, static_headers, static_header_indexes, static_data
+
+
+def list_tiers(log_path):
+    """
+    :param log_path: resource log
+    :return: list of (path, resolution, retention) for the tiers that exist next to the log
+    """
+    tiers = list()
+
+    for name, _, _ in DEFAULT_TIERS:
+        path = get_tier_path(log_path, name)
+        if not os.path.exists(path):
+            continue
+
+        with open(path, "rb") as file:
+            static_headers, static_values, _, _, _ = read_header(file)
+
+        static_data = dict(zip(static_headers, static_values))
+        tiers.append((path, static_data["tier_resolution_s"], static_data["tier_retention_s"]))
+
+    return tiers
+
+
+def find_tier(log_path, max_points, range_s=None):
+    """
+    Find the coarsest tier of a log that can still provide `max_points` points over the requested time range
+    :param log_path: resource log
+    :param max_points: number of points needed over the range
+    :param range_s: the last `range_s` seconds of the log, or None for all of it
+    :return: path of the tier, or None if the log itself should be used
+    """
+    tiers = list_tiers(log_path)
+
+    if len(tiers) == 0:
+        return None
+
+    if range_s is None:
+        # The finest tier always has the latest rows
+        finest_path = min(tiers, key=lambda tier: tier[1])[0]
+        _, _, data, _, _, _ = read_binary_log(finest_path)
+
+        if len(data["time_elapsed_s"]) == 0:
+            return None
+
+        range_s = float(np.max(data["time_elapsed_s"]))
+
+    return select_tier(tiers, range_s=range_s, resolution_s=range_s / max_points)
+
+
+class RollupTier:
+    def __init__(self, name, path, resolution, capacity, header, record_struct, column_names):
+        """
+        :param name: e.g. "1m"
+        :param path:
+        :param resolution: seconds per record, or None to keep every row
+        :param capacity: number of record slots
+        :param header: binary log header (see binary_log.pack_header)
+        :param record_struct:
+        :param column_names:
+        """
+        self.name = name
+        self.path = path
+        self.resolution = resolution
+        self.capacity = max(1, capacity)
+        self.header = header
+        self.record_struct = record_struct
+        self.rollup_functions = [get_rollup_function(key) for key in column_names]
+
+        self.fd = None
+        self.count = 0
+
+        # Rows of the current bucket, not yet rolled up
+        self.bucket = None
+        self.pending = list()
+
+    def open(self):
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.write(self.fd, self.header)
+
+    def write(self, values):
+        offset = len(self.header) + (self.count % self.capacity) * self.record_struct.size
+        os.pwrite(self.fd, pack_record(self.record_struct, values), offset)
+        self.count += 1
+
+    def write_pending(self):
+        if len(self.pending) == 0:
+            return
+
+        rows = np.array(self.pending, dtype=np.float64)
+        self.write([function(rows[:, i]) for i, function in enumerate(self.rollup_functions)])
+        self.pending = list()
+
+    def add(self, values):
+        """
+        :param values: one logged row, in column order (time_elapsed_s first)
+        """
+        if self.resolution is None:
+            self.write(values)
+            return
+
+        # Rows are logged at the end of their interval, so a bucket includes its end time
+        bucket = int(np.ceil(values[0] / self.resolution))
+
+        if bucket != self.bucket:
+            self.write_pending()
+            self.bucket = bucket
+
+        self.pending.append(values)
+
+    def close(self):
+        if self.fd is None:
+            return
+
+        # The last, partial bucket
+        self.write_pending()
+
+        os.close(self.fd)
+        self.fd = None
+
+
+class RollupArchive:
+    """
+    Writes every logged row to each tier (see DEFAULT_TIERS), next to the log
+    """
+    def __init__(self, log_path, interval, static_headers, static_values, column_names, column_dtypes,
+                 tiers=DEFAULT_TIERS):
+        """
+        :param log_path: resource log, tiers are written next to it (see get_tier_path)
+        :param interval: logging interval (seconds)
+        :param static_headers: same as the log
+        :param static_values:
+        :param column_names:
+        :param column_dtypes: see binary_log.get_column_dtype
+        :param tiers: list of (name, resolution, retention)
+        """
+        self.tiers = list()
+        record_struct = get_record_struct(column_dtypes)
+
+        for name, resolution, retention in tiers:
+            step = interval if resolution is None else max(interval, resolution)
+            capacity = int(np.ceil(retention / step))
+
+            # Each tier describes itself, so that readers don't have to know the configuration
+            header = pack_header(static_headers=list(static_headers) + ["tier_resolution_s", "tier_retention_s"],
+                                 static_values=list(static_values) + [step, retention],
+                                 column_names=column_names,
+                                 column_dtypes=column_dtypes)
+
+            tier = RollupTier(name, get_tier_path(log_path, name), resolution, capacity, header, record_struct,
+                              column_names)
+            self.tiers.append(tier)
+
+        self.paths = [tier.path for tier in self.tiers]
+
+        # Rows are added by the sampling thread while the tiers are uploaded from another one (see read_tiers)
+        self.lock = threading.Lock()
+
+    def open(self):
+        for tier in self.tiers:
+            tier.open()
+
+    def add(self, values):
+        with self.lock:
+            for tier in self.tiers:
+                tier.add(values)
+
+    def read_tiers(self):
+        """
+        Copy the tiers while no row is being written, so that none of their records is torn
+        :return: list of (name, contents of the tier file)
+        """
+        contents = list()
+
+        with self.lock:
+            for tier in self.tiers:
+                with open(tier.path, "rb") as file:
+                    contents.append((tier.name, file.read()))
+
+        return contents
+
+    def close(self):
+        with self.lock:
+            for tier in self.tiers:
+                tier.close()
@@ -0,0 +1,87 @@
+import numpy
+
+
+class SampleRing:
+    """
+    Fixed size buffer of the most recent samples, preallocated so that appending a sample never allocates. Used to
+    sample more often than rows are logged: each row then summarizes the samples taken since the previous row (see
+    `aggregate`), and the raw samples can still be dumped for inspection (see `dump`).
+    """
+    def __init__(self, keys, size):
+        """
+        :param keys: names of the values in each sample
+        :param size: number of samples kept, older samples are overwritten
+        """
+        self.keys = list(keys)
+        self.size = max(1, size)
+
+        self.times = numpy.zeros(self.size, dtype=numpy.float64)
+        self.values = numpy.zeros((self.size, len(self.keys)), dtype=numpy.float64)
+
+        # Total number of samples ever appended, and how many of them had been appended at the last aggregation
+        self.count = 0
+        self.aggregated_count = 0
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def append(self, time, data):
+        """
+        :param time:
+        :param data: dict containing (at least) every key
+        """
+        i = self.count % self.size
+
+        self.times[i] = time
+        row = self.values[i]
+        for j, key in enumerate(self.keys):
+            row[j] = data[key]
+
+        self.count += 1
+
+    def get_indices(self, start_count):
+        """
+        Positions in the buffer of the samples appended since `start_count`, oldest first (as far back as the buffer
+        goes)
+        """
+        start_count = max(start_count, self.count - self.size)
+
+        return numpy.arange(start_count, self.count) % self.size
+
+    def aggregate(self, keys):
+        """
+        Summarize the samples appended since the last call
+        :param keys: subset of self.keys to summarize
+        :return: dict with the min, max and mean of each key, e.g. {"cpu_percent_min": ..., "cpu_percent_max": ...}
+        """
+        indices = self.get_indices(self.aggregated_count)
+        self.aggregated_count = self.count
+
+        data = dict()
+        for key in keys:
+            # Nothing new, e.g. the row is logged right after the first sample
+            if len(indices) == 0:
+                values = self.values[(self.count - 1) % self.size, self.keys.index(key)]
+            else:
+                values = self.values[indices, self.keys.index(key)]
+
+            data[key + "_min"] = float(numpy.min(values))
+            data[key + "_max"] = float(numpy.max(values))
+            data[key + "_mean"] = float(numpy.mean(values))
+
+        return data
+
+    def dump(self, path, start_time=0):
+        """
+        Write every sample in the buffer to a TSV file, oldest first
+        :param path:
+        :param start_time: subtracted from the sample times, e.g. to match time_elapsed_s in the resource log
+        """
+        indices = self.get_indices(0)
+
+        table = numpy.empty((len(indices), len(self.keys) + 1), dtype=numpy.float64)
+        table[:, 0] = self.times[indices] - start_time
+        table[:, 1:] = self.values[indices]
+
+        numpy.savetxt(path, table, fmt="%.3f", delimiter="\t", header="\t".join(["time_elapsed_s"] + self.keys),
+                      comments="")
@@ -0,0 +1,150 @@
+from time import perf_counter
+import threading
+import smtplib
+import atexit
+
+
+# One connection per server and login, shared by every Notifier in the process (see get_shared_connection)
+SHARED_CONNECTIONS = dict()
+SHARED_CONNECTIONS_LOCK = threading.Lock()
+
+
+def get_shared_connection(source_email=None, source_password=None, host="localhost", port=0):
+    """
+    :return: the SmtpConnection for these settings, created on first use
+    """
+    key = (host, port, source_email, source_password)
+
+    with SHARED_CONNECTIONS_LOCK:
+        connection = SHARED_CONNECTIONS.get(key)
+
+        if connection is None:
+            connection = SmtpConnection(source_email=source_email, source_password=source_password, host=host,
+                                        port=port)
+            SHARED_CONNECTIONS[key] = connection
+
+    return connection
+
+
+def close_shared_connections():
+    with SHARED_CONNECTIONS_LOCK:
+        for connection in SHARED_CONNECTIONS.values():
+            connection.close()
+
+
+atexit.register(close_shared_connections)
+
+
+class SmtpConnection:
+    """
+    An SMTP session (including STARTTLS and login, for gmail) that is kept open between messages, instead of being set
+    up again for each one. Before it is reused, the session is checked with a NOOP, and it is reopened if the check
+    fails or the server drops it during a send. Thread safe: messages are sent one at a time.
+    """
+    def __init__(self, source_email=None, source_password=None, host="localhost", port=0, timeout=60):
+        """
+        :param source_email: gmail login, used if there is no SMTP server at `host`
+        :param source_password:
+        :param host: local SMTP server
+        :param port: 0 for the default SMTP port
+        :param timeout: socket timeout (seconds)
+        """
+        self.source_email = source_email
+        self.source_password = source_password
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+        self.server = None
+        self.lock = threading.Lock()
+
+        # Counters
+        self.connects = 0
+        self.reconnects = 0
+        self.messages = 0
+        self.last_connect_latency = None
+
+    def connect_to_server(self):
+        """Connect to the local SMTP server, or to gmail with the source email credentials"""
+        try:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        except ConnectionRefusedError:
+            if self.source_email is not None and self.source_password is not None:
+                try:
+                    server = smtplib.SMTP("smtp.gmail.com", 587, timeout=self.timeout)
+                    server.starttls()
+                    server.login(self.source_email, self.source_password)
+                except ConnectionRefusedError:
+                    raise ConnectionRefusedError("Failed to connect to SMTP localhost and smtp.gmail.com. Double check "
+                                                 "gmail credentials with --source_email and --source_password.")
+
+            else:
+                raise ConnectionRefusedError("No email settings provided.")
+        return server
+
+    def connect(self):
+        start = perf_counter()
+        self.server = self.connect_to_server()
+        self.last_connect_latency = perf_counter() - start
+
+        self.connects += 1
+
+    def close(self):
+        if self.server is None:
+            return
+
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            # Already gone
+            self.server.close()
+
+        self.server = None
+
+    def is_alive(self):
+        if self.server is None:
+            return False
+
+        try:
+            return self.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def ensure_connected(self):
+        """
+        Open the session, or reopen it if the NOOP health check fails. Raises if no server can be reached.
+        """
+        with self.lock:
+            self.reopen_if_dead()
+
+    def reopen_if_dead(self):
+        if self.is_alive():
+            return
+
+        if self.server is not None:
+            self.reconnects += 1
+            self.close()
+
+        self.connect()
+
+    def sendmail(self, sender, recipients, message):
+        """
+        Same as smtplib.SMTP.sendmail, on the persistent session
+        :param sender:
+        :param recipients:
+        :param message: string
+        :return:
+        """
+        with self.lock:
+            self.reopen_if_dead()
+
+            try:
+                self.server.sendmail(sender, recipients, message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                # Dropped between the health check and the send, try once more on a new session
+                self.reconnects += 1
+                self.close()
+                self.connect()
+                self.server.sendmail(sender, recipients, message)
+
+            self.messages += 1
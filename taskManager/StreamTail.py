@@ -0,0 +1,133 @@
+import asyncio
+import fcntl
+import os
+
+
+# Kernel buffer for each captured stream, so that the writer doesn't block while the reader waits for more output
+PIPE_SIZE = 1024 * 1024
+
+
+def open_pipe(size=PIPE_SIZE):
+    """
+    :param size: requested pipe buffer size (Linux only, silently capped by /proc/sys/fs/pipe-max-size)
+    :return: read and write file descriptors
+    """
+    read_fd, write_fd = os.pipe()
+
+    if hasattr(fcntl, "F_SETPIPE_SZ"):
+        try:
+            fcntl.fcntl(write_fd, fcntl.F_SETPIPE_SZ, size)
+        except OSError:
+            pass
+
+    return read_fd, write_fd
+
+
+async def wait_readable(fd):
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    loop.add_reader(fd, future.set_result, None)
+
+    try:
+        await future
+    finally:
+        loop.remove_reader(fd)
+
+
+async def tee_pipe(read_fd, tail, output, chunk_size=PIPE_SIZE, flush=False, coalesce_delay=0.005):
+    """
+    Copy everything from the read end of a pipe to a binary file, keeping the end of it in a StreamTail. The pipe is
+    closed once the writer closes it (or the copy is cancelled).
+    :param read_fd: see open_pipe
+    :param tail: StreamTail
+    :param output: file opened in binary mode
+    :param chunk_size: max bytes per read
+    :param flush: flush the output after every chunk, e.g. when it is a terminal
+    :param coalesce_delay: after a partial read, wait this long (seconds) before reading again. A chatty writer
+    otherwise wakes the reader for every line it writes, which costs more CPU than the copying itself
+    :return:
+    """
+    os.set_blocking(read_fd, False)
+
+    try:
+        while True:
+            try:
+                chunk = os.read(read_fd, chunk_size)
+            except BlockingIOError:
+                await wait_readable(read_fd)
+                continue
+
+            if len(chunk) == 0:
+                break
+
+            tail.append(chunk)
+            output.write(chunk)
+
+            if flush:
+                output.flush()
+
+            if len(chunk) < chunk_size:
+                await asyncio.sleep(coalesce_delay)
+    finally:
+        os.close(read_fd)
+        output.flush()
+
+
+class StreamTail:
+    """
+    The last `size` bytes written to a stream, in a preallocated ring buffer, so that memory use doesn't depend on how
+    much the stream produces
+    """
+    def __init__(self, size):
+        """
+        :param size: number of bytes kept, older bytes are overwritten
+        """
+        self.size = max(1, size)
+        self.buffer = bytearray(self.size)
+
+        # Total number of bytes ever appended
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def append(self, data):
+        view = memoryview(data)
+
+        # Only the end of a large chunk can survive
+        if len(view) > self.size:
+            self.count += len(view) - self.size
+            view = view[-self.size:]
+
+        i = self.count % self.size
+        n_first = min(len(view), self.size - i)
+
+        self.buffer[i:i + n_first] = view[:n_first]
+        self.buffer[:len(view) - n_first] = view[n_first:]
+
+        self.count += len(view)
+
+    def get_bytes(self):
+        """
+        :return: the bytes in the buffer, oldest first
+        """
+        if self.count <= self.size:
+            return bytes(self.buffer[:self.count])
+
+        i = self.count % self.size
+
+        return bytes(self.buffer[i:]) + bytes(self.buffer[:i])
+
+    def get_text(self):
+        """
+        :return: the buffer decoded as UTF-8, starting at the first complete line if the beginning was overwritten
+        """
+        data = self.get_bytes()
+
+        if self.count > self.size:
+            newline = data.find(b"\n")
+            if newline != -1:
+                data = data[newline + 1:]
+
+        return data.decode("utf-8", errors="replace")
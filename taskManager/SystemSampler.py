@@ -0,0 +1,258 @@
+from multiprocessing import cpu_count
+from time import monotonic
+import psutil
+import os
+
+
+# Gauges which can be sampled cheaply between logged rows, to catch short peaks (see ResourceMonitor sample_interval)
+PEAK_KEYS = ("cpu_percent", "virtual_memory_percent", "swap_memory_percent")
+
+IO_KEYS = ("io_activity_read_mb", "io_activity_write_mb", "io_activity_read_count", "io_activity_write_count")
+
+# /proc/diskstats always counts 512 byte sectors, regardless of the device's sector size
+SECTOR_SIZE = 512
+
+
+class SystemSampler:
+    """
+    Host-wide CPU, memory, swap, IO and disk usage: the base columns of the resource log. Subclasses implement
+    get_static_data, get_peak_data (CPU, memory and swap) and get_io_data. Disk usage (a statfs call) changes slowly,
+    so it is only refreshed every `disk_usage_interval` seconds.
+    """
+    def __init__(self, exclude=None, disk_usage_path="/", disk_usage_interval=10):
+        """
+        :param exclude: keys which are provided by something else (e.g. CgroupSampler), and don't need to be read
+        :param disk_usage_path:
+        :param disk_usage_interval: minimum time (in seconds) between two disk usage updates
+        """
+        self.exclude = set() if exclude is None else set(exclude)
+        self.disk_usage_path = disk_usage_path
+        self.disk_usage_interval = disk_usage_interval
+
+        self.disk_usage_percent = None
+        self.disk_usage_time = None
+
+    def get_disk_usage_percent(self):
+        now = monotonic()
+
+        if self.disk_usage_time is None or now - self.disk_usage_time >= self.disk_usage_interval:
+            # Same as psutil.disk_usage: space reserved for root is neither used nor available
+            stat = os.statvfs(self.disk_usage_path)
+            used = (stat.f_blocks - stat.f_bfree) * stat.f_frsize
+            available = stat.f_bavail * stat.f_frsize
+
+            self.disk_usage_percent = used / (used + available) * 100 if used + available > 0 else 0.0
+            self.disk_usage_time = now
+
+        return self.disk_usage_percent
+
+    def get_data(self):
+        data = self.get_peak_data()
+
+        if not self.exclude.issuperset(IO_KEYS):
+            data.update(self.get_io_data())
+
+        data["disk_usage_percent"] = self.get_disk_usage_percent()
+
+        return data
+
+    def close(self):
+        pass
+
+
+class PsutilSampler(SystemSampler):
+    """
+    Portable backend, one psutil call per group of columns
+    """
+    def get_static_data(self):
+        static_data = dict()
+        static_data["cpu_total"] = cpu_count()
+        static_data["virtual_memory_total_gb"] = psutil.virtual_memory().total / (1024 ** 3)
+        static_data["swap_memory_total_gb"] = psutil.swap_memory().total / (1024 ** 3)
+        static_data["disk_usage_total_gb"] = psutil.disk_usage(self.disk_usage_path).total / (1024 ** 3)
+
+        return static_data
+
+    def get_peak_data(self):
+        data = dict()
+
+        if "cpu_percent" not in self.exclude:
+            data["cpu_percent"] = psutil.cpu_percent()
+
+        if "virtual_memory_percent" not in self.exclude:
+            data["virtual_memory_percent"] = psutil.virtual_memory().percent
+
+        data["swap_memory_percent"] = psutil.swap_memory().percent
+
+        return data
+
+    def get_io_data(self):
+        data = dict()
+
+        io_activity = psutil.disk_io_counters()
+        data["io_activity_read_mb"] = io_activity.read_bytes / (1024 ** 2)
+        data["io_activity_write_mb"] = io_activity.write_bytes / (1024 ** 2)
+        data["io_activity_read_count"] = io_activity.read_count
+        data["io_activity_write_count"] = io_activity.write_count
+
+        return data
+
+
+class ProcSampler(SystemSampler):
+    """
+    Linux backend which reads /proc/stat, /proc/meminfo and /proc/diskstats directly. Each file is opened once and
+    re-read from the start with a single pread per sample, and only the fields that are logged are parsed. Values are
+    computed the same way as psutil.
+    """
+    def __init__(self, exclude=None, disk_usage_path="/", disk_usage_interval=10):
+        super().__init__(exclude=exclude, disk_usage_path=disk_usage_path, disk_usage_interval=disk_usage_interval)
+
+        self.stat_fd = os.open("/proc/stat", os.O_RDONLY)
+        self.meminfo_fd = os.open("/proc/meminfo", os.O_RDONLY)
+        self.diskstats_fd = os.open("/proc/diskstats", os.O_RDONLY)
+
+        # Grown as needed, so that every file is read in one call
+        self.read_sizes = {self.stat_fd: 4096, self.meminfo_fd: 4096, self.diskstats_fd: 16384}
+
+        # Same devices as psutil.disk_io_counters: whole disks only, partitions are already counted in their disk
+        self.devices = None
+        if os.path.isdir("/sys/block"):
+            self.devices = set(name.replace("!", "/").encode() for name in os.listdir("/sys/block"))
+
+        self.previous_cpu_times = self.read_cpu_times()
+
+    @staticmethod
+    def is_available():
+        return all(os.access(path, os.R_OK) for path in ["/proc/stat", "/proc/meminfo", "/proc/diskstats"])
+
+    def read(self, fd, first_line_only=False):
+        size = self.read_sizes[fd]
+
+        while True:
+            data = os.pread(fd, size, 0)
+
+            # The whole file fit in the buffer (or all that is needed of it)
+            if len(data) < size or (first_line_only and b"\n" in data):
+                return data
+
+            size *= 2
+            self.read_sizes[fd] = size
+
+    def read_cpu_times(self):
+        """
+        :return: (busy, total) jiffies, summed over all cores
+        """
+        line = self.read(self.stat_fd, first_line_only=True).split(b"\n", 1)[0]
+        fields = [int(field) for field in line.split()[1:]]
+
+        # Same accounting as psutil.cpu_percent: guest time is already included in user time, and iowait is idle
+        total = sum(fields) - sum(fields[8:10])
+        idle = sum(fields[3:5])
+
+        return total - idle, total
+
+    def read_meminfo(self):
+        values = dict()
+
+        for line in self.read(self.meminfo_fd).split(b"\n"):
+            fields = line.split()
+            if len(fields) > 1:
+                values[fields[0]] = int(fields[1]) * 1024
+
+        return values
+
+    def read_io_totals(self):
+        read_count = 0
+        read_sectors = 0
+        write_count = 0
+        write_sectors = 0
+
+        for line in self.read(self.diskstats_fd).split(b"\n"):
+            fields = line.split()
+            if len(fields) < 10 or (self.devices is not None and fields[2] not in self.devices):
+                continue
+
+            read_count += int(fields[3])
+            read_sectors += int(fields[5])
+            write_count += int(fields[7])
+            write_sectors += int(fields[9])
+
+        return read_count, read_sectors * SECTOR_SIZE, write_count, write_sectors * SECTOR_SIZE
+
+    def get_static_data(self):
+        meminfo = self.read_meminfo()
+        stat = os.statvfs(self.disk_usage_path)
+
+        static_data = dict()
+        static_data["cpu_total"] = cpu_count()
+        static_data["virtual_memory_total_gb"] = meminfo[b"MemTotal:"] / (1024 ** 3)
+        static_data["swap_memory_total_gb"] = meminfo[b"SwapTotal:"] / (1024 ** 3)
+        static_data["disk_usage_total_gb"] = stat.f_blocks * stat.f_frsize / (1024 ** 3)
+
+        return static_data
+
+    def get_peak_data(self):
+        data = dict()
+
+        if "cpu_percent" not in self.exclude:
+            busy, total = self.read_cpu_times()
+            previous_busy, previous_total = self.previous_cpu_times
+            self.previous_cpu_times = (busy, total)
+
+            if total > previous_total:
+                data["cpu_percent"] = min(100.0, max(0.0, (busy - previous_busy) / (total - previous_total) * 100))
+            else:
+                data["cpu_percent"] = 0.0
+
+        meminfo = self.read_meminfo()
+
+        if "virtual_memory_percent" not in self.exclude:
+            total = meminfo[b"MemTotal:"]
+            available = meminfo.get(b"MemAvailable:", meminfo[b"MemFree:"])
+            data["virtual_memory_percent"] = (total - available) / total * 100
+
+        swap_total = meminfo[b"SwapTotal:"]
+        swap_used = swap_total - meminfo[b"SwapFree:"]
+        data["swap_memory_percent"] = swap_used / swap_total * 100 if swap_total > 0 else 0.0
+
+        return data
+
+    def get_io_data(self):
+        data = dict()
+
+        read_count, read_bytes, write_count, write_bytes = self.read_io_totals()
+        data["io_activity_read_mb"] = read_bytes / (1024 ** 2)
+        data["io_activity_write_mb"] = write_bytes / (1024 ** 2)
+        data["io_activity_read_count"] = read_count
+        data["io_activity_write_count"] = write_count
+
+        return data
+
+    def close(self):
+        # Only once, the descriptors may have been reused since
+        if self.stat_fd is None:
+            return
+
+        for fd in [self.stat_fd, self.meminfo_fd, self.diskstats_fd]:
+            os.close(fd)
+
+        self.stat_fd = None
+        self.meminfo_fd = None
+        self.diskstats_fd = None
+
+
+def get_system_sampler(backend="auto", exclude=None):
+    """
+    :param backend: "proc" (Linux only), "psutil", or "auto" to use /proc when it is available
+    :param exclude: keys which don't need to be read (see SystemSampler)
+    :return:
+    """
+    if backend == "auto":
+        backend = "proc" if ProcSampler.is_available() else "psutil"
+
+    if backend == "proc":
+        return ProcSampler(exclude=exclude)
+    elif backend == "psutil":
+        return PsutilSampler(exclude=exclude)
+    else:
+        raise ValueError("Unknown sampler backend: '%s'" % backend)
@@ -0,0 +1,38 @@
+import os
+
+
+class TailReader:
+    """
+    Reads the end of a growing text file without reading the rest of it. The last lines are found by seeking
+    backwards from the end of the file one block at a time, so the cost depends on the number of lines read rather
+    than on the size of the file.
+    """
+    def __init__(self, path, block_size=64*1024):
+        self.path = path
+        self.block_size = block_size
+
+    def read_last_lines(self, n, start=0):
+        """
+        :param n: number of lines
+        :param start: never read before this byte offset (e.g. to skip a header)
+        :return: the last n complete lines after `start` (as bytes, without line endings). A trailing partial line is
+        ignored, since the file may still be being written.
+        """
+        if n <= 0:
+            return list()
+
+        with open(self.path, "rb") as file:
+            position = file.seek(0, os.SEEK_END)
+            data = b""
+
+            # Stop once n + 1 line endings are found, so the first (possibly partial) line can be dropped
+            while position > start and data.count(b"\n") <= n:
+                read_size = min(self.block_size, position - start)
+                position -= read_size
+
+                file.seek(position)
+                data = file.read(read_size) + data
+
+        data = data[:data.rfind(b"\n") + 1]
+
+        return data.split(b"\n")[:-1][-n:]
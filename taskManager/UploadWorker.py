@@ -0,0 +1,164 @@
+from time import monotonic
+import threading
+import random
+import queue
+import sys
+
+
+class UploadWorker:
+    """
+    Runs uploads on a dedicated thread, fed by a bounded queue, so that a slow or unavailable object store never
+    blocks the caller. Failed uploads are retried with exponential backoff and jitter. Requests that arrive while the
+    queue is full are dropped, which is safe for incremental uploads since the next one catches up.
+    """
+    def __init__(self, upload_function, max_queue_size=4, max_attempts=8, initial_backoff=2, max_backoff=300,
+                 log=None, task_name="uploading"):
+        """
+        :param upload_function: called with the kwargs given to submit(). Returns the number of bytes uploaded and
+        raises on failure.
+        :param max_queue_size:
+        :param max_attempts: attempts per upload before giving up on it
+        :param initial_backoff: delay (in seconds) before the first retry, doubled for every further retry
+        :param max_backoff: upper bound on the delay between retries
+        :param log: function used to report errors (defaults to stderr)
+        :param task_name: what the worker does, for the error messages
+        """
+        self.upload_function = upload_function
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.log = log if log is not None else lambda msg: print(msg, file=sys.stderr)
+        self.task_name = task_name
+
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        # Counters
+        self.uploads = 0
+        self.failures = 0
+        self.dropped = 0
+        self.abandoned = 0
+        self.bytes_uploaded = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, args=())
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, block=False, timeout=None, **kwargs):
+        """
+        Request an upload. By default this never blocks.
+        :param block: wait (for at most `timeout` seconds) for space in the queue instead of dropping the request
+        :param timeout:
+        :return: False if the queue was full and the request was dropped
+        """
+        try:
+            self.queue.put(kwargs, block=block, timeout=timeout)
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+        return True
+
+    def run(self):
+        while True:
+            kwargs = self.queue.get()
+            if kwargs is None:
+                break
+
+            # Past the deadline given to stop(), leave the rest of the queue
+            if self.stop_event.is_set():
+                self.abandoned += 1 + self.queue.qsize()
+                break
+
+            self.process(kwargs)
+
+    def get_backoff(self, attempt):
+        """
+        Exponential backoff with "equal jitter": half of the delay is fixed and half is random, so that many
+        instances that failed at the same time don't all retry at the same time
+        """
+        delay = min(self.max_backoff, self.initial_backoff * 2 ** (attempt - 1))
+
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def process(self, kwargs):
+        attempt = 0
+
+        while True:
+            if self.stop_event.is_set():
+                self.log("Error {}, giving up after {} attempts: stopped".format(self.task_name, attempt))
+                self.abandoned += 1
+                return
+
+            start_time = monotonic()
+
+            try:
+                uploaded_bytes = self.upload_function(**kwargs)
+
+            except Exception as e:
+                self.failures += 1
+                attempt += 1
+
+                if attempt >= self.max_attempts or self.stop_event.is_set():
+                    self.log("Error {}, giving up after {} attempts: {}".format(self.task_name, attempt, e))
+                    self.abandoned += 1
+                    return
+
+                delay = self.get_backoff(attempt)
+                self.log("Error {}: {}. Retrying in {:.1f}s".format(self.task_name, e, delay))
+
+                self.stop_event.wait(delay)
+                continue
+
+            latency = monotonic() - start_time
+
+            self.uploads += 1
+            self.bytes_uploaded += uploaded_bytes if uploaded_bytes is not None else 0
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.last_latency = latency
+
+            return
+
+    def stop(self, timeout=30, grace=None):
+        """
+        Let queued uploads finish (retrying as usual) for at most `timeout` seconds, then abandon the remaining ones and
+        any retries. No new attempt is started after that.
+        :param timeout:
+        :param grace: how long the upload in progress (if any) may still take after that, defaults to `timeout`
+        :return:
+        """
+        if self.thread is None:
+            return
+
+        deadline = monotonic() + timeout
+
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+
+        self.thread.join(max(0.0, deadline - monotonic()))
+
+        if self.thread.is_alive():
+            self.stop_event.set()
+
+            # In case the queue was full, and has been emptied since
+            try:
+                self.queue.put_nowait(None)
+            except queue.Full:
+                pass
+
+            self.thread.join(timeout if grace is None else grace)
+
+    def get_summary(self):
+        mean_latency = self.total_latency / self.uploads if self.uploads > 0 else 0
+
+        return "%d uploads (%d bytes), %d failed attempts, %d abandoned, %d dropped, mean latency %.3fs, " \
+               "max latency %.3fs" % (self.uploads, self.bytes_uploaded, self.failures, self.abandoned, self.dropped,
+                                      mean_latency, self.max_latency)
@@ -0,0 +1,290 @@
+"""
+Compact binary alternative to the TSV resource log.
+
+Layout (all little-endian):
+    magic               8 bytes     b"TMBINLOG"
+    version             uint32
+    n_static            uint32      number of static columns
+    n_columns           uint32      number of time series columns
+    name_size           uint32      size of the name fields: at least 32, longer if a name needs it
+    static columns      n_static * (name_size byte name, float64 value)
+    time series columns n_columns * (name_size byte name, 8 byte dtype code: "<f8" or "<u8")
+    records             n_records * (n_columns * 8 bytes)
+
+Every field in a record is 8 bytes wide, so the record block can be mapped directly with np.memmap.
+
+Per-core CPU utilization is kept in a separate file next to the log (".cores"), to avoid one column per core:
+    magic               8 bytes     b"TMCORES\0"
+    version             uint32
+    n_cores             uint32
+    records             n_records * (float64 time_elapsed_s, n_cores * uint8 percent)
+"""
+
+from collections import defaultdict
+import numpy as np
+import struct
+import os
+
+
+MAGIC = b"TMBINLOG"
+VERSION = 1
+CORE_VERSION = 1
+NAME_SIZE = 32
+DTYPE_SIZE = 8
+
+HEADER_STRUCT = struct.Struct("<8sIIII")
+CORE_MAGIC = b"TMCORES\0"
+CORE_HEADER_STRUCT = struct.Struct("<8sII")
+CORE_TIME_STRUCT = struct.Struct("<d")
+
+# Columns which are stored as unsigned integers, everything else is float64
+INTEGER_COLUMNS = {"io_activity_read_count",
+                   "io_activity_write_count",
+                   "process_threads",
+                   "process_children"}
+
+
+def get_column_dtype(key):
+    if key in INTEGER_COLUMNS:
+        return "<u8"
+    else:
+        return "<f8"
+
+
+def get_record_dtype(column_names, column_dtypes):
+    return np.dtype([(name, dtype) for name, dtype in zip(column_names, column_dtypes)])
+
+
+def get_record_struct(column_dtypes):
+    codes = {"<f8": "d", "<u8": "Q"}
+    return struct.Struct("<" + "".join(codes[dtype] for dtype in column_dtypes))
+
+
+def get_static_struct(name_size):
+    return struct.Struct("<%dsd" % name_size)
+
+
+def get_column_struct(name_size):
+    return struct.Struct("<%ds%ds" % (name_size, DTYPE_SIZE))
+
+
+def get_name_size(names):
+    """
+    :return: size of the name fields in the header: NAME_SIZE, or the longest name rounded up to 8 bytes
+    """
+    longest = max([len(name.encode()) for name in names], default=0)
+
+    return max(NAME_SIZE, (longest + 7) // 8 * 8)
+
+
+def pack_header(static_headers, static_values, column_names, column_dtypes):
+    """
+    :param static_headers: list of static column names
+    :param static_values: list of static values (same order)
+    :param column_names: list of time series column names
+    :param column_dtypes: list of numpy dtype strings, one per time series column
+    :return: bytes
+    """
+    name_size = get_name_size(list(static_headers) + list(column_names))
+    static_struct = get_static_struct(name_size)
+    column_struct = get_column_struct(name_size)
+
+    header = [HEADER_STRUCT.pack(MAGIC, VERSION, len(static_headers), len(column_names), name_size)]
+
+    for name, value in zip(static_headers, static_values):
+        header.append(static_struct.pack(name.encode(), value))
+
+    for name, dtype in zip(column_names, column_dtypes):
+        header.append(column_struct.pack(name.encode(), dtype.encode()))
+
+    return b"".join(header)
+
+
+def pack_record(record_struct, values):
+    """
+    :param record_struct: struct.Struct from get_record_struct
+    :param values: list of values in column order
+    :return: bytes
+    """
+    values = [int(round(max(0, v))) if code == "Q" else float(v)
+              for code, v in zip(record_struct.format[1:], values)]
+
+    return record_struct.pack(*values)
+
+
+def is_binary_log(file_path):
+    with open(file_path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def read_header(file):
+    """
+    :param file: file object opened in binary mode, positioned at the start of the file
+    :return: static_headers, static_values, column_names, column_dtypes, record offset
+    """
+    magic, version, n_static, n_columns, name_size = HEADER_STRUCT.unpack(file.read(HEADER_STRUCT.size))
+
+    if magic != MAGIC:
+        raise ValueError("Not a binary resource log: %s" % file.name)
+    if version != VERSION:
+        raise ValueError("Unsupported binary resource log version: %d" % version)
+
+    static_struct = get_static_struct(name_size)
+    column_struct = get_column_struct(name_size)
+
+    static_headers = list()
+    static_values = list()
+    for i in range(n_static):
+        name, value = static_struct.unpack(file.read(static_struct.size))
+        static_headers.append(name.rstrip(b"\0").decode())
+        static_values.append(value)
+
+    column_names = list()
+    column_dtypes = list()
+    for i in range(n_columns):
+        name, dtype = column_struct.unpack(file.read(column_struct.size))
+        column_names.append(name.rstrip(b"\0").decode())
+        column_dtypes.append(dtype.rstrip(b"\0").decode())
+
+    offset = file.tell()
+
+    return static_headers, static_values, column_names, column_dtypes, offset
+
+
+def read_binary_log(file_path):
+    """
+    Map the records of a binary log into memory without copying them. Returns the same structure as
+    plotting.read_tsv, except that each time series is a (read only) numpy array view of the file.
+    :param file_path:
+    :return:
+    """
+    with open(file_path, "rb") as file:
+        static_headers, static_values, headers, column_dtypes, offset = read_header(file)
+
+    record_dtype = get_record_dtype(headers, column_dtypes)
+
+    # Ignore a trailing partial record, in case the log is still being written
+    n_records = (os.path.getsize(file_path) - offset) // record_dtype.itemsize
+
+    if n_records > 0:
+        records = np.memmap(file_path, dtype=record_dtype, mode="r", offset=offset, shape=(n_records,))
+    else:
+        records = np.zeros(0, dtype=record_dtype)
+
+    header_indexes = {x: i for i, x in enumerate(headers)}
+    data = {key: records[key] for key in headers}
+
+    static_header_indexes = {x: i for i, x in enumerate(static_headers)}
+    static_data = defaultdict(list)
+    for key, value in zip(static_headers, static_values):
+        static_data[key].append(value)
+
+    return headers, header_indexes, data, static_headers, static_header_indexes, static_data
+
+
+def parse_value(text):
+    """
+    :return: float value of a TSV field, NaN if it is empty (e.g. a total that could not be read)
+    """
+    text = text.strip()
+
+    return float(text) if len(text) > 0 else float("nan")
+
+
+def tsv_to_binary(tsv_path, binary_path):
+    """
+    Convert a TSV resource log to the binary format, one row at a time
+    :param tsv_path:
+    :param binary_path:
+    :return:
+    """
+    with open(tsv_path, "r") as tsv_file, open(binary_path, "wb") as binary_file:
+        static_headers = tsv_file.readline().strip().split("\t")
+        static_values = list(map(parse_value, tsv_file.readline().rstrip("\r\n").split("\t")))
+        column_names = tsv_file.readline().strip().split("\t")
+        column_dtypes = [get_column_dtype(name) for name in column_names]
+
+        binary_file.write(pack_header(static_headers, static_values, column_names, column_dtypes))
+
+        record_struct = get_record_struct(column_dtypes)
+        for line in tsv_file:
+            line = line.rstrip("\r\n").split("\t")
+            if len(line) != len(column_names):
+                continue
+
+            binary_file.write(pack_record(record_struct, list(map(parse_value, line))))
+
+
+def binary_to_tsv(binary_path, tsv_path):
+    """
+    Convert a binary resource log to the TSV format written by ResourceMonitor
+    :param binary_path:
+    :param tsv_path:
+    :return:
+    """
+    headers, header_indexes, data, static_headers, static_header_indexes, static_data = read_binary_log(binary_path)
+
+    with open(tsv_path, "w") as tsv_file:
+        tsv_file.write("\t".join(static_headers) + "\n")
+        tsv_file.write("\t".join("%.3f" % static_data[key][0] for key in static_headers) + "\n")
+        tsv_file.write("\t".join(headers) + "\n")
+
+        columns = [data[key] for key in headers]
+        for row in zip(*columns):
+            tsv_file.write("\t".join("%.3f" % value for value in row) + "\n")
+
+
+def get_core_log_path(log_path):
+    return os.path.splitext(log_path)[0] + ".cores"
+
+
+def get_core_record_dtype(n_cores):
+    return np.dtype([("time_elapsed_s", "<f8"), ("cores", "u1", (n_cores,))])
+
+
+def pack_core_header(n_cores):
+    return CORE_HEADER_STRUCT.pack(CORE_MAGIC, CORE_VERSION, n_cores)
+
+
+def pack_core_record(time_elapsed, core_percent, n_cores=None):
+    """
+    :param time_elapsed: same value as the time_elapsed_s column of the log
+    :param core_percent: numpy array of per-core utilization (%), stored rounded to whole percents
+    :param n_cores: number of cores in the header (see pack_core_header). Records must all have this size, so if cores
+    went offline since, the missing ones are stored as idle, and cores which came online are left out.
+    :return: bytes
+    """
+    if n_cores is not None and len(core_percent) != n_cores:
+        resized = np.zeros(n_cores)
+        n = min(n_cores, len(core_percent))
+        resized[:n] = core_percent[:n]
+        core_percent = resized
+
+    cores = np.clip(np.rint(core_percent), 0, 100).astype(np.uint8)
+
+    return CORE_TIME_STRUCT.pack(time_elapsed) + cores.tobytes()
+
+
+def read_core_log(file_path):
+    """
+    :param file_path:
+    :return: time_elapsed_s (n_records), per-core utilization (n_records x n_cores, uint8), both memory mapped
+    """
+    with open(file_path, "rb") as file:
+        magic, version, n_cores = CORE_HEADER_STRUCT.unpack(file.read(CORE_HEADER_STRUCT.size))
+
+    if magic != CORE_MAGIC:
+        raise ValueError("Not a per-core CPU log: %s" % file_path)
+    if version != CORE_VERSION:
+        raise ValueError("Unsupported per-core CPU log version: %d" % version)
+
+    record_dtype = get_core_record_dtype(n_cores)
+    n_records = (os.path.getsize(file_path) - CORE_HEADER_STRUCT.size) // record_dtype.itemsize
+
+    if n_records > 0:
+        records = np.memmap(file_path, dtype=record_dtype, mode="r", offset=CORE_HEADER_STRUCT.size,
+                            shape=(n_records,))
+    else:
+        records = np.zeros(0, dtype=record_dtype)
+
+    return records["time_elapsed_s"], records["cores"]
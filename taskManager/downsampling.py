@@ -0,0 +1,173 @@
+"""
+Reduce long time series to roughly as many points as can actually be drawn, while keeping their visual shape.
+"""
+
+import numpy
+
+
+def get_point_budget(width_inches, dpi, n_cols=1, points_per_pixel=2):
+    """
+    How many points are worth plotting across one panel of a figure
+    :param width_inches: figure width
+    :param dpi:
+    :param n_cols: number of panels side by side
+    :param points_per_pixel: 2 for min/max envelopes (one min and one max per pixel column)
+    :return:
+    """
+    return int(width_inches * dpi / n_cols * points_per_pixel)
+
+
+def min_max_downsample(x, y, n_out):
+    """
+    Split the series into n_out/2 equal buckets and keep the minimum and the maximum of each bucket, in time order.
+    Every peak and trough survives, which matters more than smoothness for resource usage plots.
+    :param x:
+    :param y:
+    :param n_out: maximum number of points to return
+    :return: x, y
+    """
+    x = numpy.asarray(x)
+    y = numpy.asarray(y)
+    n = len(y)
+
+    if n <= n_out or n_out < 4:
+        return x, y
+
+    bucket_size = int(numpy.ceil(n / (n_out // 2)))
+    n_buckets = int(numpy.ceil(n / bucket_size))
+
+    # Pad the last bucket so the series can be viewed as a 2D (bucket, offset) array
+    padded = numpy.full(n_buckets * bucket_size, numpy.nan)
+    padded[:n] = y
+    padded = padded.reshape(n_buckets, bucket_size)
+
+    offsets = numpy.arange(n_buckets) * bucket_size
+
+    # Buckets with no values at all (e.g. a column left empty for a while) have no min or max to keep
+    is_valid = ~numpy.all(numpy.isnan(padded), axis=1)
+    padded = padded[is_valid]
+    offsets = offsets[is_valid]
+
+    min_indexes = offsets + numpy.nanargmin(padded, axis=1)
+    max_indexes = offsets + numpy.nanargmax(padded, axis=1)
+
+    indexes = numpy.sort(numpy.stack([min_indexes, max_indexes], axis=1), axis=1).ravel()
+
+    return x[indexes], y[indexes]
+
+
+def lttb_downsample(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets (Steinarsson, 2013). Keeps the first and last points and, from each bucket in
+    between, the point forming the largest triangle with the previously kept point and the average of the next bucket.
+    :param x:
+    :param y:
+    :param n_out: number of points to return
+    :return: x, y
+    """
+    x = numpy.asarray(x, dtype=numpy.float64)
+    y = numpy.asarray(y, dtype=numpy.float64)
+    n = len(y)
+
+    if n <= n_out or n_out < 3:
+        return x, y
+
+    every = (n - 2) / (n_out - 2)
+    indexes = numpy.zeros(n_out, dtype=numpy.int64)
+    indexes[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+
+        next_start = end
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+
+        areas = numpy.abs((x[a] - average_x) * (y[start:end] - y[a]) -
+                          (x[a] - x[start:end]) * (average_y - y[a]))
+
+        a = start + int(numpy.argmax(areas))
+        indexes[i + 1] = a
+
+    return x[indexes], y[indexes]
+
+
+def downsample(x, y, n_out, method="minmax"):
+    """
+    :param x:
+    :param y:
+    :param n_out: point budget, None to keep every point
+    :param method: "minmax" or "lttb"
+    :return: x, y
+    """
+    if n_out is None:
+        return x, y
+
+    if method == "minmax":
+        return min_max_downsample(x, y, n_out)
+    elif method == "lttb":
+        return lttb_downsample(x, y, n_out)
+    else:
+        raise ValueError("Unknown downsampling method: %s" % method)
+
+
+def bucket_mean_downsample(x, values, n_out):
+    """
+    Average consecutive rows of a 2D array (e.g. one column per CPU core) in equal buckets, for heatmaps
+    :param x: (n)
+    :param values: (n, m)
+    :param n_out: maximum number of rows to return, None to keep every row
+    :return: x (first value of each bucket), values
+    """
+    x = numpy.asarray(x)
+    values = numpy.asarray(values, dtype=numpy.float64)
+    n = len(x)
+
+    if n_out is None or n <= n_out:
+        return x, values
+
+    bucket_size = int(numpy.ceil(n / n_out))
+    n_buckets = int(numpy.ceil(n / bucket_size))
+
+    padded = numpy.full((n_buckets * bucket_size, values.shape[1]), numpy.nan)
+    padded[:n] = values
+
+    values = numpy.nanmean(padded.reshape(n_buckets, bucket_size, values.shape[1]), axis=1)
+
+    return x[::bucket_size], values
+
+
+def envelope_downsample(x, y_min, y_max, n_out):
+    """
+    Reduce a min/max envelope to at most n_out points, keeping the lowest min and the highest max of each bucket so
+    that no peak is lost
+    :param x:
+    :param y_min:
+    :param y_max:
+    :param n_out: maximum number of points to return, None to keep every point
+    :return: x (first value of each bucket), y_min, y_max
+    """
+    x = numpy.asarray(x)
+    y_min = numpy.asarray(y_min, dtype=numpy.float64)
+    y_max = numpy.asarray(y_max, dtype=numpy.float64)
+    n = len(x)
+
+    if n_out is None or n <= n_out:
+        return x, y_min, y_max
+
+    bucket_size = int(numpy.ceil(n / n_out))
+    n_buckets = int(numpy.ceil(n / bucket_size))
+
+    padded_min = numpy.full(n_buckets * bucket_size, numpy.nan)
+    padded_min[:n] = y_min
+    padded_max = numpy.full(n_buckets * bucket_size, numpy.nan)
+    padded_max[:n] = y_max
+
+    y_min = numpy.nanmin(padded_min.reshape(n_buckets, bucket_size), axis=1)
+    y_max = numpy.nanmax(padded_max.reshape(n_buckets, bucket_size), axis=1)
+
+    return x[::bucket_size], y_min, y_max
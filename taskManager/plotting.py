@@ -1,4 +1,12 @@
+from taskManager.binary_log import is_binary_log, read_binary_log, get_core_log_path, read_core_log
+from taskManager.downsampling import downsample, get_point_budget, bucket_mean_downsample, envelope_downsample
+from taskManager.RollupArchive import find_tier, read_tier
+from matplotlib.ticker import MaxNLocator
+from matplotlib.figure import Figure
 from matplotlib import pyplot
+import matplotlib
+import warnings
+import numpy
 from collections import defaultdict
 from datetime import datetime
 import errno
@@ -33,47 +41,92 @@ def ensure_directory_exists(directory_path):
                 raise
 
 
+def read_time_series_block(file, n_columns):
+    """
+    Bulk load the time series block of a TSV log (everything after the headers) into a 2D array of floats
+    :param file: file object, positioned at the start of the time series block
+    :param n_columns:
+    :return: array with shape (n_rows, n_columns)
+    """
+    start = file.tell()
+
+    try:
+        with warnings.catch_warnings():
+            # an empty block is not an error, the log may have just been started
+            warnings.simplefilter("ignore", UserWarning)
+            table = numpy.loadtxt(file, delimiter="\t", dtype=numpy.float64, ndmin=2)
+
+    except ValueError:
+        # The log may still be written to, so the last line could be incomplete. Fall back to keeping only the rows
+        # that are complete and have the expected number of columns.
+        file.seek(start)
+        rows = [line.split("\t") for line in file if line.endswith("\n")]
+        rows = [row for row in rows if len(row) == n_columns]
+        table = numpy.array(rows, dtype=numpy.float64).reshape(-1, n_columns)
+
+    if table.size == 0:
+        table = numpy.zeros((0, n_columns), dtype=numpy.float64)
+
+    return table
+
+
 def read_tsv(file_path):
     """
-    General method for converting a tsv into a dictionary of lists, assuming each key has an associated time series
+    General method for converting a tsv into a dictionary of time series, assuming each key has an associated time
+    series. The header blocks are parsed line by line, the time series block is loaded in bulk into one contiguous
+    array (one row per metric) and each key maps to a view of its row.
     :param file_path:
     :return:
     """
-    headers = None
-    header_indexes = None
+    with open(file_path, "r") as file:
+        static_headers = file.readline().strip().split("\t")
+        static_values = file.readline().strip().split("\t")
+        headers = file.readline().strip().split("\t")
 
-    # Each data type will have a list
-    data = defaultdict(list)
+        table = read_time_series_block(file, n_columns=len(headers))
+
+    static_header_indexes = {x: i for i, x in enumerate(static_headers)}
     static_data = defaultdict(list)
+    for key, value in zip(static_headers, static_values):
+        if value != "":
+            static_data[key].append(float(value))
 
-    with open(file_path, "r") as file:
-        for l, line in enumerate(file):
-            line = line.strip().split("\t")
-            if l == 0:
-                static_headers = line
-                static_header_indexes = {x: i for i, x in enumerate(line)}
-
-            elif l == 1:
-                for i, item in enumerate(line):
-                    key = static_headers[i]
-                    static_data[key].append(float(item))
-
-            elif l == 2:
-                headers = line
-                header_indexes = {x: i for i, x in enumerate(line)}
-            else:
-                for i, item in enumerate(line):
-                    key = headers[i]
-                    data[key].append(float(item))
+    header_indexes = {x: i for i, x in enumerate(headers)}
+
+    # Column-major copy, so that each time series is contiguous in memory
+    table = numpy.ascontiguousarray(table.T)
+    data = {key: table[i] for i, key in enumerate(headers)}
 
     return headers, header_indexes, data, static_headers, static_header_indexes, static_data
 
 
+def read_log(file_path):
+    """
+    Read a resource log in either the TSV or the binary format
+    :param file_path:
+    :return:
+    """
+    if is_binary_log(file_path):
+        return read_binary_log(file_path)
+    else:
+        return read_tsv(file_path)
+
+
 def get_color(key):
-    if key.startswith("cpu"):
+    # Process tree panels use a darker shade of the same color as their host-wide counterpart
+    if key.startswith("process"):
+        if "cpu" in key:
+            color = (0.804, 0.137, 0.051)
+        elif "rss" in key or "threads" in key or "children" in key:
+            color = (0.804, 0.573, 0.051)
+        else:
+            color = (0.043, 0.412, 0.498)
+    elif key.startswith("cpu") or key.startswith("cgroup"):
         color = (0.945, 0.267, 0.176)
     elif key.startswith("io") or key.startswith("disk"):
         color = (0.122, 0.498, 0.584)
+    elif key.startswith("net"):
+        color = (0.361, 0.235, 0.62)
     elif "memory" in key:
         color = (0.945, 0.71, 0.176)
     else:
@@ -82,11 +135,26 @@ def get_color(key):
     return color
 
 
+def get_nan_max(y, default=0):
+    """
+    Maximum of a series, ignoring NaN (empty values in the log)
+    :param y:
+    :param default: returned if there are no values at all
+    :return:
+    """
+    y = numpy.asarray(y, dtype=numpy.float64)
+
+    if numpy.all(numpy.isnan(y)):
+        return default
+
+    return numpy.nanmax(y)
+
+
 def get_y_max(key, y):
     if key.endswith("percent"):
         y_max = 100
     else:
-        y_max = max(10, max(y))
+        y_max = max(10, get_nan_max(y))
 
     return y_max
 
@@ -99,29 +167,101 @@ def get_y_label(key):
               "io_activity_read_mb": "IO Read (MB)",
               "io_activity_write_mb": "IO Write (MB)",
               "io_activity_read_count": "IO Reads (#)",
-              "io_activity_write_count": "IO Writes (#)"}
-
-    label = labels[key]
+              "io_activity_write_count": "IO Writes (#)",
+              "cpu_user_percent": "CPU User (%)",
+              "cpu_system_percent": "CPU System (%)",
+              "cpu_iowait_percent": "CPU IO Wait (%)",
+              "cpu_steal_percent": "CPU Steal (%)",
+              "cpu_max_core_percent": "Busiest Core (%)",
+              "cpu_cores": "Core",
+              "cgroup_throttled_percent": "CPU Throttled (%)",
+              "process_cpu_percent": "Process CPU (%)",
+              "process_rss_mb": "Process RSS (MB)",
+              "process_read_mb": "Process Read (MB)",
+              "process_write_mb": "Process Write (MB)",
+              "process_threads": "Process Threads (#)",
+              "process_children": "Child Processes (#)"}
+
+    if key in labels:
+        label = labels[key]
+
+    # Per device columns, e.g. disk_nvme0n1_read_mb_s or net_eth0_sent_mb_s
+    elif key.endswith("_mb_s"):
+        label = "MB/s"
+    elif key.endswith("_util_percent"):
+        label = "Utilization (%)"
+    else:
+        label = key
 
     return label
 
 
+def get_title(key):
+    titles = {"cpu_percent": "cpu",
+              "virtual_memory_percent": "virtual memory",
+              "disk_usage_percent": "disk usage",
+              "swap_memory_percent": "swap memory",
+              "io_activity_read_mb": "io activity read",
+              "io_activity_write_mb": "io activity write",
+              "io_activity_read_count": "io activity read count",
+              "io_activity_write_count": "io activity write count",
+              "cpu_user_percent": "cpu user",
+              "cpu_system_percent": "cpu system",
+              "cpu_iowait_percent": "cpu iowait",
+              "cpu_steal_percent": "cpu steal",
+              "cpu_max_core_percent": "cpu max core",
+              "cgroup_throttled_percent": "cgroup throttled",
+              "process_cpu_percent": "process cpu",
+              "process_rss_mb": "process rss",
+              "process_read_mb": "process read",
+              "process_write_mb": "process write",
+              "process_threads": "process threads",
+              "process_children": "process children"}
+
+    if key in titles:
+        title = titles[key]
+
+    # Per device columns, e.g. disk_nvme0n1_read_mb_s or net_eth0_sent_mb_s
+    elif key.endswith("_mb_s"):
+        title = " ".join(key[:-len("_mb_s")].split("_"))
+    elif key.endswith("_util_percent"):
+        title = " ".join(key[:-len("_percent")].split("_"))
+    else:
+        title = " ".join(key.split("_"))
+
+    return title
+
+
 def rescale_time(time):
-    time = [x / 60 for x in time]
+    time = numpy.asarray(time) / 60
 
     return time
 
 
 def get_absolute_y_labels(data, static_data, y_percent, key):
     totals_keys = {"cpu_percent":"cpu_total",
+                   "cpu_user_percent": "cpu_total",
+                   "cpu_system_percent": "cpu_total",
+                   "cpu_iowait_percent": "cpu_total",
+                   "cpu_steal_percent": "cpu_total",
+                   "process_cpu_percent": "cpu_total",
+                   "cpu_max_core_percent": "cpu_total",
                    "virtual_memory_percent": "virtual_memory_total_gb",
                    "disk_usage_percent": "disk_usage_total_gb",
                    "swap_memory_percent": "swap_memory_total_gb"}
 
+    # Percentages of something which doesn't have an absolute size, e.g. disk utilization
+    if key not in totals_keys:
+        return None
+
     total_key = totals_keys[key]
     total_available = static_data[total_key][0]
 
-    max_used = max(y_percent) / 100 * total_available
+    # A single core is at most 1 CPU
+    if key == "cpu_max_core_percent":
+        total_available = 1
+
+    max_used = get_nan_max(y_percent) / 100 * total_available
 
     max_used = int(round(max_used))
     total_available = int(round(total_available))
@@ -129,67 +269,306 @@ def get_absolute_y_labels(data, static_data, y_percent, key):
     return max_used, total_available
 
 
-def plot_resource_data(headers, data, static_data, show=False):
-    time_series_axes = {"cpu_percent": (0, 0),
-                        "virtual_memory_percent": (0, 1),
-                        "disk_usage_percent": (1, 0),
-                        "swap_memory_percent": (1, 1),
-                        "io_activity_read_mb": (2, 0),
-                        "io_activity_write_mb": (2, 1),
-                        "io_activity_read_count": (3, 0),
-                        "io_activity_write_count": (3, 1)}
+def get_time_series_axes(data, n_cols=2, extra_keys=None):
+    """
+    Lay out one panel per time series, row by row. Optional series (e.g. process tree usage) are only given a panel
+    if they exist in the log.
+    :param data:
+    :param n_cols:
+    :param extra_keys: panels that aren't time series from the log (e.g. "cpu_cores"), placed last
+    :return:
+    """
+    keys = ["cpu_percent",
+            "virtual_memory_percent",
+            "disk_usage_percent",
+            "swap_memory_percent",
+            "io_activity_read_mb",
+            "io_activity_write_mb",
+            "io_activity_read_count",
+            "io_activity_write_count"]
+
+    optional_keys = ["cpu_user_percent",
+                     "cpu_system_percent",
+                     "cpu_iowait_percent",
+                     "cpu_steal_percent",
+                     "cpu_max_core_percent",
+                     "cgroup_throttled_percent",
+                     "process_cpu_percent",
+                     "process_rss_mb",
+                     "process_read_mb",
+                     "process_write_mb",
+                     "process_threads",
+                     "process_children"]
+
+    keys += [key for key in optional_keys if key in data]
+
+    # Per disk and per network interface columns, in the order they were logged
+    keys += [key for key in data if key.startswith("net_") or (key.startswith("disk_") and key not in keys)]
+
+    if extra_keys is not None:
+        keys += extra_keys
+
+    time_series_axes = {key: (i // n_cols, i % n_cols) for i, key in enumerate(keys)}
+
+    return time_series_axes
+
+
+def create_figure_template(n_rows, n_cols, max_ticks=None, use_pyplot=True):
+    """
+    Build a figure with one panel per grid cell, each with a (hidden) twin y axis for absolute values, and all of the
+    styling that doesn't depend on the data
+    :param n_rows:
+    :param n_cols:
+    :param max_ticks: limit the number of ticks per axis (fewer ticks render faster)
+    :param use_pyplot: whether pyplot should manage the figure. Figures drawn outside of the main thread shouldn't be.
+    :return: figure, axes, twin_axes
+    """
+    if use_pyplot:
+        figure, axes = pyplot.subplots(nrows=n_rows, ncols=n_cols, squeeze=False)
+    else:
+        figure = Figure()
+        axes = figure.subplots(nrows=n_rows, ncols=n_cols, squeeze=False)
 
-    n_rows = 4
-    n_cols = 2
-    figure, axes = pyplot.subplots(nrows=n_rows, ncols=n_cols)
+    twin_axes = [[None] * n_cols for a in range(n_rows)]
 
-    x = data["time_elapsed_s"]
-    x = rescale_time(x)
-    zeros = [0 for i in range(len(x))]
+    for a in range(n_rows):
+        for b in range(n_cols):
+            twin_axes[a][b] = axes[a][b].twinx()
+            twin_axes[a][b].tick_params(axis='y', left=False, top=False, right=True, bottom=False,
+                                        labelleft=False, labeltop=False, labelright=True, labelbottom=False)
 
-    for key in time_series_axes:
-        a, b = time_series_axes[key]
-        y = data[key]
+            if max_ticks is not None:
+                axes[a][b].xaxis.set_major_locator(MaxNLocator(max_ticks))
+                axes[a][b].yaxis.set_major_locator(MaxNLocator(max_ticks))
+
+    figure.set_size_inches(8, 4 * n_rows)
+    figure.subplots_adjust(hspace=0.5, wspace=0.7)
 
-        color = get_color(key)
-        line_width = 0.5
+    return figure, axes, twin_axes
+
+
+def get_figure_template(n_rows, n_cols, max_ticks=None):
+    """
+    Same as create_figure_template, but the figure is built once per layout and reused: only the data artists are
+    removed between uses
+    """
+    key = (n_rows, n_cols, max_ticks)
 
-        y_max = get_y_max(y=y, key=key)
+    if key not in figure_templates or not pyplot.fignum_exists(figure_templates[key][0].number):
+        figure_templates[key] = create_figure_template(n_rows, n_cols, max_ticks=max_ticks)
+
+    figure, axes, twin_axes = figure_templates[key]
+
+    for a in range(n_rows):
+        for b in range(n_cols):
+            for artist in list(axes[a][b].lines) + list(axes[a][b].collections) + list(axes[a][b].images):
+                artist.remove()
+
+            # Removing artists doesn't shrink the data limits, which would keep the time range of the previous plot
+            axes[a][b].relim()
+            axes[a][b].autoscale(True)
+
+            axes[a][b].set_visible(True)
+
+    return figure, axes, twin_axes
+
+
+# Figures that have been built by get_figure_template, by layout
+figure_templates = dict()
+
+
+def draw_panel(axis, twin_axis, key, x, y, static_data, max_points=None, downsample_method="minmax", fast=False,
+               artists=None, envelope=None):
+    """
+    Draw one time series on its panel, or update a panel that was already drawn
+    :param axis:
+    :param twin_axis: right hand axis, used to label percentages with absolute values
+    :param key:
+    :param x: time (min)
+    :param y:
+    :param static_data:
+    :param max_points: see plot_resource_data
+    :param downsample_method:
+    :param fast: rasterize the fill area
+    :param artists: artists returned by a previous call, to be updated in place
+    :param envelope: optional (min, max) of each interval, drawn as a band around the line
+    :return: dict of artists
+    """
+    color = get_color(key)
+    line_width = 0.5
+
+    # Peaks between samples count as usage too
+    y_peak = y if envelope is None else envelope[1]
+
+    y_max = get_y_max(y=y_peak, key=key)
+    x_plot, y_plot = downsample(x, y, n_out=max_points, method=downsample_method)
+
+    if envelope is not None:
+        x_envelope, y_envelope_min, y_envelope_max = envelope_downsample(x, envelope[0], envelope[1],
+                                                                         n_out=max_points)
+
+    if artists is None:
+        artists = dict()
 
         if key.endswith("percent"):
-            axes[a][b].plot([x[0], x[-1]], [y_max, y_max], linestyle="--", color=color, linewidth=line_width)
+            artists["limit"], = axis.plot([x[0], x[-1]], [y_max, y_max], linestyle="--", color=color,
+                                          linewidth=line_width)
 
-            max_used, total_available = get_absolute_y_labels(data=data,
-                                                              static_data=static_data,
-                                                              y_percent=y,
-                                                              key=key)
+        artists["line"], = axis.plot(x_plot, y_plot, color=color, linewidth=line_width)
+        artists["fill"] = axis.fill_between(x_plot, y1=0, y2=y_plot, color=color, alpha=0.3, rasterized=fast)
 
-            max_used = str(max_used)
-            total_available = str(total_available)
+        if envelope is not None:
+            artists["envelope"] = axis.fill_between(x_envelope, y1=y_envelope_min, y2=y_envelope_max, color=color,
+                                                    alpha=0.25, linewidth=0, rasterized=fast)
 
-            if not key.startswith("cpu"):
-                max_used += " GB"
-                total_available += " GB"
+        axis.set_ylabel(get_y_label(key))
+        axis.set_title(get_title(key))
 
-            twin_axes = axes[a][b].twinx()
-            twin_axes.tick_params(axis='y', left=False, top=False, right=True, bottom=False,
-                                  labelleft=False, labeltop=False, labelright=True, labelbottom=False)
-            twin_axes.set_yticks([max(y), y_max])
+    else:
+        if "limit" in artists:
+            artists["limit"].set_data([x[0], x[-1]], [y_max, y_max])
 
-            twin_axes.set_yticklabels([max_used, total_available])
-            twin_axes.set_ylim(0, y_max * 1.1)
+        artists["line"].set_data(x_plot, y_plot)
 
-        axes[a][b].set_ylim(0, y_max * 1.1)
-        axes[a][b].set_ylabel(get_y_label(key))
-        axes[a][b].set_title(" ".join(key.split("_")[:-1]))
-        axes[a][b].plot(x, data[key], color=color, linewidth=line_width)
-        axes[a][b].fill_between(x, y1=zeros, y2=y, color=color, alpha=0.3)
+        # Fill areas can only be updated in place with newer versions of matplotlib
+        if hasattr(artists["fill"], "set_data"):
+            artists["fill"].set_data(x_plot, 0, y_plot)
+        else:
+            artists["fill"].remove()
+            artists["fill"] = axis.fill_between(x_plot, y1=0, y2=y_plot, color=color, alpha=0.3, rasterized=fast)
 
-        if a == n_rows - 1:
+        if "envelope" in artists:
+            artists["envelope"].remove()
+            artists["envelope"] = axis.fill_between(x_envelope, y1=y_envelope_min, y2=y_envelope_max, color=color,
+                                                    alpha=0.25, linewidth=0, rasterized=fast)
+
+        axis.relim()
+        axis.autoscale_view(scaley=False)
+
+    absolute_y_labels = None
+    if key.endswith("percent"):
+        absolute_y_labels = get_absolute_y_labels(data=None, static_data=static_data, y_percent=y_peak, key=key)
+
+    twin_axis.set_visible(absolute_y_labels is not None)
+
+    if absolute_y_labels is not None:
+        max_used, total_available = absolute_y_labels
+
+        max_used = str(max_used)
+        total_available = str(total_available)
+
+        if not key.startswith("cpu"):
+            max_used += " GB"
+            total_available += " GB"
+
+        twin_axis.set_yticks([get_nan_max(y_peak), y_max])
+
+        twin_axis.set_yticklabels([max_used, total_available])
+        twin_axis.set_ylim(0, y_max * 1.1)
+
+    axis.set_ylim(0, y_max * 1.1)
+
+    return artists
+
+
+def get_envelope(data, key):
+    """
+    :return: (min, max) of each interval if they were logged for this column (see ResourceMonitor sample_interval),
+    otherwise None
+    """
+    if key + "_min" in data and key + "_max" in data:
+        return data[key + "_min"], data[key + "_max"]
+
+    return None
+
+
+def draw_core_panel(axis, twin_axis, x, core_percent, max_points=None):
+    """
+    Draw per-core CPU utilization as a heatmap (one row per core), which shows how many cores were actually busy
+    :param axis:
+    :param twin_axis:
+    :param x: time (min)
+    :param core_percent: (n_samples x n_cores)
+    :param max_points: max number of time buckets
+    :return:
+    """
+    x_plot, core_plot = bucket_mean_downsample(x, core_percent, n_out=max_points)
+    n_cores = core_plot.shape[1]
+
+    x_end = x[-1] if len(x) > 1 else x[0] + 1
+
+    image = axis.imshow(core_plot.T, aspect="auto", origin="lower", interpolation="nearest", cmap="inferno",
+                        vmin=0, vmax=100, extent=(x_plot[0], x_end, 0, n_cores))
+
+    axis.set_ylim(0, n_cores)
+    axis.set_ylabel(get_y_label("cpu_cores"))
+    axis.set_title("cpu per core (0-100%)")
+
+    twin_axis.set_visible(False)
+
+    return image
+
+
+def plot_resource_data(headers, data, static_data, show=False, max_points=None, downsample_method="minmax",
+                       fast=False, core_data=None):
+    """
+    :param headers:
+    :param data:
+    :param static_data:
+    :param show:
+    :param max_points: reduce each series to at most this many points before plotting (None to plot every sample).
+    Axis limits and labels are always computed from the full resolution data.
+    :param downsample_method: "minmax" (keeps every peak) or "lttb"
+    :param fast: reuse a cached figure template, with fewer ticks and rasterized fill areas
+    :param core_data: optional per-core utilization (time_elapsed_s, core_percent), see binary_log.read_core_log
+    :return:
+    """
+    n_cols = 2
+    time_series_axes = get_time_series_axes(data, n_cols=n_cols,
+                                            extra_keys=["cpu_cores"] if core_data is not None else None)
+
+    n_rows = (len(time_series_axes) + n_cols - 1) // n_cols
+
+    if fast:
+        figure, axes, twin_axes = get_figure_template(n_rows, n_cols, max_ticks=4)
+    else:
+        figure, axes, twin_axes = create_figure_template(n_rows, n_cols)
+
+    x = data["time_elapsed_s"]
+    x = rescale_time(x)
+
+    for key in time_series_axes:
+        a, b = time_series_axes[key]
+
+        if key == "cpu_cores":
+            draw_core_panel(axis=axes[a][b],
+                            twin_axis=twin_axes[a][b],
+                            x=rescale_time(core_data[0]),
+                            core_percent=core_data[1],
+                            max_points=max_points)
+        else:
+            draw_panel(axis=axes[a][b],
+                       twin_axis=twin_axes[a][b],
+                       key=key,
+                       x=x,
+                       y=data[key],
+                       static_data=static_data,
+                       max_points=max_points,
+                       downsample_method=downsample_method,
+                       fast=fast,
+                       envelope=get_envelope(data, key))
+
+        if a == n_rows - 1 or (a == n_rows - 2 and (a + 1, b) not in time_series_axes.values()):
             axes[a][b].set_xlabel("Time (min)")
+        else:
+            axes[a][b].set_xlabel("")
 
-    figure.set_size_inches(8, 16)
-    pyplot.subplots_adjust(hspace=0.5, wspace=0.7)
+    # Hide unused panels when there is an odd number of time series
+    for a in range(n_rows):
+        for b in range(n_cols):
+            if (a, b) not in time_series_axes.values():
+                axes[a][b].set_visible(False)
+                twin_axes[a][b].set_visible(False)
 
     if show:
         pyplot.show()
@@ -198,20 +577,99 @@ def plot_resource_data(headers, data, static_data, show=False):
     return figure, axes
 
 
-def plot_resources_main(file_path, output_dir, show=False):
-    headers, header_indexes, data, static_headers, static_header_indexes, static_data = read_tsv(file_path)
+def get_plot_path(file_path, output_dir):
+    """
+    Where the plot of a log is saved: same name as the log, with a .png extension
+    """
+    output_filename_prefix = os.path.basename(file_path).split(".")[0]
+
+    return os.path.join(output_dir, output_filename_prefix + ".png")
+
+
+def get_last_minutes(data, headers, last_minutes):
+    """
+    :return: data, keeping only the rows of the last `last_minutes` minutes
+    """
+    time = numpy.asarray(data["time_elapsed_s"])
+    mask = time >= time.max() - last_minutes * 60
+
+    return {key: numpy.asarray(data[key])[mask] for key in headers}
+
+
+def plot_resources_main(file_path, output_dir, show=False, dpi=None, full_resolution=False, downsample_method="minmax",
+                        fast=False, last_minutes=None):
+    """
+    Plot a resource log and save it as a PNG in output_dir
+    :param file_path: TSV or binary log
+    :param output_dir:
+    :param show:
+    :param dpi: defaults to 300, or 80 in fast mode
+    :param full_resolution: plot every sample, instead of only as many points as fit in the output image
+    :param downsample_method: "minmax" or "lttb"
+    :param fast: render quickly for email attachments: non-interactive Agg backend, low DPI and a reused figure
+    :param last_minutes: only plot the end of the log
+    :return: path of the PNG
+    """
+    if dpi is None:
+        dpi = 80 if fast else 300
+
+    if fast and not show and matplotlib.get_backend().lower() != "agg":
+        pyplot.switch_backend("Agg")
+
+    max_points = None
+    if not full_resolution:
+        max_points = get_point_budget(width_inches=8, dpi=dpi, n_cols=2,
+                                      points_per_pixel=2 if downsample_method == "minmax" else 1)
+
+    # If the log has rollups (see RollupArchive.py), read the coarsest one which still has enough points
+    tier_path = None
+    if max_points is not None:
+        tier_path = find_tier(file_path, max_points, range_s=None if last_minutes is None else last_minutes * 60)
+
+    if tier_path is not None:
+        print("Plotting rollup: {}".format(tier_path))
+        headers, header_indexes, data, static_headers, static_header_indexes, static_data = read_tier(tier_path)
+    else:
+        headers, header_indexes, data, static_headers, static_header_indexes, static_data = read_log(file_path)
+
     output_path = None
 
-    if len(data) == 0:
+    if len(data) == 0 or len(data[headers[0]]) == 0:
         print("No data recorded in {}".format(file_path))
     else:
-        output_filename_prefix = os.path.basename(file_path).split(".")[0]
-        output_filename = output_filename_prefix + ".png"
-        output_path = os.path.join(output_dir, output_filename)
+        output_path = get_plot_path(file_path, output_dir)
+
+        if last_minutes is not None:
+            data = get_last_minutes(data, headers, last_minutes)
+
+        # Per-core CPU usage is stored next to the log, if it was recorded
+        core_data = None
+        core_log_path = get_core_log_path(file_path)
+        if os.path.exists(core_log_path):
+            core_data = read_core_log(core_log_path)
+
+            if last_minutes is not None and len(core_data[0]) > 0:
+                mask = core_data[0] >= core_data[0].max() - last_minutes * 60
+                core_data = (core_data[0][mask], core_data[1][mask])
+
+            if len(core_data[0]) == 0:
+                core_data = None
+
+        figure, axes = plot_resource_data(headers=headers,
+                                          data=data,
+                                          static_data=static_data,
+                                          show=show,
+                                          max_points=max_points,
+                                          downsample_method=downsample_method,
+                                          fast=fast,
+                                          core_data=core_data)
 
-        figure, axes = plot_resource_data(headers=headers, data=data, static_data=static_data, show=show)
         print("Saving figure as: %s" % output_path)
-        figure.savefig(output_path, dpi=300)
+        figure.savefig(output_path, dpi=dpi)
+
+        # The fast mode figure is a template that is kept for the next plot
+        if not fast:
+            pyplot.close(figure)
 
     return output_path
 
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""Testing AlertEngine """
+
+import unittest
+import re
+from taskManager.AlertEngine import AlertEngine, ThresholdRule, RollingMeanRule, RateRule, parse_rule
+
+
+class RecordingNotifier:
+    def __init__(self):
+        self.messages = list()
+
+    def send_message(self, subject, body, subject_prefix=True, attachment=None):
+        self.messages.append((subject, body))
+
+
+class AlertEngineTests(unittest.TestCase):
+    """Test rule parsing and evaluation"""
+
+    def test_parse_rule(self):
+        rule = parse_rule("cpu_percent<5", interval=5, default_window=60)
+        self.assertIsInstance(rule, ThresholdRule)
+        self.assertEqual((rule.key, rule.operator_string, rule.threshold, rule.duration), ("cpu_percent", "<", 5, 0))
+
+        rule = parse_rule("mean(virtual_memory_percent, 30)>=90 for 120", interval=5, default_window=60)
+        self.assertIsInstance(rule, RollingMeanRule)
+        self.assertEqual((rule.key, rule.window_size, rule.duration), ("virtual_memory_percent", 6, 120))
+
+        rule = parse_rule("rate(disk_usage_percent)>0.5", interval=5, default_window=60)
+        self.assertIsInstance(rule, RateRule)
+        self.assertEqual(rule.window_size, 12)
+
+        with self.assertRaises(ValueError):
+            parse_rule("cpu_percent=5", interval=5, default_window=60)
+
+        rule = parse_rule("rate(disk_usage_percent, .5e2)>1e-3 for 10s", interval=5, default_window=60)
+        self.assertEqual((rule.window_size, rule.threshold, rule.duration), (10, 0.001, 10))
+
+        # Malformed numbers, and windows too short to hold a sample, are reported with the rule
+        for spec in ["cpu_percent>1.2.3", "mean(cpu_percent,.)>5", "cpu_percent>90 for 1..", "mean(cpu_percent,2)>5"]:
+            with self.assertRaisesRegex(ValueError, re.escape(spec)):
+                parse_rule(spec, interval=5, default_window=60)
+
+    def test_sustained_threshold(self):
+        rule = parse_rule("cpu_percent>90 for 10", interval=5, default_window=60)
+        fired = [rule.update(t, v) is not None for t, v in [(0, 95), (5, 95), (10, 95), (15, 50), (20, 95)]]
+        self.assertEqual(fired, [False, False, True, False, False])
+
+    def test_rolling_mean_and_rate(self):
+        rule = parse_rule("mean(cpu_percent,15)>50", interval=5, default_window=60)
+        values = [rule.get_value(t, v) for t, v in [(0, 0), (5, 60), (10, 90), (15, 120)]]
+        self.assertEqual(values, [None, None, 50, 90])
+
+        rule = parse_rule("rate(disk_usage_percent,10)>0.5", interval=5, default_window=60)
+        values = [rule.get_value(t, v) for t, v in [(0, 10), (5, 10), (10, 20), (15, 40)]]
+        self.assertEqual(values, [None, None, 1, 3])
+
+    def test_cooldown(self):
+        notifier = RecordingNotifier()
+        engine = AlertEngine([parse_rule("cpu_percent<5", interval=1, default_window=60)], notifier=notifier,
+                             cooldown=10)
+
+        fired = [len(engine.update({"time_elapsed_s": t, "cpu_percent": 0})) for t in range(25)]
+        engine.stop()
+
+        self.assertEqual(sum(fired), 3)
+        self.assertEqual(len(notifier.messages), 3)
+        self.assertIn("cpu_percent<5", notifier.messages[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Testing the binary resource log format """
+
+import unittest
+import os
+from taskManager import binary_log
+from taskManager.plotting import read_tsv, read_log
+import numpy as np
+import tempfile
+
+
+class BinaryLogTests(unittest.TestCase):
+    """Test binary log conversion and reading"""
+
+    def write_tsv(self, path, n_rows):
+        with open(path, "w") as file:
+            file.write("cpu_total\tvirtual_memory_total_gb\n")
+            file.write("4.000\t15.500\n")
+            file.write("time_elapsed_s\tcpu_percent\tio_activity_read_count\n")
+            for i in range(n_rows):
+                file.write("%.3f\t%.3f\t%.3f\n" % (i * 5, i % 100, i * 2))
+
+    def test_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tsv_path = os.path.join(tempdir, "log.txt")
+            binary_path = os.path.join(tempdir, "log.bin")
+            tsv_copy_path = os.path.join(tempdir, "log_copy.txt")
+
+            self.write_tsv(tsv_path, n_rows=50)
+            binary_log.tsv_to_binary(tsv_path, binary_path)
+
+            self.assertTrue(binary_log.is_binary_log(binary_path))
+            self.assertFalse(binary_log.is_binary_log(tsv_path))
+
+            headers, header_indexes, data, static_headers, _, static_data = read_log(binary_path)
+            self.assertEqual(headers, ["time_elapsed_s", "cpu_percent", "io_activity_read_count"])
+            self.assertEqual(static_headers, ["cpu_total", "virtual_memory_total_gb"])
+            self.assertEqual(static_data["virtual_memory_total_gb"], [15.5])
+            self.assertEqual(data["io_activity_read_count"].dtype, np.dtype("<u8"))
+            self.assertEqual(len(data["cpu_percent"]), 50)
+            self.assertEqual(float(data["cpu_percent"][42]), 42.0)
+
+            binary_log.binary_to_tsv(binary_path, tsv_copy_path)
+            with open(tsv_path) as a, open(tsv_copy_path) as b:
+                self.assertEqual(a.read(), b.read())
+
+    def test_partial_record_ignored(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            tsv_path = os.path.join(tempdir, "log.txt")
+            binary_path = os.path.join(tempdir, "log.bin")
+
+            self.write_tsv(tsv_path, n_rows=3)
+            binary_log.tsv_to_binary(tsv_path, binary_path)
+
+            with open(binary_path, "ab") as file:
+                file.write(b"\0" * 5)
+
+            headers, _, data, _, _, _ = binary_log.read_binary_log(binary_path)
+            self.assertEqual(len(data["time_elapsed_s"]), 3)
+
+            _, _, tsv_data, _, _, _ = read_tsv(tsv_path)
+            self.assertEqual(list(data["time_elapsed_s"]), list(tsv_data["time_elapsed_s"]))
+
+    def test_empty_values_and_long_names(self):
+        long_name = "nic_enp0s31f6_bytes_received_per_second_mb"
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            tsv_path = os.path.join(tempdir, "log.txt")
+            binary_path = os.path.join(tempdir, "log.bin")
+
+            with open(tsv_path, "w") as file:
+                file.write("cpu_total\tswap_memory_total_gb\n")
+                file.write("4.000\t\n")
+                file.write("time_elapsed_s\t%s\n" % long_name)
+                file.write("5.000\t\n")
+                file.write("10.000\t2.500\n")
+
+            binary_log.tsv_to_binary(tsv_path, binary_path)
+
+            headers, _, data, static_headers, _, static_data = binary_log.read_binary_log(binary_path)
+            self.assertEqual(headers, ["time_elapsed_s", long_name])
+            self.assertEqual(static_data["cpu_total"], [4.0])
+            self.assertTrue(np.isnan(static_data["swap_memory_total_gb"][0]))
+            self.assertTrue(np.isnan(data[long_name][0]))
+            self.assertEqual(float(data[long_name][1]), 2.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
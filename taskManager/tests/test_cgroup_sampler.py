@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""Testing CgroupSampler """
+
+import unittest
+import tempfile
+import shutil
+import os
+from taskManager.CgroupSampler import CgroupSampler, find_cgroup_path
+
+
+def write(path, text):
+    with open(path, "w") as file:
+        file.write(text)
+
+
+class CgroupSamplerTests(unittest.TestCase):
+    """Test reading usage and limits from a fake cgroup v2 directory"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, "docker", "abc")
+        os.makedirs(self.path)
+
+        write(os.path.join(self.path, "cpu.max"), "200000 100000\n")
+        write(os.path.join(self.path, "memory.max"), "%d\n" % (4 * 1024 ** 3))
+        write(os.path.join(self.path, "memory.current"), "%d\n" % (2 * 1024 ** 3))
+        write(os.path.join(self.path, "memory.stat"), "anon 1000\ninactive_file %d\n" % (1024 ** 3))
+        write(os.path.join(self.path, "cpu.stat"), "usage_usec 0\nnr_periods 0\nnr_throttled 0\n")
+        write(os.path.join(self.path, "io.stat"), "8:0 rbytes=1048576 wbytes=0 rios=4 wios=0 dbytes=0 dios=0\n"
+                                                 "8:16 rbytes=1048576 wbytes=2097152 rios=1 wios=2 dbytes=0 dios=0\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_find_path(self):
+        proc_cgroup_path = os.path.join(self.root, "cgroup")
+        write(proc_cgroup_path, "0::/docker/abc\n")
+        self.assertEqual(find_cgroup_path(self.root, proc_cgroup_path), self.path)
+
+        # cgroup v1 only
+        write(proc_cgroup_path, "4:memory:/docker/abc\n")
+        self.assertIsNone(find_cgroup_path(self.root, proc_cgroup_path))
+
+    def test_limits(self):
+        sampler = CgroupSampler(self.path)
+
+        self.assertEqual(sampler.cpu_total, 2)
+        self.assertEqual(sampler.get_static_data()["virtual_memory_total_gb"], 4)
+
+    def test_usage(self):
+        sampler = CgroupSampler(self.path)
+        write(os.path.join(self.path, "cpu.stat"), "usage_usec 10\nnr_periods 10\nnr_throttled 5\n")
+
+        data = sampler.get_data()
+
+        self.assertEqual(set(sampler.headers) | set(sampler.replaces), set(data.keys()))
+        self.assertAlmostEqual(data["virtual_memory_percent"], 25)
+        self.assertAlmostEqual(data["cgroup_throttled_percent"], 50)
+        self.assertAlmostEqual(data["io_activity_read_mb"], 2)
+        self.assertAlmostEqual(data["io_activity_write_mb"], 2)
+        self.assertEqual(data["io_activity_read_count"], 5)
+        self.assertTrue(0 <= data["cpu_percent"] <= 100)
+
+    def test_peaks_between_rows(self):
+        sampler = CgroupSampler(self.path)
+
+        write(os.path.join(self.path, "cpu.stat"), "usage_usec 10\nnr_periods 10\nnr_throttled 5\n")
+        peak_data = sampler.get_peak_data()
+        self.assertEqual(set(peak_data.keys()), {"cpu_percent", "virtual_memory_percent"})
+        self.assertAlmostEqual(peak_data["virtual_memory_percent"], 25)
+        self.assertEqual(sampler.previous_usage_usec, 10)
+
+        # Throttling is still measured since the previous row, not since the previous peak sample
+        write(os.path.join(self.path, "cpu.stat"), "usage_usec 20\nnr_periods 20\nnr_throttled 5\n")
+        data = sampler.get_data()
+        self.assertAlmostEqual(data["cgroup_throttled_percent"], 25)
+        self.assertEqual(sampler.previous_usage_usec, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""Testing CpuSampler and the per-core CPU log """
+
+import unittest
+import os
+from taskManager.CpuSampler import CpuSampler
+from taskManager import binary_log
+import numpy as np
+import tempfile
+
+
+class CpuSamplerTests(unittest.TestCase):
+    """Test the CPU breakdown and per-core storage"""
+
+    def test_get_data(self):
+        sampler = CpuSampler()
+        sum(i * i for i in range(200000))
+        data = sampler.get_data()
+
+        self.assertEqual(set(data.keys()), set(CpuSampler.headers))
+        self.assertTrue(all(0 <= value <= 100 for value in data.values()))
+        self.assertTrue(np.all((sampler.core_percent >= 0) & (sampler.core_percent <= 100)))
+        self.assertEqual(data["cpu_max_core_percent"], sampler.core_percent.max())
+
+    def test_core_log_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = binary_log.get_core_log_path(os.path.join(tempdir, "log.txt"))
+            self.assertTrue(path.endswith("log.cores"))
+
+            with open(path, "wb") as file:
+                file.write(binary_log.pack_core_header(3))
+                file.write(binary_log.pack_core_record(0.5, np.array([0.0, 49.6, 120.0])))
+                file.write(binary_log.pack_core_record(1.5, np.array([100.0, 1.2, -3.0])))
+
+                # A core went offline, then two came online: records keep the size of the header
+                file.write(binary_log.pack_core_record(2.5, np.array([10.0, 20.0]), n_cores=3))
+                file.write(binary_log.pack_core_record(3.5, np.array([10.0, 20.0, 30.0, 40.0]), n_cores=3))
+                file.write(b"\0\0")
+
+            times, cores = binary_log.read_core_log(path)
+
+            self.assertEqual(list(times), [0.5, 1.5, 2.5, 3.5])
+            self.assertEqual(cores.tolist(), [[0, 50, 100], [100, 1, 0], [10, 20, 0], [10, 20, 30]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+"""Testing DiskSampler and NetworkSampler """
+
+import unittest
+from taskManager.DeviceSampler import DiskSampler, NetworkSampler, get_column_name
+
+
+class DeviceSamplerTests(unittest.TestCase):
+    """Test per device columns"""
+
+    def test_column_names(self):
+        self.assertEqual(get_column_name("disk", "dm-0", "util_percent"), "disk_dm_0_util_percent")
+
+    def test_headers_match_data(self):
+        for sampler in [DiskSampler(), NetworkSampler()]:
+            data = sampler.get_data()
+
+            self.assertEqual(set(data.keys()), set(sampler.headers))
+            self.assertTrue(all(value >= 0 for value in data.values()))
+
+    def test_missing_device(self):
+        sampler = DiskSampler(devices=["not_a_disk"])
+        self.assertEqual(sampler.headers, ())
+        self.assertEqual(sampler.get_data(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
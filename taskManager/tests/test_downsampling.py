@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""Testing downsampling """
+
+import unittest
+from taskManager.downsampling import min_max_downsample, lttb_downsample, downsample, get_point_budget
+from taskManager.downsampling import envelope_downsample
+import numpy
+
+
+class DownsamplingTests(unittest.TestCase):
+    """Test downsampling"""
+
+    def setUp(self):
+        self.x = numpy.arange(100000, dtype=numpy.float64)
+        self.y = numpy.sin(self.x / 1000) * 10 + 50
+        # one sample spikes, e.g. a short memory spike
+        self.y[54321] = 99.0
+        self.y[12345] = 1.0
+
+    def test_min_max_keeps_peaks(self):
+        x, y = min_max_downsample(self.x, self.y, n_out=1000)
+        self.assertLessEqual(len(y), 1000)
+        self.assertEqual(y.max(), 99.0)
+        self.assertEqual(y.min(), 1.0)
+        self.assertTrue(numpy.all(numpy.diff(x) >= 0))
+
+    def test_min_max_nan(self):
+        # A column that was empty for a while, e.g. a device that only appeared later
+        self.y[:20000] = numpy.nan
+        x, y = min_max_downsample(self.x, self.y, n_out=1000)
+        self.assertLessEqual(len(y), 1000)
+        self.assertFalse(numpy.any(numpy.isnan(y)))
+        self.assertGreaterEqual(x[0], 20000)
+        self.assertEqual(y.max(), 99.0)
+
+        y_nan = numpy.full(len(self.x), numpy.nan)
+        x, y = min_max_downsample(self.x, y_nan, n_out=1000)
+        self.assertEqual(len(y), 0)
+
+    def test_lttb(self):
+        x, y = lttb_downsample(self.x, self.y, n_out=500)
+        self.assertEqual(len(y), 500)
+        self.assertEqual(x[0], self.x[0])
+        self.assertEqual(x[-1], self.x[-1])
+        self.assertIn(99.0, y)
+        self.assertTrue(numpy.all(numpy.diff(x) > 0))
+
+    def test_short_series_unchanged(self):
+        x, y = downsample(self.x[:10], self.y[:10], n_out=100)
+        self.assertEqual(len(y), 10)
+
+        x, y = downsample(self.x, self.y, n_out=None)
+        self.assertEqual(len(y), len(self.y))
+
+    def test_envelope_keeps_peaks(self):
+        x, y_min, y_max = envelope_downsample(self.x, self.y - 1, self.y + 1, n_out=1000)
+        self.assertLessEqual(len(x), 1000)
+        self.assertEqual(len(y_min), len(x))
+        self.assertEqual(y_max.max(), 100.0)
+        self.assertEqual(y_min.min(), 0.0)
+
+    def test_point_budget(self):
+        self.assertEqual(get_point_budget(width_inches=8, dpi=300, n_cols=2), 2400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Testing IntervalScheduler """
+
+import unittest
+import threading
+from taskManager.IntervalScheduler import IntervalScheduler
+
+
+class FakeClock:
+    """
+    Time only moves when told to, or while waiting on the stop event
+    """
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeEvent:
+    def __init__(self, clock):
+        self.clock = clock
+        self.waits = list()
+        self.stopped = False
+
+    def wait(self, timeout):
+        self.waits.append(timeout)
+        self.clock.advance(timeout)
+        return self.stopped
+
+    def is_set(self):
+        return self.stopped
+
+
+class IntervalSchedulerTests(unittest.TestCase):
+    """Test the deadline grid with a fake clock"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.event = FakeEvent(self.clock)
+        self.scheduler = IntervalScheduler(1.0, self.event, clock=self.clock)
+
+    def test_invalid_interval(self):
+        for interval in [0, -1, None]:
+            with self.assertRaises(ValueError):
+                IntervalScheduler(interval, threading.Event())
+
+    def test_no_drift(self):
+        # Work takes a varying part of each interval, the deadlines stay on the grid
+        for work in [0.3, 0.9, 0.0, 0.5, 0.95]:
+            self.assertTrue(self.scheduler.wait())
+            self.clock.advance(work)
+
+        self.assertTrue(self.scheduler.wait())
+        self.assertEqual(self.clock.now, 106.0)
+        self.assertEqual(self.scheduler.ticks, 6)
+        self.assertEqual(self.scheduler.late_ticks, 0)
+        self.assertEqual(self.scheduler.missed_ticks, 0)
+
+    def test_skip_missed_ticks(self):
+        self.assertTrue(self.scheduler.wait())
+
+        # The work took 3.5 intervals: the tick is late, 2 more deadlines have passed and are skipped
+        self.clock.advance(3.5)
+        self.assertTrue(self.scheduler.wait())
+        self.assertEqual(self.event.waits[-1], 1.0)
+        self.assertEqual(self.scheduler.late_ticks, 1)
+        self.assertEqual(self.scheduler.missed_ticks, 2)
+        self.assertAlmostEqual(self.scheduler.max_lateness, 2.5)
+
+        # Back on the grid, without a burst of ticks to catch up
+        self.assertTrue(self.scheduler.wait())
+        self.assertEqual(self.event.waits[-1], 0.5)
+        self.assertEqual(self.clock.now, 105.0)
+        self.assertEqual(self.scheduler.ticks, 3)
+
+    def test_stop(self):
+        self.assertTrue(self.scheduler.wait())
+        self.event.stopped = True
+        self.assertFalse(self.scheduler.wait())
+
+        # Already past the deadline
+        self.clock.advance(5)
+        self.assertFalse(self.scheduler.wait())
+
+
+if __name__ == '__main__':
+    unittest.main()
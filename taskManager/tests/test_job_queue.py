@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""Testing JobQueue """
+
+import unittest
+import tempfile
+import os
+from collections import deque
+from taskManager.JobQueue import JobQueue, read_command_file
+
+
+class FakeMonitor:
+    def __init__(self, samples):
+        self.history = deque(samples)
+        self.tracked = set()
+
+    def track_process(self, pid):
+        self.tracked.add(pid)
+
+    def untrack_process(self, pid):
+        self.tracked.discard(pid)
+
+
+class JobQueueTests(unittest.TestCase):
+    """Test exit codes, concurrency, admission and the digest"""
+
+    def test_read_command_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "commands.txt")
+            with open(path, "w") as file:
+                file.write("# comment\n\necho 'a b'\n  sleep 1\n")
+
+            self.assertEqual(read_command_file(path), [["echo", "a b"], ["sleep", "1"]])
+
+    def test_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            commands = [["sh", "-c", "sleep 0.3"], ["sh", "-c", "exit 3"], ["sh", "-c", "echo hello"]]
+            queue = JobQueue(commands, n_workers=3, poll_interval=0.05, log_dir=directory)
+            queue.run()
+
+            self.assertEqual([job.exit_code for job in queue.jobs], [0, 3, 0])
+            self.assertEqual(len(queue.get_failed_jobs()), 1)
+
+            # All three ran at once
+            self.assertLess(queue.end_time - queue.start_time, 0.9)
+
+            with open(os.path.join(directory, "job_2.stdout"), "r") as file:
+                self.assertEqual(file.read(), "hello\n")
+
+        digest = queue.get_digest()
+        self.assertTrue(digest.startswith("3 of 3 jobs finished, 1 failed"))
+        self.assertIn("3\t", digest)
+
+    def test_admission(self):
+        monitor = FakeMonitor([{"time_elapsed_s": 1, "cpu_percent": 50, "virtual_memory_percent": 95}])
+        queue = JobQueue([["sleep", "0.2"], ["true"]], n_workers=2, resource_monitor=monitor, poll_interval=0.05)
+
+        # Nothing running: always admitted, even if memory is short
+        self.assertTrue(queue.can_admit())
+        queue.launch(queue.pending.pop(0))
+        self.assertEqual(len(monitor.tracked), 1)
+        self.assertFalse(queue.can_admit())
+
+        # A new sample with enough free memory
+        monitor.history.append({"time_elapsed_s": 2, "cpu_percent": 50, "virtual_memory_percent": 50})
+        self.assertTrue(queue.can_admit())
+
+        # Peaks take precedence over the sample itself
+        monitor.history.append({"time_elapsed_s": 3, "cpu_percent": 50, "virtual_memory_percent": 50,
+                                "virtual_memory_percent_max": 95})
+        self.assertFalse(queue.can_admit())
+
+        queue.run()
+        self.assertEqual([job.exit_code for job in queue.jobs], [0, 0])
+        self.assertEqual(len(monitor.tracked), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""Testing LiveResourcePlot """
+
+import unittest
+import os
+from taskManager.LivePlot import LiveResourcePlot
+import tempfile
+
+
+HEADERS = ["time_elapsed_s", "cpu_percent", "virtual_memory_percent", "swap_memory_percent", "io_activity_read_mb",
+           "io_activity_write_mb", "io_activity_read_count", "io_activity_write_count", "disk_usage_percent"]
+
+
+def write_rows(file, start, stop):
+    for i in range(start, stop):
+        file.write("\t".join(["%.3f" % (i * 5)] + ["%.3f" % (i % 7)] * (len(HEADERS) - 1)) + "\n")
+
+
+class LiveResourcePlotTests(unittest.TestCase):
+    """Test LiveResourcePlot"""
+
+    def test_incremental_refresh(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            log_path = os.path.join(tempdir, "log.txt")
+            plot_path = os.path.join(tempdir, "log.png")
+            live_plot = LiveResourcePlot(log_path, plot_path)
+
+            self.assertFalse(live_plot.refresh())
+
+            with open(log_path, "w") as file:
+                file.write("cpu_total\tvirtual_memory_total_gb\tswap_memory_total_gb\tdisk_usage_total_gb\n")
+                file.write("4.000\t16.000\t2.000\t100.000\n")
+                file.write("\t".join(HEADERS) + "\n")
+                write_rows(file, 0, 10)
+                file.write("50.000\t1.0")
+
+            self.assertTrue(live_plot.refresh())
+            self.assertTrue(os.path.exists(plot_path))
+            self.assertEqual(live_plot.n_rows, 10)
+            line = live_plot.artists["cpu_percent"]["line"]
+            n_lines = len(line.axes.lines)
+
+            # Nothing new, so nothing is redrawn
+            self.assertFalse(live_plot.refresh())
+
+            with open(log_path, "a") as file:
+                file.write("00\t" + "\t".join(["1.000"] * (len(HEADERS) - 2)) + "\n")
+                write_rows(file, 11, 2000)
+
+            self.assertTrue(live_plot.refresh())
+            self.assertEqual(live_plot.n_rows, 2000)
+            self.assertEqual(live_plot.get_data()["time_elapsed_s"][10], 50.0)
+            self.assertEqual(live_plot.get_data()["cpu_percent"][10], 1.0)
+
+            # The same artists are updated rather than replaced
+            self.assertIs(live_plot.artists["cpu_percent"]["line"], line)
+            self.assertEqual(len(line.axes.lines), n_lines)
+            self.assertLessEqual(len(line.get_xdata()), live_plot.max_points)
+
+
+if __name__ == '__main__':
+    unittest.main()
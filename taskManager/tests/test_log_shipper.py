@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""Testing SegmentedLogShipper """
+
+import unittest
+import os
+from taskManager.LogShipper import SegmentedLogShipper, reassemble_segmented_log, read_manifest
+from taskManager.LogStorage import DirectoryStorage, get_storage, parse_byte_range
+import tempfile
+
+
+class FlakyStorage(DirectoryStorage):
+    """Fails the next upload of a given key"""
+    def __init__(self, root):
+        super().__init__(root)
+        self.failing_keys = set()
+
+    def put(self, key, data):
+        if key in self.failing_keys:
+            self.failing_keys.remove(key)
+            raise IOError("Simulated upload failure: %s" % key)
+
+        super().put(key, data)
+
+
+class LogShipperTests(unittest.TestCase):
+    """Test segmented shipping against a directory backend"""
+
+    def test_incremental_shipping(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            log_path = os.path.join(tempdir, "log.txt")
+            storage = DirectoryStorage(os.path.join(tempdir, "bucket"))
+            shipper = SegmentedLogShipper(log_path, storage, prefix="logs/run/", max_segment_size=16)
+
+            with open(log_path, "w") as file:
+                file.write("a\tb\n1\t2\n3\t")
+
+            # only complete lines are sealed
+            shipper.ship()
+            manifest = read_manifest(storage, shipper.manifest_key)
+            self.assertEqual(manifest["total_size"], 8)
+            self.assertEqual(len(manifest["segments"]), 1)
+
+            # nothing new, nothing uploaded
+            self.assertEqual(shipper.ship(), 0)
+
+            with open(log_path, "a") as file:
+                file.write("4\n" + "5\t6\n" * 10)
+
+            shipper.ship()
+            manifest = read_manifest(storage, shipper.manifest_key)
+            self.assertGreater(len(manifest["segments"]), 2)
+            self.assertTrue(all(segment["size"] <= 16 for segment in manifest["segments"]))
+
+            with open(log_path, "a") as file:
+                file.write("7\t8")
+
+            shipper.ship(final=True)
+            manifest = read_manifest(storage, shipper.manifest_key)
+            self.assertTrue(manifest["final"])
+
+            output_path = os.path.join(tempdir, "reassembled.txt")
+            reassemble_segmented_log(storage, shipper.manifest_key, output_path)
+
+            with open(log_path) as a, open(output_path) as b:
+                self.assertEqual(a.read(), b.read())
+
+    def test_failed_manifest_upload(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            log_path = os.path.join(tempdir, "log.txt")
+            storage = FlakyStorage(os.path.join(tempdir, "bucket"))
+            shipper = SegmentedLogShipper(log_path, storage, prefix="logs/run/")
+
+            with open(log_path, "w") as file:
+                file.write("a\tb\n1\t2\n")
+
+            shipper.ship()
+
+            with open(log_path, "a") as file:
+                file.write("3\t4\n")
+
+            # the segment is uploaded, but the manifest listing it is not
+            storage.failing_keys.add(shipper.manifest_key)
+            with self.assertRaises(IOError):
+                shipper.ship()
+
+            self.assertEqual(read_manifest(storage, shipper.manifest_key)["total_size"], 8)
+
+            # nothing new to seal, but the manifest is still behind
+            self.assertGreater(shipper.ship(), 0)
+            self.assertEqual(read_manifest(storage, shipper.manifest_key)["total_size"], 12)
+            self.assertEqual(shipper.ship(), 0)
+
+    def test_byte_ranges(self):
+        self.assertEqual(parse_byte_range("bytes=10-", size=100), (10, 100))
+        self.assertEqual(parse_byte_range("bytes=10-19", size=100), (10, 20))
+        self.assertEqual(parse_byte_range("bytes=-30", size=100), (70, 100))
+        self.assertEqual(parse_byte_range("bytes=-300", size=100), (0, 100))
+
+    def test_get_storage(self):
+        self.assertIsInstance(get_storage("file:///tmp/bucket"), DirectoryStorage)
+        self.assertEqual(get_storage("file:///tmp/bucket").root, "/tmp/bucket")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""Testing LogWriter """
+
+import unittest
+import os
+from taskManager.LogWriter import LogWriter
+import tempfile
+
+
+class LogWriterTests(unittest.TestCase):
+    """Test LogWriter"""
+
+    def test_flush_by_row_count(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "log.txt")
+            writer = LogWriter(path, flush_row_count=3, flush_byte_count=None, flush_interval=None)
+            writer.open(overwrite=True)
+
+            writer.write("header\n", row=False)
+            writer.write("1\n")
+            writer.write("2\n")
+            self.assertEqual(os.path.getsize(path), 0)
+
+            writer.write("3\n")
+            with open(path) as file:
+                self.assertEqual(file.read(), "header\n1\n2\n3\n")
+
+            writer.write("4\n")
+            writer.close()
+            with open(path) as file:
+                self.assertEqual(file.read(), "header\n1\n2\n3\n4\n")
+
+    def test_flush_by_byte_count(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "log.bin")
+            writer = LogWriter(path, flush_row_count=None, flush_byte_count=8, flush_interval=None, binary=True)
+
+            writer.write(b"1234")
+            self.assertEqual(os.path.getsize(path), 0)
+            writer.write(b"5678")
+            self.assertEqual(os.path.getsize(path), 8)
+
+            writer.write(b"9")
+            writer.flush(fsync=True)
+            self.assertEqual(os.path.getsize(path), 9)
+            writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
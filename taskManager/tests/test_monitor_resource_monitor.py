@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""Testing the ErrorTracker of monitor_resource_monitor.py """
+
+import unittest
+import tempfile
+import os
+from importlib.util import spec_from_file_location, module_from_spec
+from concurrent.futures import ThreadPoolExecutor
+from taskManager.LogStorage import DirectoryStorage
+from taskManager.RollupArchive import RollupArchive
+
+
+HOME = '/'.join(os.path.abspath(__file__).split("/")[:-3])
+
+# Scripts in bin/ aren't part of the package
+spec = spec_from_file_location("monitor_resource_monitor", os.path.join(HOME, "bin", "monitor_resource_monitor.py"))
+monitor = module_from_spec(spec)
+spec.loader.exec_module(monitor)
+
+HEADER = "cpu_total\tvirtual_memory_total_gb\n4.000\t15.500\n" \
+         "time_elapsed_s\tcpu_percent\tdisk_usage_percent\tvirtual_memory_percent\n"
+
+
+class ErrorTrackerTests(unittest.TestCase):
+    """Test a concurrent sweep over many logs"""
+
+    def test_sweep_errors(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            storage = DirectoryStorage(os.path.join(tempdir, "bucket"))
+            os.makedirs(os.path.join(tempdir, "bucket"))
+            tmp_dir = os.path.join(tempdir, "tmp")
+            os.makedirs(tmp_dir)
+
+            logs = list()
+            for i in range(40):
+                key = "log_%d.txt" % i
+                logs.append(monitor.ResourceMonitorLogFile("bucket/" + key))
+
+                # Every other log doesn't exist
+                if i % 2 == 1:
+                    continue
+
+                with open(storage.get_path(key), "w") as file:
+                    file.write(HEADER)
+                    for t in range(10):
+                        file.write("%d\t50.0\t10.0\t20.0\n" % (t * 5))
+
+            tracker = monitor.ErrorTracker(notifier=None, resource_logs=logs, tmp_dir=tmp_dir, interval=60,
+                                           n_lines=5, max_workers=8)
+            tracker.get_storage = lambda bucket: storage
+
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                tracker.sweep(executor)
+                self.assertEqual([len(tracker.errors_per_log[log.id]) for log in logs], [0, 1] * 20)
+                self.assertEqual(logs[0].averages["cpu_percent"], 50.0)
+
+                # Nothing changed since: every log reports an error
+                tracker.sweep(executor)
+                self.assertEqual([len(tracker.errors_per_log[log.id]) for log in logs], [1] * 40)
+                self.assertIn("not updated", tracker.errors_per_log[logs[0].id][0])
+
+    def test_exception_in_one_log(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            storage = DirectoryStorage(os.path.join(tempdir, "bucket"))
+            os.makedirs(os.path.join(tempdir, "bucket"))
+            tmp_dir = os.path.join(tempdir, "tmp")
+            os.makedirs(tmp_dir)
+
+            with open(storage.get_path("log_0.txt"), "w") as file:
+                file.write(HEADER)
+                for t in range(10):
+                    file.write("%d\t50.0\t10.0\t20.0\n" % (t * 5))
+
+            logs = [monitor.ResourceMonitorLogFile("bad_bucket/log_0.txt", id="bad"),
+                    monitor.ResourceMonitorLogFile("bucket/log_0.txt")]
+
+            def get_storage(bucket):
+                if bucket == "bad_bucket":
+                    raise ValueError("Invalid bucket name: %s" % bucket)
+
+                return storage
+
+            tracker = monitor.ErrorTracker(notifier=None, resource_logs=logs, tmp_dir=tmp_dir, interval=60,
+                                           n_lines=5, max_workers=2)
+            tracker.get_storage = get_storage
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                tracker.sweep(executor)
+
+            self.assertEqual(len(tracker.errors_per_log["bad"]), 1)
+            self.assertIn("Invalid bucket name", tracker.errors_per_log["bad"][0])
+            self.assertIsNone(logs[0].averages)
+            self.assertEqual(logs[1].averages["cpu_percent"], 50.0)
+
+    def test_tiers_uploaded_later(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            storage = DirectoryStorage(os.path.join(tempdir, "bucket"))
+            os.makedirs(os.path.join(tempdir, "bucket"))
+            tmp_dir = os.path.join(tempdir, "tmp")
+            os.makedirs(tmp_dir)
+
+            log_path = storage.get_path("log_0.txt")
+            with open(log_path, "w") as file:
+                file.write(HEADER)
+                for t in range(10):
+                    file.write("%d\t50.0\t10.0\t20.0\n" % (t * 5))
+
+            log = monitor.ResourceMonitorLogFile("bucket/log_0.txt")
+            tracker = monitor.ErrorTracker(notifier=None, resource_logs=[log], tmp_dir=tmp_dir, interval=60,
+                                           n_lines=5, max_workers=1, window=50)
+            tracker.get_storage = lambda bucket: storage
+
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                # No tiers yet: the log itself is summarized
+                tracker.sweep(executor)
+                self.assertIsNone(log.tier_key)
+                self.assertEqual(log.averages["cpu_percent"], 50.0)
+
+                archive = RollupArchive(log_path=log_path,
+                                        interval=5,
+                                        static_headers=["cpu_total"],
+                                        static_values=[4],
+                                        column_names=["time_elapsed_s", "cpu_percent", "disk_usage_percent",
+                                                      "virtual_memory_percent"],
+                                        column_dtypes=["<f8", "<f8", "<f8", "<f8"])
+                archive.open()
+                for t in range(10):
+                    archive.add([t * 5, 30.0, 10.0, 20.0])
+                archive.close()
+
+                # The miss wasn't cached: the tiers are found once it is time to look again
+                log.tier_lookup_time -= monitor.TIER_LOOKUP_INTERVAL
+                tracker.sweep(executor)
+                self.assertEqual(log.tier_key, "log_0.full.bin")
+                self.assertEqual(log.averages["cpu_percent"], 30.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""Testing NotificationQueue """
+
+import unittest
+import tempfile
+import threading
+import os
+from time import monotonic
+from taskManager.NotificationQueue import NotificationQueue
+
+
+class FakeNotifier:
+    def __init__(self, failures=0, delay=0):
+        self.failures = failures
+        self.delay = delay
+        self.sent = list()
+
+    def send_message(self, subject, body, subject_prefix=True, attachment=None):
+        if self.delay > 0:
+            threading.Event().wait(self.delay)
+
+        if self.failures > 0:
+            self.failures -= 1
+            return False
+
+        self.sent.append((subject, attachment))
+        return True
+
+
+class NotificationQueueTests(unittest.TestCase):
+    """Test retries, the exit deadline and resending from the spool"""
+
+    def test_retry(self):
+        with tempfile.TemporaryDirectory() as directory:
+            notifier = FakeNotifier(failures=2)
+            queue = NotificationQueue(notifier, spool_dir=directory, initial_backoff=0.01, log=lambda msg: None)
+            queue.start()
+
+            attachment = os.path.join(directory, "plot.png")
+            open(attachment, "w").close()
+
+            queue.send_message("subject", "body", attachment=[attachment, os.path.join(directory, "missing.png")])
+            queue.stop(timeout=5)
+
+            self.assertEqual(notifier.sent, [("subject", [attachment])])
+            self.assertEqual(queue.worker.failures, 2)
+            self.assertEqual(os.listdir(directory), ["plot.png"])
+
+    def test_deadline_and_resend(self):
+        with tempfile.TemporaryDirectory() as directory:
+            queue = NotificationQueue(FakeNotifier(delay=2), spool_dir=directory, log=lambda msg: None)
+            queue.start()
+
+            start = monotonic()
+            queue.send_message("first", "body")
+            queue.send_message("second", "body")
+            queue.stop(timeout=0.1)
+
+            self.assertLess(monotonic() - start, 1)
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+            # Spooled by a process that is still running (this one): not claimed
+            notifier = FakeNotifier()
+            queue = NotificationQueue(notifier, spool_dir=directory, log=lambda msg: None)
+            queue.start()
+            self.assertEqual(queue.resent, 0)
+            queue.stop(timeout=0)
+
+            # Spooled by a process that has exited
+            for filename in os.listdir(directory):
+                fields = filename.split("_")
+                fields[1] = "999999999"
+                os.rename(os.path.join(directory, filename), os.path.join(directory, "_".join(fields)))
+
+            queue = NotificationQueue(notifier, spool_dir=directory, log=lambda msg: None)
+            queue.start()
+            queue.stop(timeout=5)
+
+            self.assertEqual(queue.resent, 2)
+            self.assertEqual(sorted(subject for subject, _ in notifier.sent), ["first", "second"])
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_unsent_and_foreign_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "notes.json"), "w") as file:
+                file.write("{}")
+
+            # The notifier's attempt limit was reached: the message stays in the spool
+            notifier = FakeNotifier()
+            notifier.send_message = lambda **kwargs: None
+
+            queue = NotificationQueue(notifier, spool_dir=directory, log=lambda msg: None)
+            queue.start()
+            queue.send_message("subject", "body")
+            queue.stop(timeout=5)
+
+            self.assertEqual(queue.resent, 0)
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Testing plot_resources_main """
+
+import unittest
+import os
+from taskManager import plotting
+from matplotlib import pyplot
+import tempfile
+
+
+HEADERS = ["time_elapsed_s", "cpu_percent", "virtual_memory_percent", "swap_memory_percent", "io_activity_read_mb",
+           "io_activity_write_mb", "io_activity_read_count", "io_activity_write_count", "disk_usage_percent"]
+
+
+def write_log(path, n_rows, value, nan_keys=()):
+    with open(path, "w") as file:
+        file.write("cpu_total\tvirtual_memory_total_gb\tswap_memory_total_gb\tdisk_usage_total_gb\n")
+        file.write("4.000\t16.000\t2.000\t100.000\n")
+        file.write("\t".join(HEADERS) + "\n")
+
+        for i in range(1, n_rows + 1):
+            values = ["nan" if key in nan_keys else "%.3f" % value for key in HEADERS[1:]]
+            file.write("\t".join(["%.3f" % (i * 5)] + values) + "\n")
+
+
+class PlottingTests(unittest.TestCase):
+    """Test the fast rendering mode"""
+
+    def test_reused_template(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            long_log_path = os.path.join(tempdir, "log_long.txt")
+            short_log_path = os.path.join(tempdir, "log_short.txt")
+            write_log(long_log_path, n_rows=1200, value=80)
+            write_log(short_log_path, n_rows=12, value=2)
+
+            plotting.figure_templates.clear()
+
+            output_path = plotting.plot_resources_main(long_log_path, tempdir, fast=True)
+            self.assertTrue(os.path.exists(output_path))
+            self.assertEqual(len(plotting.figure_templates), 1)
+            key, (figure, axes, twin_axes) = list(plotting.figure_templates.items())[0]
+            self.assertAlmostEqual(axes[0][0].get_xlim()[1], 100, delta=10)
+
+            output_path = plotting.plot_resources_main(short_log_path, tempdir, fast=True)
+            self.assertTrue(os.path.exists(output_path))
+
+            # Same figure, with nothing left over from the first render
+            self.assertIs(plotting.figure_templates[key][0], figure)
+            self.assertAlmostEqual(axes[0][0].get_xlim()[1], 1, delta=0.1)
+            io_axis = [axis for row in axes for axis in row if axis.get_title() == "io activity read"][0]
+            self.assertLess(io_axis.get_ylim()[1], 80)
+            self.assertEqual(len(axes[0][0].lines), 2)
+
+    def test_nan_column(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            log_path = os.path.join(tempdir, "log.txt")
+            write_log(log_path, n_rows=1200, value=50, nan_keys=("io_activity_read_mb", "disk_usage_percent"))
+
+            for fast in (False, True):
+                output_path = plotting.plot_resources_main(log_path, tempdir, fast=fast)
+                self.assertTrue(os.path.exists(output_path))
+
+    def test_figure_closed(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            log_path = os.path.join(tempdir, "log.txt")
+            write_log(log_path, n_rows=12, value=2)
+
+            n_figures = len(pyplot.get_fignums())
+            plotting.plot_resources_main(log_path, tempdir)
+            self.assertEqual(len(pyplot.get_fignums()), n_figures)
+
+    def test_titles(self):
+        keys = plotting.get_time_series_axes({key: None for key in HEADERS + ["process_threads", "process_children"]})
+        titles = [plotting.get_title(key) for key in keys]
+        self.assertEqual(len(set(titles)), len(titles))
+        self.assertIn("process threads", titles)
+        self.assertEqual(plotting.get_title("disk_nvme0n1_read_mb_s"), "disk nvme0n1 read")
+        self.assertEqual(plotting.get_title("disk_nvme0n1_util_percent"), "disk nvme0n1 util")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+"""Testing ProcessTreeSampler """
+
+import unittest
+import tempfile
+import subprocess
+import signal
+import threading
+import os
+from collections import namedtuple
+from contextlib import contextmanager
+from time import sleep, monotonic
+from taskManager.ProcessTreeSampler import ProcessTreeSampler, read_children_pids
+
+
+IOCounters = namedtuple("IOCounters", ["read_bytes", "write_bytes"])
+MemoryInfo = namedtuple("MemoryInfo", ["rss"])
+
+
+class FakeProcess:
+    """
+    Stands in for a cached psutil.Process handle
+    """
+    def __init__(self, pid, running=True, read_bytes=0, write_bytes=0):
+        self.pid = pid
+        self.running = running
+        self.read_bytes = read_bytes
+        self.write_bytes = write_bytes
+
+    def is_running(self):
+        return self.running
+
+    @contextmanager
+    def oneshot(self):
+        yield
+
+    def cpu_percent(self, interval=None):
+        return 0.0
+
+    def memory_info(self):
+        return MemoryInfo(rss=1024 ** 2)
+
+    def num_threads(self):
+        return 1
+
+    def io_counters(self):
+        return IOCounters(self.read_bytes, self.write_bytes)
+
+
+class ProcessTreeSamplerTests(unittest.TestCase):
+    """Test the process cache, IO accounting and reparented descendants"""
+
+    def setUp(self):
+        self.processes = list()
+
+    def tearDown(self):
+        # Background children too
+        for process in self.processes:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            process.wait()
+
+    def spawn(self, command):
+        process = subprocess.Popen(command, shell=True, start_new_session=True)
+        self.processes.append(process)
+        return process
+
+    def test_read_children_pids(self):
+        with tempfile.TemporaryDirectory() as proc_root:
+            for tid, children in [("100", "101 102 "), ("103", "104\n")]:
+                os.makedirs(os.path.join(proc_root, "100", "task", tid))
+                with open(os.path.join(proc_root, "100", "task", tid, "children"), "w") as file:
+                    file.write(children)
+
+            self.assertEqual(sorted(read_children_pids(100, proc_root)), [101, 102, 104])
+            self.assertEqual(read_children_pids(200, proc_root), [])
+
+    def test_pid_reuse(self):
+        pid = os.getpid()
+        sampler = ProcessTreeSampler()
+
+        # The cached process exited and its pid was reused: the handle and the IO baseline are replaced
+        sampler.processes[pid] = FakeProcess(pid, running=False)
+        sampler.io_counters[pid] = (1, 2)
+
+        process = sampler.get_process(pid)
+        self.assertNotIsInstance(process, FakeProcess)
+        self.assertTrue(process.is_running())
+        self.assertNotIn(pid, sampler.io_counters)
+
+        # A descendant found in a previous sample isn't followed once its pid belongs to another process
+        sampler = ProcessTreeSampler()
+        sampler.processes[pid] = FakeProcess(pid, running=False)
+        sampler.process_roots[pid] = 1
+
+        self.assertEqual(sampler.walk(), [])
+        self.assertEqual(sampler.get_data()["process_children"], 0)
+        self.assertNotIn(pid, sampler.processes)
+
+    def test_io_deltas(self):
+        root = self.spawn("exec sleep 30")
+
+        sampler = ProcessTreeSampler(root.pid)
+        process = FakeProcess(root.pid, read_bytes=1024 ** 2, write_bytes=2 * 1024 ** 2)
+        sampler.processes[root.pid] = process
+
+        # No baseline yet: everything counts towards the first sample
+        data = sampler.get_data()
+        self.assertAlmostEqual(data["process_read_mb"], 1)
+        self.assertAlmostEqual(data["process_write_mb"], 2)
+        self.assertAlmostEqual(data["process_rss_mb"], 1)
+
+        process.read_bytes += 3 * 1024 ** 2
+        data = sampler.get_data()
+        self.assertAlmostEqual(data["process_read_mb"], 3)
+        self.assertAlmostEqual(data["process_write_mb"], 0)
+
+    def test_reparented_descendants(self):
+        root = self.spawn("sleep 30 & sleep 0.5")
+        sleep(0.2)
+
+        sampler = ProcessTreeSampler(root.pid)
+        self.assertGreaterEqual(sampler.get_data()["process_children"], 1)
+
+        # The background sleep outlives its parent and is reparented, it is still followed
+        root.wait()
+        data = sampler.get_data()
+        self.assertEqual(data["process_children"], 1)
+        self.assertNotIn(root.pid, sampler.root_pids)
+
+        orphan_pid = [pid for pid in sampler.processes if pid != root.pid][0]
+
+        sampler.remove_root(root.pid)
+        self.assertEqual(sampler.get_data()["process_children"], 0)
+
+        os.kill(orphan_pid, signal.SIGKILL)
+
+    def test_concurrent_roots(self):
+        # Like JobQueue: jobs are tracked and untracked by the main thread while the monitor samples
+        roots = [self.spawn("sleep 30 & exec sleep 30") for i in range(4)]
+
+        sampler = ProcessTreeSampler()
+        errors = list()
+        stop_event = threading.Event()
+
+        def sample():
+            while not stop_event.is_set():
+                try:
+                    sampler.get_data()
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        thread = threading.Thread(target=sample)
+        thread.start()
+
+        start = monotonic()
+        i = 0
+        while monotonic() - start < 1:
+            sampler.add_root(roots[i % len(roots)].pid)
+            sampler.remove_root(roots[(i + 2) % len(roots)].pid)
+            i += 1
+
+        stop_event.set()
+        thread.join()
+
+        self.assertEqual(errors[:1], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
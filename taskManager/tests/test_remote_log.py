@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""Testing RemoteLog """
+
+import unittest
+import os
+from taskManager.RemoteLog import RemoteLog
+from taskManager.LogShipper import SegmentedLogShipper
+from taskManager.LogStorage import DirectoryStorage
+from taskManager import binary_log
+import tempfile
+
+
+HEADER = "cpu_total\tvirtual_memory_total_gb\n4.000\t15.500\ntime_elapsed_s\tcpu_percent\n"
+
+
+def append_rows(path, start, stop):
+    with open(path, "a") as file:
+        for i in range(start, stop):
+            file.write("%.3f\t%.3f\n" % (i * 5, i % 100))
+
+
+class RemoteLogTests(unittest.TestCase):
+    """Test ranged updates against a directory backend"""
+
+    def test_tail_and_append(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            storage = DirectoryStorage(os.path.join(tempdir, "bucket"))
+            remote_path = storage.get_path("log.txt")
+            os.makedirs(os.path.dirname(remote_path))
+
+            with open(remote_path, "w") as file:
+                file.write(HEADER)
+            append_rows(remote_path, 0, 10000)
+
+            local_path = os.path.join(tempdir, "local.txt")
+            remote_log = RemoteLog(storage, "log.txt", local_path, n_lines=30, header_fetch_size=128)
+
+            self.assertTrue(remote_log.update())
+            with open(local_path) as file:
+                lines = file.readlines()
+
+            # header, and at least the last 30 lines, without fetching the whole log
+            self.assertEqual("".join(lines[:3]), HEADER)
+            self.assertGreaterEqual(len(lines) - 3, 30)
+            self.assertEqual(lines[-1], "%.3f\t%.3f\n" % (9999 * 5, 9999 % 100))
+            self.assertLess(remote_log.bytes_fetched, os.path.getsize(remote_path) / 10)
+
+            # unchanged: nothing is fetched
+            bytes_fetched = remote_log.bytes_fetched
+            self.assertFalse(remote_log.update())
+            self.assertEqual(remote_log.bytes_fetched, bytes_fetched)
+
+            # appended, with a partial line at the end: only the new bytes are fetched
+            append_rows(remote_path, 10000, 10005)
+            with open(remote_path, "a") as file:
+                file.write("50025.0")
+
+            self.assertTrue(remote_log.update())
+            self.assertLess(remote_log.bytes_fetched - bytes_fetched, 200)
+            with open(local_path) as file:
+                lines = file.readlines()
+            self.assertEqual(lines[-1], "%.3f\t%.3f\n" % (10004 * 5, 10004 % 100))
+
+            with open(remote_path, "a") as file:
+                file.write("00\t4.000\n")
+
+            self.assertTrue(remote_log.update())
+            with open(local_path) as file:
+                self.assertEqual(file.readlines()[-1], "50025.000\t4.000\n")
+
+    def test_segmented(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            log_path = os.path.join(tempdir, "log.txt")
+            storage = DirectoryStorage(os.path.join(tempdir, "bucket"))
+            shipper = SegmentedLogShipper(log_path, storage, prefix="logs", max_segment_size=1000)
+
+            with open(log_path, "w") as file:
+                file.write(HEADER)
+            append_rows(log_path, 0, 1000)
+            shipper.ship()
+
+            local_path = os.path.join(tempdir, "local.txt")
+            remote_log = RemoteLog(storage, shipper.manifest_key, local_path, n_lines=10, segmented=True)
+            self.assertTrue(remote_log.update())
+
+            append_rows(log_path, 1000, 1020)
+            shipper.ship()
+            self.assertTrue(remote_log.update())
+
+            with open(local_path) as file:
+                lines = file.readlines()
+
+            with open(log_path) as file:
+                expected = file.readlines()
+
+            self.assertEqual(lines[:3], expected[:3])
+            self.assertEqual(lines[3:], expected[-(len(lines) - 3):])
+            self.assertGreaterEqual(len(lines) - 3, 10)
+
+    def test_binary(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            storage = DirectoryStorage(os.path.join(tempdir, "bucket"))
+            tsv_path = os.path.join(tempdir, "log.txt")
+
+            with open(tsv_path, "w") as file:
+                file.write(HEADER)
+            append_rows(tsv_path, 0, 500)
+
+            os.makedirs(storage.root)
+            binary_log.tsv_to_binary(tsv_path, storage.get_path("log.bin"))
+
+            local_path = os.path.join(tempdir, "local.bin")
+            remote_log = RemoteLog(storage, "log.bin", local_path, n_lines=20)
+            self.assertTrue(remote_log.update())
+
+            headers, _, data, _, _, static_data = binary_log.read_binary_log(local_path)
+            self.assertEqual(len(data["cpu_percent"]), 20)
+            self.assertEqual(data["time_elapsed_s"][-1], 499 * 5)
+            self.assertEqual(static_data["cpu_total"], [4.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""Testing ResourceMonitor """
+
+import unittest
+import tempfile
+import threading
+from time import sleep
+from taskManager.ResourceMonitor import ResourceMonitor
+
+
+class ResourceMonitorTests(unittest.TestCase):
+    """Test the sampling thread"""
+
+    def test_sampling_error(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            logged = list()
+            monitor = ResourceMonitor(aws=False, output_dir=tempdir, interval=0.1, sampler_backend="psutil")
+            monitor.log = logged.append
+
+            # Fails once, after the first row
+            class FlakyCollector:
+                headers = ()
+                calls = 0
+
+                def get_data(self):
+                    self.calls += 1
+                    if self.calls == 3:
+                        raise KeyError(1234)
+                    return dict()
+
+            monitor.collectors.append(FlakyCollector())
+            monitor.background_launch()
+            sleep(1)
+            monitor.kill()
+
+            with open(monitor.log_path) as file:
+                n_rows = len(file.readlines()) - 3
+
+            self.assertTrue(any("row skipped" in message for message in logged))
+            self.assertGreater(n_rows, 3)
+            self.assertFalse(monitor.thread.is_alive())
+
+    def test_kill_timeout(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            monitor = ResourceMonitor(aws=False, output_dir=tempdir, interval=1, sampler_backend="psutil",
+                                      logfile=tempdir + "/monitor.log")
+
+            closed = list()
+            monitor.system_sampler.close = lambda: closed.append(True)
+
+            # Stuck in the middle of a sample
+            release = threading.Event()
+            monitor.thread = threading.Thread(target=release.wait, args=(5,))
+            monitor.thread.start()
+
+            monitor.kill(timeout=0.1)
+            self.assertEqual(closed, [])
+
+            release.set()
+            monitor.thread.join()
+            monitor.kill(timeout=0.1)
+            self.assertEqual(closed, [True])
+
+
+if __name__ == '__main__':
+    unittest.main()
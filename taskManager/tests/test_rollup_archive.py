@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""Testing RollupArchive """
+
+import unittest
+import tempfile
+import threading
+import os
+from taskManager.RollupArchive import RollupArchive, read_tier, select_tier, find_tier, get_tier_path
+
+
+TIERS = [("full", None, 100), ("1m", 60, 1200), ("10m", 600, 36000)]
+
+
+class RollupArchiveTests(unittest.TestCase):
+    """Test tier contents, bounded size and tier selection"""
+
+    def write_archive(self, directory, n_rows, interval=10):
+        log_path = os.path.join(directory, "log_test.txt")
+
+        archive = RollupArchive(log_path=log_path,
+                                interval=interval,
+                                static_headers=["cpu_total"],
+                                static_values=[4],
+                                column_names=["time_elapsed_s", "cpu_percent", "cpu_percent_max"],
+                                column_dtypes=["<f8", "<f8", "<f8"],
+                                tiers=TIERS)
+        archive.open()
+
+        for i in range(1, n_rows + 1):
+            archive.add([i * interval, i % 6, 100 if i == 3 else 0])
+
+        archive.close()
+
+        return log_path
+
+    def test_rollups(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = self.write_archive(directory, n_rows=600)
+
+            # Ring of 10 slots, in time order after reading
+            _, _, data, _, _, static_data = read_tier(get_tier_path(log_path, "full"))
+            self.assertEqual(data["time_elapsed_s"].tolist(), list(range(5910, 6010, 10)))
+            self.assertEqual(static_data["tier_resolution_s"], [10])
+
+            # 1 minute buckets: mean of 0..5, and the spike survives in the max column
+            _, _, data, _, _, _ = read_tier(get_tier_path(log_path, "1m"))
+            self.assertEqual(len(data["time_elapsed_s"]), 20)
+            self.assertAlmostEqual(data["cpu_percent"][-1], 2.5)
+
+            _, _, data, _, _, _ = read_tier(get_tier_path(log_path, "10m"))
+            self.assertEqual(data["cpu_percent_max"][0], 100)
+
+            sizes = [os.path.getsize(get_tier_path(log_path, name)) for name, _, _ in TIERS]
+            self.write_archive(directory, n_rows=1200)
+            self.assertEqual(sizes[:2], [os.path.getsize(get_tier_path(log_path, name)) for name, _, _ in TIERS[:2]])
+
+    def test_select_tier(self):
+        self.assertEqual(select_tier(TIERS, range_s=50, resolution_s=1), "full")
+        self.assertEqual(select_tier(TIERS, range_s=1000, resolution_s=100), "1m")
+        self.assertEqual(select_tier(TIERS, range_s=10000, resolution_s=1000), "10m")
+        self.assertIsNone(select_tier(TIERS, range_s=10000, resolution_s=100))
+
+        # Full resolution is only chosen when no rollup is fine enough, whatever the order of the tiers
+        self.assertEqual(select_tier(TIERS[::-1], range_s=50, resolution_s=1), "full")
+        self.assertEqual(select_tier(TIERS[::-1], range_s=50, resolution_s=100), "1m")
+
+    def test_find_tier(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = self.write_archive(directory, n_rows=600)
+
+            # The run lasted 6000s, which only the 10 minute tier covers
+            self.assertEqual(find_tier(log_path, max_points=10), get_tier_path(log_path, "10m"))
+            self.assertIsNone(find_tier(log_path, max_points=60))
+
+            self.assertEqual(find_tier(log_path, max_points=10, range_s=1000), get_tier_path(log_path, "1m"))
+            self.assertEqual(find_tier(log_path, max_points=5, range_s=60), get_tier_path(log_path, "full"))
+            self.assertIsNone(find_tier(os.path.join(directory, "other.txt"), max_points=60))
+
+    def test_read_tiers_while_adding(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = os.path.join(directory, "log_test.txt")
+            archive = RollupArchive(log_path=log_path,
+                                    interval=10,
+                                    static_headers=["cpu_total"],
+                                    static_values=[4],
+                                    column_names=["time_elapsed_s", "cpu_percent", "cpu_percent_max"],
+                                    column_dtypes=["<f8", "<f8", "<f8"],
+                                    tiers=TIERS)
+            archive.open()
+
+            def add_rows():
+                for i in range(1, 2001):
+                    archive.add([i * 10, i, i])
+
+            thread = threading.Thread(target=add_rows)
+            thread.start()
+
+            snapshot_path = os.path.join(directory, "snapshot.bin")
+            while thread.is_alive():
+                name, contents = archive.read_tiers()[0]
+                self.assertEqual(name, "full")
+
+                with open(snapshot_path, "wb") as file:
+                    file.write(contents)
+
+                # Every record was copied whole
+                _, _, data, _, _, _ = read_tier(snapshot_path)
+                self.assertEqual(list(data["time_elapsed_s"]), list(data["cpu_percent"] * 10))
+                self.assertEqual(list(data["cpu_percent"]), list(data["cpu_percent_max"]))
+
+            thread.join()
+            archive.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""Testing SampleRing """
+
+import unittest
+import tempfile
+import numpy
+import os
+from taskManager.SampleRing import SampleRing
+
+
+class SampleRingTests(unittest.TestCase):
+    """Test aggregation and wraparound of the ring buffer"""
+
+    def test_aggregate(self):
+        ring = SampleRing(["cpu_percent", "io_activity_read_mb"], size=100)
+
+        for i, value in enumerate([10, 50, 30]):
+            ring.append(i, {"cpu_percent": value, "io_activity_read_mb": i})
+
+        data = ring.aggregate(["cpu_percent"])
+        self.assertEqual(data, {"cpu_percent_min": 10, "cpu_percent_max": 50, "cpu_percent_mean": 30})
+
+        # Only the samples since the last aggregation count
+        ring.append(3, {"cpu_percent": 0, "io_activity_read_mb": 3})
+        self.assertEqual(ring.aggregate(["cpu_percent"])["cpu_percent_max"], 0)
+
+        # Nothing new: repeat the latest sample
+        self.assertEqual(ring.aggregate(["cpu_percent"])["cpu_percent_min"], 0)
+
+    def test_wraparound_dump(self):
+        ring = SampleRing(["value"], size=4)
+
+        for i in range(10):
+            ring.append(100 + i, {"value": i})
+
+        self.assertEqual(len(ring), 4)
+        self.assertEqual(ring.aggregate(["value"])["value_min"], 6)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "ring.txt")
+            ring.dump(path, start_time=100)
+
+            with open(path, "r") as file:
+                self.assertEqual(file.readline().strip(), "time_elapsed_s\tvalue")
+
+            table = numpy.loadtxt(path, skiprows=1)
+
+        self.assertEqual(table[:, 0].tolist(), [6, 7, 8, 9])
+        self.assertEqual(table[:, 1].tolist(), [6, 7, 8, 9])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""Testing SmtpConnection """
+
+import unittest
+import smtplib
+from unittest.mock import patch, MagicMock
+from taskManager.SmtpConnection import SmtpConnection, get_shared_connection, SHARED_CONNECTIONS
+from taskManager.Notifier import Notifier
+
+
+def make_server():
+    server = MagicMock()
+    server.noop.return_value = (250, b"OK")
+    return server
+
+
+class SmtpConnectionTests(unittest.TestCase):
+    """Test reuse of the session, health checks and reconnection"""
+
+    def tearDown(self):
+        SHARED_CONNECTIONS.clear()
+
+    @patch("taskManager.SmtpConnection.smtplib.SMTP")
+    def test_shared_between_notifiers(self, smtp):
+        smtp.side_effect = lambda *args, **kwargs: make_server()
+
+        notifiers = [Notifier(email_sender="a@b.c", email_recipients=["d@e.f"]) for _ in range(3)]
+        for notifier in notifiers:
+            notifier.send_message("subject", "body")
+
+        connection = get_shared_connection()
+        self.assertIs(notifiers[0].connection, connection)
+        self.assertEqual(smtp.call_count, 1)
+        self.assertEqual(connection.messages, 3)
+        self.assertEqual(connection.server.sendmail.call_count, 3)
+
+    @patch("taskManager.SmtpConnection.smtplib.SMTP")
+    def test_reconnect(self, smtp):
+        servers = [make_server() for _ in range(3)]
+        smtp.side_effect = servers
+
+        connection = SmtpConnection()
+        connection.sendmail("a@b.c", ["d@e.f"], "message")
+
+        # The session timed out while idle: the NOOP fails
+        servers[0].noop.side_effect = smtplib.SMTPServerDisconnected()
+        connection.sendmail("a@b.c", ["d@e.f"], "message")
+        self.assertIs(connection.server, servers[1])
+
+        # The session drops during the send: sent again on a new one
+        servers[1].sendmail.side_effect = smtplib.SMTPServerDisconnected()
+        connection.sendmail("a@b.c", ["d@e.f"], "message")
+        self.assertIs(connection.server, servers[2])
+        self.assertEqual(servers[2].sendmail.call_count, 1)
+
+        self.assertEqual((connection.connects, connection.reconnects, connection.messages), (3, 2, 3))
+
+    @patch("taskManager.SmtpConnection.smtplib.SMTP")
+    def test_no_server(self, smtp):
+        smtp.side_effect = ConnectionRefusedError()
+
+        self.assertRaises(ConnectionRefusedError, SmtpConnection().ensure_connected)
+
+
+if __name__ == '__main__':
+    unittest.main()
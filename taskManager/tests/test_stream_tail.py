@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""Testing StreamTail and the streamed output capture of ProcessHandler """
+
+import unittest
+import tempfile
+import os
+from taskManager.StreamTail import StreamTail
+from taskManager.ProcessHandler import ProcessHandler
+
+
+class StreamTailTests(unittest.TestCase):
+    """Test wraparound of the tail and capture of a process's output"""
+
+    def test_wraparound(self):
+        tail = StreamTail(size=8)
+
+        tail.append(b"abc")
+        self.assertEqual(tail.get_bytes(), b"abc")
+
+        tail.append(b"defgh")
+        tail.append(b"ij")
+        self.assertEqual(tail.get_bytes(), b"cdefghij")
+
+        # A chunk larger than the buffer
+        tail.append(b"0123456789")
+        self.assertEqual(tail.get_bytes(), b"23456789")
+        self.assertEqual(tail.count, 20)
+
+        tail = StreamTail(size=10)
+        tail.append(b"aaaa\nbbbb\ncc")
+        self.assertEqual(tail.get_text(), "bbbb\ncc")
+
+    def test_capture(self):
+        with tempfile.TemporaryDirectory() as directory:
+            stdout_path = os.path.join(directory, "stdout.txt")
+            stderr_path = os.path.join(directory, "stderr.txt")
+
+            handler = ProcessHandler(aws=False, output_tail_kb=1)
+            handler.launch_process(["sh", "-c", "seq 1 1000; echo failed >&2; exit 3"],
+                                   redirect_stdout=stdout_path,
+                                   redirect_stderr=stderr_path)
+
+            self.assertEqual(handler.exit_code, 3)
+            self.assertEqual(handler.stderr_tail.get_text(), "failed\n")
+            self.assertTrue(handler.stdout_tail.get_text().endswith("999\n1000\n"))
+            self.assertLessEqual(len(handler.stdout_tail), 1024)
+
+            # The files get everything
+            with open(stdout_path, "r") as file:
+                self.assertEqual(len(file.readlines()), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""Testing SystemSampler backends """
+
+import unittest
+from taskManager.SystemSampler import PsutilSampler, ProcSampler, get_system_sampler
+
+
+class SystemSamplerTests(unittest.TestCase):
+    """Test that both backends report the same columns and similar values"""
+
+    @unittest.skipUnless(ProcSampler.is_available(), "requires /proc")
+    def test_backends_agree(self):
+        proc_sampler = ProcSampler()
+        psutil_sampler = PsutilSampler()
+
+        proc_data = proc_sampler.get_data()
+        psutil_data = psutil_sampler.get_data()
+
+        self.assertEqual(set(proc_data.keys()), set(psutil_data.keys()))
+        self.assertEqual(proc_sampler.get_static_data(), psutil_sampler.get_static_data())
+
+        for key in ["virtual_memory_percent", "swap_memory_percent", "disk_usage_percent"]:
+            self.assertAlmostEqual(proc_data[key], psutil_data[key], delta=1)
+
+        # Cumulative counters can only have grown in between
+        self.assertLessEqual(proc_data["io_activity_read_count"], psutil_data["io_activity_read_count"])
+
+        proc_sampler.close()
+        proc_sampler.close()
+
+    def test_exclude(self):
+        sampler = get_system_sampler("psutil", exclude={"cpu_percent", "io_activity_read_mb", "io_activity_write_mb",
+                                                        "io_activity_read_count", "io_activity_write_count"})
+
+        self.assertEqual(set(sampler.get_data().keys()),
+                         {"virtual_memory_percent", "swap_memory_percent", "disk_usage_percent"})
+
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, get_system_sampler, "wmi")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+"""Testing TailReader """
+
+import unittest
+import os
+from taskManager.TailReader import TailReader
+import tempfile
+
+
+class TailReaderTests(unittest.TestCase):
+    """Test reading the end of a growing file"""
+
+    def test_last_lines(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "log.txt")
+            with open(path, "w") as file:
+                file.write("header\n")
+                for i in range(1000):
+                    file.write("%d\n" % i)
+                file.write("10")
+
+            reader = TailReader(path, block_size=16)
+
+            self.assertEqual(reader.read_last_lines(3), [b"997", b"998", b"999"])
+            self.assertEqual(len(reader.read_last_lines(2000)), 1001)
+            self.assertEqual(reader.read_last_lines(2000, start=len("header\n"))[0], b"0")
+            self.assertEqual(reader.read_last_lines(0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Testing UploadWorker """
+
+import unittest
+from taskManager.UploadWorker import UploadWorker
+from time import monotonic
+import threading
+
+
+class UploadWorkerTests(unittest.TestCase):
+    """Test UploadWorker"""
+
+    def test_retry_with_backoff(self):
+        calls = list()
+
+        def flaky_upload(final=False):
+            calls.append(final)
+            if len(calls) < 3:
+                raise IOError("object store unavailable")
+            return 100
+
+        worker = UploadWorker(flaky_upload, initial_backoff=0.01, max_backoff=0.02, log=lambda msg: None)
+        worker.start()
+        worker.submit(final=True)
+        worker.stop(timeout=5)
+
+        self.assertEqual(calls, [True, True, True])
+        self.assertEqual(worker.uploads, 1)
+        self.assertEqual(worker.failures, 2)
+        self.assertEqual(worker.bytes_uploaded, 100)
+
+    def test_submit_never_blocks(self):
+        release = threading.Event()
+
+        def slow_upload():
+            release.wait(5)
+            return 0
+
+        worker = UploadWorker(slow_upload, max_queue_size=1, log=lambda msg: None)
+        worker.start()
+
+        results = [worker.submit() for i in range(5)]
+        self.assertFalse(all(results))
+        self.assertGreater(worker.dropped, 0)
+
+        release.set()
+        worker.stop(timeout=5)
+        self.assertFalse(worker.thread.is_alive())
+
+    def test_give_up(self):
+        def failing_upload():
+            raise IOError("down")
+
+        worker = UploadWorker(failing_upload, max_attempts=2, initial_backoff=0.01, log=lambda msg: None)
+        worker.start()
+        worker.submit()
+        worker.stop(timeout=5)
+
+        self.assertEqual(worker.failures, 2)
+        self.assertEqual(worker.abandoned, 1)
+
+    def test_stop_deadline(self):
+        calls = list()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_upload(i):
+            calls.append(i)
+            started.set()
+            release.wait(5)
+            return 0
+
+        worker = UploadWorker(slow_upload, max_queue_size=3, log=lambda msg: None)
+        worker.start()
+
+        worker.submit(i=0)
+        started.wait(5)
+        for i in range(1, 4):
+            self.assertTrue(worker.submit(i=i))
+
+        # The queue is full and the first upload hangs: stop still returns on time, and starts nothing else
+        start = monotonic()
+        worker.stop(timeout=0.2, grace=0)
+        self.assertLess(monotonic() - start, 1)
+
+        release.set()
+        worker.thread.join(5)
+        self.assertEqual(calls, [0])
+        self.assertEqual(worker.abandoned, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()